@@ -0,0 +1,104 @@
+"""
+客户端上线耗时压测: 客户端与线程模式服务端之间经过一个UDP延时代理(模拟网络往返时间), 对比逐个请求等待应答
+(window=1, 心跳、注册、电话/功能按键、频率表、电台表依次获取)与流水线上线(startup, window=4)的总耗时
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_client_startup
+    python -m benchmark.bench_client_startup --rtt 50 --repeat 5
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+IP = '127.0.0.1'
+
+
+def _run_server(port, client_port):
+    """子进程: 启动被测服务端(屏蔽逐条打印), 应答发往代理"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        from sip.sip_server import SIPServer
+        SIPServer('bxp', IP, port, IP, client_port, 27000, 27002).receive_message()
+
+
+class DelayProxy:
+    """UDP延时代理: 客户端发往client_port的报文转发给服务端, 服务端发往server_port的应答转回客户端, 单向各延时rtt/2"""
+
+    def __init__(self, client_port, server_port, server_addr, rtt):
+        self.delay = rtt / 2
+        self.server_addr = server_addr
+        self.client_addr = None
+        self.client_side = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.client_side.bind((IP, client_port))
+        self.server_side = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server_side.bind((IP, server_port))
+        threading.Thread(target=self._forward, args=(self.client_side, True), daemon=True).start()
+        threading.Thread(target=self._forward, args=(self.server_side, False), daemon=True).start()
+
+    def _forward(self, sock, to_server):
+        while True:
+            data, addr = sock.recvfrom(65535)
+            if to_server:
+                self.client_addr = addr
+                target, out = self.server_addr, self.server_side
+            else:
+                target, out = self.client_addr, self.client_side
+            timer = threading.Timer(self.delay, out.sendto, args=(data, target))
+            timer.daemon = True
+            timer.start()
+
+
+def _client(port, proxy_port, window):
+    from sip.sip_client import SIPClient
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = SIPClient('bxp', IP, port, IP, proxy_port, 27100, 27102, window=window)
+    threading.Thread(target=client.receive_message, daemon=True).start()
+    return client
+
+
+def _sequential(client):
+    """原上线流程: 每个请求等待前一个请求的应答"""
+    client.keep_alive()
+    client.register()
+    client.get_phone_btn()
+    client.get_function_btn()
+    client.sync_tables()
+    client._wait_response()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='客户端上线耗时压测')
+    parser.add_argument('--rtt', type=float, default=20.0, help='模拟的往返时间(毫秒)')
+    parser.add_argument('--repeat', type=int, default=3, help='每种方式的上线次数, 取最好成绩')
+    parser.add_argument('--port', type=int, default=16560, help='服务端端口, 代理和客户端使用其后的端口')
+    args = parser.parse_args()
+
+    server_port, proxy_server_port, proxy_client_port = args.port, args.port + 1, args.port + 2
+    server = multiprocessing.Process(target=_run_server, args=(server_port, proxy_server_port), daemon=True)
+    server.start()
+    time.sleep(1.0)
+    DelayProxy(proxy_client_port, proxy_server_port, (IP, server_port), args.rtt / 1000)
+    try:
+        client_port = args.port + 3
+        for name, window, start in (('sequential', 1, _sequential), ('pipelined', 4, lambda c: c.startup())):
+            best = None
+            for _ in range(args.repeat):
+                client = _client(client_port, proxy_client_port, window)
+                client_port += 1
+                begin = time.perf_counter()
+                start(client)
+                elapsed = time.perf_counter() - begin
+                best = elapsed if best is None else min(best, elapsed)
+                assert client.status == 'online' and client.frequency_list and len(client.radios), name
+            print(f"{name:<12} window {window}   {best * 1e3:8.1f} ms   {best * 1000 / args.rtt:5.1f} RTT")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == '__main__':
+    main()
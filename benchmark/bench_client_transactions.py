@@ -0,0 +1,93 @@
+"""
+客户端事务层压测: 启动线程模式服务端, 客户端逐个发送心跳并等待应答, 统计往返时延和客户端进程的CPU占用;
+另测等待一个收不到应答的请求时的CPU占用
+
+--busy-wait按原_wait_response的忙等方式等待(while仍有在途事务: pass), 用作对比基线
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_client_transactions
+    python -m benchmark.bench_client_transactions --requests 2000 --busy-wait
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+
+IP = '127.0.0.1'
+
+
+def _run_server(port, client_port):
+    """子进程: 启动被测服务端(屏蔽逐条打印)"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        from sip.sip_server import SIPServer
+        SIPServer('bxp', IP, port, IP, client_port, 27000, 27002).receive_message()
+
+
+def _client(port, server_port):
+    from sip.sip_client import SIPClient
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = SIPClient('bxp', IP, port, IP, server_port, 27100, 27102)
+    threading.Thread(target=client.receive_message, daemon=True).start()
+    return client
+
+
+def _wait(client, transaction, busy_wait):
+    if busy_wait:
+        while client.transactions.pending:
+            pass
+    else:
+        transaction.wait()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='客户端事务层压测')
+    parser.add_argument('--requests', type=int, default=1000, help='心跳请求数')
+    parser.add_argument('--idle', type=float, default=1.0, help='等待无应答请求的时长(秒)')
+    parser.add_argument('--port', type=int, default=16460, help='服务端端口, 客户端使用其后两个端口')
+    parser.add_argument('--busy-wait', action='store_true', help='按原实现忙等')
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=_run_server, args=(args.port, args.port + 1), daemon=True)
+    server.start()
+    time.sleep(1.0)
+    try:
+        client = _client(args.port + 1, args.port)
+        latencies = []
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            _wait(client, client.keep_alive(), args.busy_wait)
+            latencies.append(time.perf_counter() - start)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        print(f"round trip   p50 {_percentile(latencies, 0.5) * 1e6:8.1f} us   "
+              f"p99 {_percentile(latencies, 0.99) * 1e6:8.1f} us   {args.requests / wall:8.0f} req/s   "
+              f"cpu {cpu / wall * 100:5.1f}%")
+    finally:
+        server.terminate()
+        server.join()
+
+    # 对端不回应答, 等待idle秒(期间按Timer E重传)
+    silent = _client(args.port + 2, args.port)
+    transaction = silent.keep_alive()
+    cpu_start = time.process_time()
+    if args.busy_wait:
+        deadline = time.monotonic() + args.idle
+        while silent.transactions.pending and time.monotonic() < deadline:
+            pass
+    else:
+        transaction.wait(args.idle)
+    print(f"idle wait    {args.idle:.1f} s   cpu {(time.process_time() - cpu_start) / args.idle * 100:5.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+报文解析/生成压测: 以benchmark.corpus中的全部报文形态为语料, 统计各操作的msgs/s、ns/msg和每条报文的内存分配
+
+操作:
+    generate        MessageGenerator.generate_message(生成str)
+    generate_bytes  MessageGenerator.generate_message_bytes
+    parse           解码后parse_sip_message(原有解析方式)
+    parse_view      SipMessageView.to_params(解析全部字段)
+    parse_lazy      SipMessageView, 只读取服务端处理函数用到的字段
+    roundtrip       generate_message_bytes后SipMessageView.to_params
+
+内存分配:
+    alloc_blocks    保留全部结果时每条报文新增的内存块数(sys.getallocatedblocks)
+    alloc_peak      单条报文处理过程中的峰值分配字节数(tracemalloc)
+
+用法(在仓库根目录执行, 不依赖网络):
+    python -m benchmark.bench_codec
+    python -m benchmark.bench_codec --ops parse parse_lazy --shapes INVITE "vcu_radio 200"
+    python -m benchmark.bench_codec --json results.json
+    python -m benchmark.bench_codec --compare results.json --threshold 10
+"""
+import argparse
+import copy
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmark.corpus import build_corpus
+from message_generator.message_generator import MessageGenerator
+from message_decoder.header_decoder import parse_sip_message
+from message_decoder.sip_message_view import SipMessageView
+
+# 服务端处理一条请求时读取的字段
+HANDLER_FIELDS = ('message_type', 'subject', 'method', 'branch', 'call_id', 'cseq', 'tag', 'local_user',
+                  'server_user', 'content')
+
+
+def _parse(data):
+    header, _, body = data.decode('utf-8').partition('\r\n\r\n')
+    params = parse_sip_message(header)
+    params.content = body if body else None
+    return params
+
+
+def _parse_lazy(data):
+    view = SipMessageView(data)
+    return [getattr(view, name) for name in HANDLER_FIELDS]
+
+
+def _operations(generator):
+    """{操作名: (单条处理函数, 输入类型)}, 输入类型为params时每次使用新的参数对象副本"""
+    return {
+        'generate': (generator.generate_message, 'params'),
+        'generate_bytes': (generator.generate_message_bytes, 'params'),
+        'parse': (_parse, 'bytes'),
+        'parse_view': (lambda data: SipMessageView(data).to_params(), 'bytes'),
+        'parse_lazy': (_parse_lazy, 'bytes'),
+        'roundtrip': (lambda params: SipMessageView(generator.generate_message_bytes(params)).to_params(), 'params'),
+    }
+
+
+def _inputs(entry, encoded, kind, count):
+    """按语料条目轮流取报文, 构造count条输入"""
+    if kind == 'bytes':
+        return [encoded[i % len(encoded)] for i in range(count)]
+    return [copy.copy(entry.params[i % len(entry.params)]) for i in range(count)]
+
+
+def time_operation(func, entry, encoded, kind, count, repeat):
+    """返回ns/msg, 取多轮中的最好成绩; 输入在计时前准备好"""
+    best = float('inf')
+    for _ in range(repeat):
+        items = _inputs(entry, encoded, kind, count)
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            for item in items:
+                func(item)
+            elapsed = time.perf_counter_ns() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+        best = min(best, elapsed / count)
+    return best
+
+
+def count_allocations(func, entry, encoded, kind, count):
+    """返回 (每条报文保留的内存块数, 每条报文处理过程中的峰值分配字节数)"""
+    items = _inputs(entry, encoded, kind, count)
+    results = [None] * count
+    gc.collect()
+    before = sys.getallocatedblocks()
+    for i, item in enumerate(items):
+        results[i] = func(item)
+    blocks = (sys.getallocatedblocks() - before) / count
+    del results
+
+    items = _inputs(entry, encoded, kind, count)
+    tracemalloc.start()
+    try:
+        peak = 0
+        for item in items:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            func(item)
+            peak += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return blocks, peak / count
+
+
+def run(ops, shapes, count, repeat, alloc_count):
+    """运行压测, 返回结果列表"""
+    generator = MessageGenerator()
+    operations = _operations(generator)
+    results = []
+    for entry in build_corpus():
+        if shapes and entry.name not in shapes:
+            continue
+        # 解析类操作的输入: 语料报文编码后的bytes
+        encoded = [generator.generate_message_bytes(copy.copy(params)) for params in entry.params]
+        for op in ops:
+            func, kind = operations[op]
+            ns = time_operation(func, entry, encoded, kind, count, repeat)
+            blocks, peak = count_allocations(func, entry, encoded, kind, alloc_count)
+            results.append({
+                'shape': entry.name,
+                'direction': entry.direction,
+                'op': op,
+                'msgs_per_s': round(1e9 / ns),
+                'ns_per_msg': round(ns),
+                'alloc_blocks': round(blocks, 1),
+                'alloc_peak': round(peak),
+                'bytes': round(sum(len(data) for data in encoded) / len(encoded)),
+            })
+    return results
+
+
+def print_results(results, baseline=None):
+    header = f"{'shape':<22}{'op':<16}{'bytes':>7}{'msgs/s':>12}{'ns/msg':>10}{'blocks':>8}{'peak(B)':>10}"
+    if baseline is not None:
+        header += f"{'vs base':>10}"
+    print(header)
+    for result in results:
+        line = (f"{result['shape']:<22}{result['op']:<16}{result['bytes']:>7}{result['msgs_per_s']:>12,}"
+                f"{result['ns_per_msg']:>10,}{result['alloc_blocks']:>8}{result['alloc_peak']:>10,}")
+        if baseline is not None:
+            base = baseline.get((result['shape'], result['op']))
+            line += f"{(result['ns_per_msg'] / base - 1) * 100:>+9.1f}%" if base else f"{'-':>10}"
+        print(line)
+
+
+def compare(results, baseline, threshold):
+    """返回ns/msg比基线变慢超过threshold(%)的结果"""
+    regressions = []
+    for result in results:
+        base = baseline.get((result['shape'], result['op']))
+        if base and (result['ns_per_msg'] / base - 1) * 100 > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    operation_names = list(_operations(MessageGenerator()))
+    parser = argparse.ArgumentParser(description='报文解析/生成压测')
+    parser.add_argument('--ops', nargs='+', choices=operation_names, default=operation_names, help='压测的操作')
+    parser.add_argument('--shapes', nargs='+', default=None, help='只压测指定的报文形态(默认全部)')
+    parser.add_argument('--count', type=int, default=2000, help='每轮每种报文形态处理的条数')
+    parser.add_argument('--repeat', type=int, default=5, help='测量轮数, 取最好成绩')
+    parser.add_argument('--alloc-count', type=int, default=200, help='统计内存分配时处理的条数')
+    parser.add_argument('--json', default=None, help='结果另存为JSON文件, "-"表示输出到标准输出')
+    parser.add_argument('--compare', default=None, help='与之前保存的JSON结果对比')
+    parser.add_argument('--threshold', type=float, default=10.0, help='--compare时判定为退化的变慢比例(%%)')
+    args = parser.parse_args()
+    if args.shapes:
+        unknown = set(args.shapes) - {entry.name for entry in build_corpus()}
+        if unknown:
+            parser.error(f"未知的报文形态: {', '.join(sorted(unknown))}")
+
+    results = run(args.ops, args.shapes, args.count, args.repeat, args.alloc_count)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = {(item['shape'], item['op']): item['ns_per_msg'] for item in json.load(file)['results']}
+
+    report = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'count': args.count,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.json == '-':
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_results(results, baseline)
+        if args.json:
+            with open(args.json, 'w') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) slower than baseline by more than {args.threshold}%",
+                  file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
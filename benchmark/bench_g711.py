@@ -0,0 +1,147 @@
+"""
+G.711编解码压测: 对比audioop(如可用)与rtp.g711的吞吐(百万采样/秒)
+
+    frame   逐帧调用bytes接口(每帧160个采样), 即RtpEndpoint和抖动缓冲区每20ms的用法;
+            mul为丢包补偿时上一帧减半(JitterBuffer._conceal)
+    batch   一个20ms媒体节拍内所有流的帧一次处理: audioop逐帧循环, g711用NumPy数组接口一次调用
+    tick    每个节拍的完整处理: 收到的帧解码 + 发送帧的均方根(VAD) + 编码; frame情况为单路流
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_g711
+    python -m benchmark.bench_g711 --streams 10 100 500 --ticks 200
+"""
+import argparse
+import random
+import struct
+import time
+import warnings
+
+from rtp import g711
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+FRAME = 160
+OPERATIONS = ('encode', 'decode', 'rms', 'mul', 'tick')
+
+
+def _speech(streams, rng):
+    """每路一帧16位PCM, 幅度随机(含静音), 近似多路通话中的混合负载"""
+    frames = []
+    for _ in range(streams):
+        amplitude = rng.choice([0, 50, 1000, 8000, 30000])
+        frames.append(struct.pack(f'={FRAME}h', *(rng.randint(-amplitude, amplitude) for _ in range(FRAME))))
+    return frames
+
+
+def _measure(function, samples, repeat):
+    """返回吞吐(百万采样/秒)"""
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return samples * repeat / (time.perf_counter() - start) / 1e6
+
+
+def _frame_cases(frame, codes):
+    def g711_tick():
+        g711.alaw2lin(codes)
+        g711.rms(frame)
+        g711.lin2alaw(frame)
+
+    cases = [('g711', {
+        'encode': lambda: g711.lin2alaw(frame),
+        'decode': lambda: g711.alaw2lin(codes),
+        'rms': lambda: g711.rms(frame),
+        'mul': lambda: g711.mul(frame, 0.5),
+        'tick': g711_tick,
+    })]
+    if audioop is not None:
+        def audioop_tick():
+            audioop.alaw2lin(codes, 2)
+            audioop.rms(frame, 2)
+            audioop.lin2alaw(frame, 2)
+
+        cases.insert(0, ('audioop', {
+            'encode': lambda: audioop.lin2alaw(frame, 2),
+            'decode': lambda: audioop.alaw2lin(codes, 2),
+            'rms': lambda: audioop.rms(frame, 2),
+            'mul': lambda: audioop.mul(frame, 2, 0.5),
+            'tick': audioop_tick,
+        }))
+    return cases
+
+
+def _batch_cases(frames, codes):
+    cases = []
+    if audioop is not None:
+        def audioop_tick():
+            for frame, code in zip(frames, codes):
+                audioop.alaw2lin(code, 2)
+                audioop.rms(frame, 2)
+                audioop.lin2alaw(frame, 2)
+
+        cases.append(('audioop', {
+            'encode': lambda: [audioop.lin2alaw(frame, 2) for frame in frames],
+            'decode': lambda: [audioop.alaw2lin(code, 2) for code in codes],
+            'rms': lambda: [audioop.rms(frame, 2) for frame in frames],
+            'tick': audioop_tick,
+        }))
+    if g711.numpy is not None:
+        numpy = g711.numpy
+        samples = numpy.frombuffer(b''.join(frames), dtype=numpy.int16).reshape(len(frames), FRAME)
+        code_array = numpy.frombuffer(b''.join(codes), dtype=numpy.uint8).reshape(len(codes), FRAME)
+
+        def numpy_tick():
+            g711.alaw2lin_array(code_array)
+            g711.voice_activity(samples, 300)
+            g711.lin2alaw_array(samples)
+
+        cases.append(('g711 numpy', {
+            'encode': lambda: g711.lin2alaw_array(samples),
+            'decode': lambda: g711.alaw2lin_array(code_array),
+            'rms': lambda: g711.rms_array(samples),
+            'tick': numpy_tick,
+        }))
+    return cases
+
+
+def _report(mode, streams, name, results):
+    columns = ''.join(f'{results[op]:>9.1f}' if op in results else f"{'-':>9}" for op in OPERATIONS)
+    print(f"{mode:<7}{streams:>8}  {name:<12}{columns}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='G.711编解码压测')
+    parser.add_argument('--streams', type=int, nargs='+', default=[10, 100, 500], help='batch情况的流数')
+    parser.add_argument('--frames', type=int, default=20000, help='frame情况的重复次数')
+    parser.add_argument('--ticks', type=int, default=500, help='batch情况的节拍数')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if audioop is None:
+        print("audioop不可用, 只测量g711")
+    if g711.numpy is None:
+        print("NumPy不可用, 跳过批量接口")
+
+    print("Msamples/s")
+    print(f"{'mode':<7}{'streams':>8}  {'case':<12}" + ''.join(f'{op:>9}' for op in OPERATIONS))
+    frame = _speech(1, rng)[0]
+    codes = g711.lin2alaw(frame)
+    for name, operations in _frame_cases(frame, codes):
+        results = {op: _measure(function, FRAME, args.frames) for op, function in operations.items()}
+        _report('frame', 1, name, results)
+    for streams in args.streams:
+        frames = _speech(streams, rng)
+        codes = [g711.lin2alaw(frame) for frame in frames]
+        for name, operations in _batch_cases(frames, codes):
+            results = {op: _measure(function, streams * FRAME, args.ticks) for op, function in operations.items()}
+            _report('batch', streams, name, results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+标识生成压测: 对比random.randint与IdGenerator生成branch/tag/Call-ID的速度(ids/s),
+并在多个进程(含fork子进程与重新启动的进程)中批量生成标识, 检查是否重复
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_id_generator --count 200000 --processes 4
+"""
+import argparse
+import multiprocessing
+import random
+import time
+
+from message_generator.id_generator import IdGenerator, process_ids
+
+
+def _randint_branch():
+    return f"z9hG4bK-{random.randint(1000000000, 9999999999)}"
+
+
+def _randint_tag():
+    return str(random.randint(1000000000, 9999999999))
+
+
+def _randint_call_id():
+    return f"{random.randint(1000000000, 9999999999)}@192.168.1.10"
+
+
+def measure(func, count, repeat):
+    """返回每秒生成的标识数, 取多轮中的最好成绩"""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        best = max(best, count / (time.perf_counter() - start))
+    return best
+
+
+def _collect_ids(count, queue):
+    """子进程: 使用进程内共用的生成器生成标识"""
+    queue.put([process_ids.next_id() for _ in range(count)])
+
+
+def check_unique(processes, count):
+    """fork与spawn两种方式各启动processes个进程生成标识, 返回 (总数, 重复数)"""
+    seen = set()
+    total = 0
+    for method in ('fork', 'spawn'):
+        if method not in multiprocessing.get_all_start_methods():
+            continue
+        context = multiprocessing.get_context(method)
+        queue = context.Queue()
+        workers = [context.Process(target=_collect_ids, args=(count, queue)) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        for _ in workers:
+            ids = queue.get()
+            total += len(ids)
+            seen.update(ids)
+        for worker in workers:
+            worker.join()
+    # 父进程自身生成的标识同样参与检查
+    ids = [process_ids.next_id() for _ in range(count)]
+    total += len(ids)
+    seen.update(ids)
+    return total, total - len(seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='标识生成压测')
+    parser.add_argument('--count', type=int, default=200000, help='每轮生成的标识数')
+    parser.add_argument('--repeat', type=int, default=5, help='测量轮数')
+    parser.add_argument('--processes', type=int, default=4, help='唯一性检查的进程数')
+    args = parser.parse_args()
+
+    ids = IdGenerator()
+    cases = [
+        ('branch', _randint_branch, ids.branch),
+        ('tag', _randint_tag, ids.next_id),
+        ('Call-ID', _randint_call_id, lambda: ids.call_id("192.168.1.10")),
+    ]
+    print(f"{'id':<10}{'randint(ids/s)':>18}{'IdGenerator(ids/s)':>22}{'speedup':>10}")
+    for name, before_func, after_func in cases:
+        before = measure(before_func, args.count, args.repeat)
+        after = measure(after_func, args.count, args.repeat)
+        print(f"{name:<10}{before:>18,.0f}{after:>22,.0f}{after / before:>9.2f}x")
+
+    total, duplicates = check_unique(args.processes, args.count)
+    print(f"uniqueness: {total:,} ids from {args.processes} fork + {args.processes} spawn processes + parent, "
+          f"{duplicates} duplicates")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+抖动缓冲区仿真: 按给定的网络时延抖动和丢包率生成一路20ms帧的到达序列, 以仿真时钟驱动, 对比原实现
+(按到达顺序放入deque, 收到包时才写扬声器)与JitterBuffer(按序列号排序、独立播放时钟、丢包隐藏)的
+乱序播放帧数、时间轴缺口和平均播放延时
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_jitter_buffer
+    python -m benchmark.bench_jitter_buffer --jitter 10 40 --loss 0.05 --frames 5000
+"""
+import argparse
+import random
+from collections import deque
+
+from rtp.jitter_buffer import JitterBuffer
+
+FRAME = 0.02  # 帧时长(秒)
+SAMPLES = 160
+
+
+def _arrivals(frames, base_delay, jitter, loss, seed):
+    """[(到达时间, 序列号, 时间戳)], 时延为base_delay加上均值为jitter的指数分布抖动"""
+    rng = random.Random(seed)
+    arrivals = []
+    for seq in range(frames):
+        if rng.random() < loss:
+            continue
+        arrivals.append((seq * FRAME + base_delay + rng.expovariate(1 / jitter) if jitter else seq * FRAME + base_delay,
+                         seq, seq * SAMPLES))
+    arrivals.sort()
+    return arrivals
+
+
+def _frame(seq):
+    return (seq & 0xFFFF).to_bytes(2, 'little') * SAMPLES
+
+
+def _deque_playout(arrivals):
+    """原实现: deque(maxlen=2)按到达顺序缓存, 每收到一包且已有2帧时写出一帧"""
+    buffer = deque(maxlen=2)
+    played = []
+    for arrival, seq, _ in arrivals:
+        buffer.append(seq)
+        if len(buffer) >= 2:
+            played.append((arrival, buffer.popleft()))
+    out_of_order = sum(1 for a, b in zip(played, played[1:]) if b[1] < a[1])
+    delay = sum(time - seq * FRAME for time, seq in played) / len(played)
+    return {'played': len(played), 'out of order': out_of_order, 'concealed': 0,
+            'gaps': sum(1 for a, b in zip(played, played[1:]) if b[1] > a[1] + 1), 'delay ms': delay * 1e3}
+
+
+def _jitter_buffer_playout(arrivals, frames):
+    """JitterBuffer: 每个播放节拍取一帧, 到达事件按仿真时间插入"""
+    buffer = JitterBuffer(frame_samples=SAMPLES)
+    lookup = {}
+    played, concealed, index = [], 0, 0
+    end = (frames + 20) * FRAME + max(arrival for arrival, _, _ in arrivals)
+    tick = 0.0
+    while tick < end:
+        while index < len(arrivals) and arrivals[index][0] <= tick:
+            arrival, seq, timestamp = arrivals[index]
+            data = _frame(seq)
+            # 按对象识别原始帧, 隐藏帧是新生成的数据
+            lookup[id(data)] = (seq, data)
+            buffer.put(seq & 0xFFFF, timestamp & 0xFFFFFFFF, data, arrival=arrival)
+            index += 1
+        frame = buffer.get()
+        if frame is not None:
+            entry = lookup.get(id(frame))
+            if entry is None or entry[1] is not frame:
+                concealed += 1
+            else:
+                played.append((tick, entry[0]))
+        tick += FRAME
+    out_of_order = sum(1 for a, b in zip(played, played[1:]) if b[1] < a[1])
+    delay = sum(time - seq * FRAME for time, seq in played) / len(played)
+    return {'played': len(played), 'out of order': out_of_order, 'concealed': concealed,
+            'gaps': buffer.stats['late'], 'delay ms': delay * 1e3}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抖动缓冲区仿真')
+    parser.add_argument('--frames', type=int, default=3000, help='发送的帧数')
+    parser.add_argument('--jitter', type=float, nargs='+', default=[0, 5, 20, 40], help='平均抖动(毫秒)')
+    parser.add_argument('--loss', type=float, default=0.03, help='丢包率')
+    parser.add_argument('--base-delay', type=float, default=30.0, help='固定网络时延(毫秒)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print("gaps: 原实现为播放时间轴上跳过的缺口数, JitterBuffer为晚于播放点被丢弃的帧数")
+    print(f"{'case':<14}{'jitter':>7}{'played':>8}{'out of order':>14}{'concealed':>11}{'gaps':>7}{'delay ms':>10}")
+    for jitter in args.jitter:
+        arrivals = _arrivals(args.frames, args.base_delay / 1e3, jitter / 1e3, args.loss, args.seed)
+        for name, result in (('deque', _deque_playout(arrivals)),
+                             ('JitterBuffer', _jitter_buffer_playout(arrivals, args.frames))):
+            print(f"{name:<14}{jitter:>7g}{result['played']:>8}{result['out of order']:>14}{result['concealed']:>11}"
+                  f"{result['gaps']:>7}{result['delay ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+媒体面压测: 在一个进程中启动多对RtpEndpoint, 音频后端为内存缓冲(循环播放一段正弦波, 不需要声卡),
+运行指定时长后统计每路的收包数、播放帧数、丢包隐藏帧数、实际帧率和进程CPU占用
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_media
+    python -m benchmark.bench_media --pairs 1 8 32 --seconds 5
+"""
+import argparse
+import contextlib
+import io
+import math
+import struct
+import time
+
+from rtp.audio_backend import MemoryBackend
+from rtp.rtp_endpoint import RtpEndpoint
+
+IP = '127.0.0.1'
+RATE = 8000
+
+
+def _tone(freq=440, seconds=1.0, amplitude=8000):
+    """16位单声道正弦波PCM数据"""
+    count = int(RATE * seconds)
+    return struct.pack(f'<{count}h', *(int(amplitude * math.sin(2 * math.pi * freq * i / RATE))
+                                       for i in range(count)))
+
+
+def _run(pairs, seconds, base_port):
+    """启动pairs对端点(每对互相发送)运行seconds秒; 返回(收包数, 播放帧数, 隐藏帧数, CPU占用)"""
+    tone = _tone()
+    endpoints = []
+    for index in range(pairs):
+        a, b = base_port + index * 2, base_port + index * 2 + 1
+        for local, remote in ((a, b), (b, a)):
+            endpoint = RtpEndpoint(IP, local, IP, remote, audio=MemoryBackend(tone, loop=True), keyboard_ptt=False)
+            endpoint.is_recording = True
+            endpoints.append(endpoint)
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    for endpoint in endpoints:
+        endpoint.start()
+    time.sleep(seconds)
+    cpu = (time.process_time() - cpu_start) / (time.monotonic() - wall_start)
+    received = sum(endpoint.jitter_buffer.stats['received'] for endpoint in endpoints)
+    played = sum(len(endpoint.audio.output) // 2 // endpoint.frame_size for endpoint in endpoints)
+    concealed = sum(endpoint.jitter_buffer.stats['concealed'] for endpoint in endpoints)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for endpoint in endpoints:
+            endpoint.stop()
+    return received, played, concealed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='媒体面压测')
+    parser.add_argument('--pairs', type=int, nargs='+', default=[1, 4, 16], help='端点对数')
+    parser.add_argument('--seconds', type=float, default=3.0, help='每种情况的运行时长(秒)')
+    parser.add_argument('--port', type=int, default=30000, help='起始RTP端口')
+    args = parser.parse_args()
+
+    print(f"{'streams':>8}{'received':>10}{'played':>9}{'concealed':>11}{'fps/stream':>12}{'cpu':>8}")
+    for pairs in args.pairs:
+        received, played, concealed, cpu = _run(pairs, args.seconds, args.port)
+        streams = pairs * 2
+        print(f"{streams:>8}{received:>10}{played:>9}{concealed:>11}{received / streams / args.seconds:>12.1f}"
+              f"{cpu * 100:>7.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+参数对象压测: 以benchmark.corpus中的全部报文为样本, 对比带__slots__的参数类与按原定义生成的__dict__参数类
+每个实例占用的内存和构造时间
+
+构造参数取语料报文中不等于默认值的字段, 与sip_client.py/sip_server.py构造报文参数的方式一致
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_params
+    python -m benchmark.bench_params --count 20000 --repeat 7
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+
+from benchmark.corpus import build_corpus
+
+
+def dict_twin(cls, _cache={}):
+    """按cls的字段生成不带__slots__的同名数据类(原有实现), 用作对比基线"""
+    twin = _cache.get(cls)
+    if twin is None:
+        spec = [(f.name, f.type, field(default=f.default) if f.default is not MISSING else field())
+                for f in fields(cls)]
+        twin = _cache[cls] = make_dataclass(cls.__name__, spec)
+    return twin
+
+
+def corpus_samples():
+    """返回 [(报文形态, 参数类, 构造参数)]"""
+    samples = []
+    for entry in build_corpus():
+        for params in entry.params:
+            kwargs = {f.name: getattr(params, f.name) for f in fields(params)
+                      if getattr(params, f.name) != f.default}
+            samples.append((entry.name, type(params), kwargs))
+    return samples
+
+
+def instance_bytes(samples, make_class, count):
+    """每个实例保留的内存字节数(含__dict__, 不含字段值本身)"""
+    classes = [make_class(cls) for _, cls, _ in samples]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        instances = [classes[i % len(samples)](**samples[i % len(samples)][2]) for i in range(count)]
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    # 扣除保存实例的列表本身
+    return (retained - instances.__sizeof__()) / count
+
+
+def construct_ns(samples, make_class, count, repeat):
+    """构造一个实例的耗时(ns), 取多轮中的最好成绩"""
+    calls = [(make_class(cls), kwargs) for _, cls, kwargs in samples]
+    calls = [calls[i % len(calls)] for i in range(count)]
+    best = float('inf')
+    for _ in range(repeat):
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            for cls, kwargs in calls:
+                cls(**kwargs)
+            elapsed = time.perf_counter_ns() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+        best = min(best, elapsed / count)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='参数对象内存/构造时间压测')
+    parser.add_argument('--count', type=int, default=10000, help='每轮构造的实例数')
+    parser.add_argument('--repeat', type=int, default=5, help='测量轮数, 取最好成绩')
+    args = parser.parse_args()
+
+    samples = corpus_samples()
+    variants = [('__dict__', dict_twin), ('__slots__', lambda cls: cls)]
+    print(f"{len(samples)} messages in corpus")
+    print(f"{'variant':<12}{'bytes/obj':>12}{'ns/obj':>10}")
+    results = {}
+    for name, make_class in variants:
+        size = instance_bytes(samples, make_class, args.count)
+        ns = construct_ns(samples, make_class, args.count, args.repeat)
+        results[name] = (size, ns)
+        print(f"{name:<12}{size:>12.0f}{ns:>10.0f}")
+    (dict_size, dict_ns), (slot_size, slot_ns) = results['__dict__'], results['__slots__']
+    print(f"memory {slot_size / dict_size - 1:+.1%}, construction {slot_ns / dict_ns - 1:+.1%}")
+
+    print(f"\n{'shape':<22}{'class':<20}{'dict B':>8}{'slots B':>9}{'dict ns':>9}{'slots ns':>10}")
+    for shape in dict.fromkeys(name for name, _, _ in samples):
+        subset = [sample for sample in samples if sample[0] == shape]
+        row = [instance_bytes(subset, make_class, 1000) for _, make_class in variants]
+        row += [construct_ns(subset, make_class, 2000, args.repeat) for _, make_class in variants]
+        print(f"{shape:<22}{subset[0][1].__name__:<20}{row[0]:>8.0f}{row[1]:>9.0f}{row[2]:>9.0f}{row[3]:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+消息体编解码压测: 对payload_schema中注册的全部载荷, 以config/response_message_body.json中的消息体为样本,
+统计struct解码(decode)、编码(encode)及原有ctypes/切片解码的耗时, 并检查编码后再解码与原记录一致
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_payloads
+    python -m benchmark.bench_payloads --number 2000
+"""
+import argparse
+import base64
+import json
+import sys
+import timeit
+
+from message_decoder.payload_schema import SCHEMAS
+from message_decoder.role_info_decoder import RoleInfo
+from message_decoder.tel_btn_info_decoder import TelBtnInfo
+from message_decoder.freq_btn_info_decoder import FreqBtnInfo
+from message_decoder.radio_btn_info_decoder import RadioInfo
+from message_decoder.fun_btn_info_decoder import MyFunBtnInfo
+
+# {载荷名: 原有解码方式}
+LEGACY_PARSERS = {
+    'role_info': lambda data: RoleInfo().parse(base64.b64encode(data).decode()),
+    'phone_bt_info': lambda data: TelBtnInfo.parse(base64.b64encode(data).decode()),
+    'frequency_bt_info': lambda data: FreqBtnInfo.parse(base64.b64encode(data).decode()),
+    'radio_bt_info': lambda data: RadioInfo.parse(base64.b64encode(data).decode()),
+    'func_bt_info': lambda data: MyFunBtnInfo.parse(base64.b64encode(data).decode()),
+}
+
+
+def load_samples(body_path):
+    """{载荷名: 解码后的消息体bytes}, 分片的表格拼接为一张表"""
+    with open(body_path, 'r') as file:
+        data = json.load(file)
+    samples = {}
+    for subject in data.values():
+        for key, value in subject.items():
+            name = key.rstrip('0123456789')
+            if name in SCHEMAS and (name not in samples or SCHEMAS[name].table):
+                raw = base64.b64decode(value)
+                samples[name] = samples.get(name, b'') + raw if SCHEMAS[name].table else raw
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='消息体编解码压测')
+    parser.add_argument('--number', type=int, default=500, help='每轮执行次数')
+    parser.add_argument('--repeat', type=int, default=5, help='测量轮数, 取最好成绩')
+    parser.add_argument('--body', default='./config/response_message_body.json', help='报文消息体配置')
+    args = parser.parse_args()
+
+    def measure(func):
+        return min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number * 1e6
+
+    samples = load_samples(args.body)
+    failures = 0
+    print(f"{'payload':<20}{'records':>8}{'bytes':>7}{'decode us':>11}{'encode us':>11}{'legacy us':>11}"
+          f"{'roundtrip':>11}")
+    for name, schema in SCHEMAS.items():
+        data = samples.get(name)
+        if data is None:
+            print(f"{name:<20}{'no sample':>8}")
+            continue
+        records = schema.decode(data)
+        encoded = schema.encode(records)
+        # 编码后再解码应还原全部字段; 原消息体中NUL之后的未初始化字节不保留
+        ok = schema.decode(encoded) == records
+        failures += not ok
+        legacy = LEGACY_PARSERS.get(name)
+        print(f"{name:<20}{len(records) if schema.table else 1:>8}{len(data):>7}"
+              f"{measure(lambda: schema.decode(data)):>11.1f}{measure(lambda: schema.encode(records)):>11.1f}"
+              f"{measure(lambda: legacy(data)) if legacy else float('nan'):>11.1f}"
+              f"{('ok' if ok else 'MISMATCH') + ('' if encoded == data[:len(encoded)] else '*'):>11}")
+    print("* 编码结果与原消息体不逐字节相同(原消息体文本NUL之后含未初始化字节)")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
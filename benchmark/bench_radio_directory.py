@@ -0,0 +1,123 @@
+"""
+电台目录压测: 生成指定规模的电台表, 对比原有的radio_dict + 选中电台列表与RadioDirectory在
+切换判断、选中/退出电台和按频率、可用性查询上的耗时, 以及每个电台占用的内存
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_radio_directory
+    python -m benchmark.bench_radio_directory --radios 100 1000 10000
+"""
+import argparse
+import gc
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from data_classes.radio_directory import RadioDirectory
+
+
+@dataclass
+class DictRadio:
+    """原有的Radio定义(不带__slots__), 用作对比基线"""
+    freq: Optional[str] = None
+    type: Optional[int] = 0
+    avail: Optional[int] = 0
+
+
+def _records(radios, freqs):
+    # 电台号, 频率, 收发类型, 是否可用; 频率字符串每条单独生成, 与逐条解码的结果相同
+    return [(f'{i:06d}', f'{120000 + i % freqs * 25:.3f}'[:7], i % 2, int(i % 10 != 0)) for i in range(radios)]
+
+
+def _flat(records):
+    radio_dict = {code: DictRadio(freq=freq, type=type, avail=avail) for code, freq, type, avail in records}
+    return radio_dict, [], []
+
+
+def _directory(records):
+    directory = RadioDirectory()
+    for code, freq, type, avail in records:
+        directory.update(code, freq, type, avail)
+    return directory
+
+
+def _flat_needs_switch(radio_dict, send_radio, recv_radio, channel):
+    """原is_switch_radio中的判断"""
+    send_channel = send_radio[0] if len(send_radio) > 0 else None
+    recv_channel = recv_radio[0] if len(recv_radio) > 0 else None
+    if send_channel and radio_dict[channel].freq != radio_dict[send_channel].freq:
+        return True
+    if recv_channel and radio_dict[channel].freq != radio_dict[recv_channel].freq:
+        return True
+    return False
+
+
+def _flat_toggle(radio_dict, send_radio, recv_radio, port):
+    """原_handle_radio_response中的选中与退出"""
+    if radio_dict[port].type == 0:
+        send_radio.append(port)
+    else:
+        recv_radio.append(port)
+    if port in send_radio:
+        send_radio.remove(port)
+    elif port in recv_radio:
+        recv_radio.remove(port)
+
+
+def _memory(build, records):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(records)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def _cases(records):
+    """{名称: (原实现, RadioDirectory)}"""
+    radio_dict, send_radio, recv_radio = _flat(records)
+    directory = _directory(records)
+    # 选中一半电台, 切换判断和退出落在列表末尾
+    for code, _, type, _ in records[:len(records) // 2]:
+        (send_radio if type == 0 else recv_radio).append(code)
+        directory.activate(code)
+    last = records[len(records) // 2 - 1][0]
+    freq = records[-1][1]
+    return {
+        'needs switch': (lambda: _flat_needs_switch(radio_dict, send_radio, recv_radio, last),
+                         lambda: directory.needs_switch(last)),
+        'activate + deactivate': (lambda: _flat_toggle(radio_dict, send_radio, recv_radio, last),
+                                  lambda: (directory.activate(last), directory.deactivate(last))),
+        'is active': (lambda: last in send_radio or last in recv_radio,
+                      lambda: directory.is_active(last)),
+        'radios on freq': (lambda: [code for code, radio in radio_dict.items() if radio.freq == freq],
+                           lambda: directory.with_freq(freq)),
+        'available count': (lambda: sum(1 for radio in radio_dict.values() if radio.avail),
+                            lambda: len(directory.available())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='电台目录压测')
+    parser.add_argument('--radios', type=int, nargs='+', default=[100, 1000, 5000], help='电台数量')
+    parser.add_argument('--freqs', type=int, default=50, help='不同频率的数量')
+    parser.add_argument('--repeat', type=int, default=5, help='测量轮数, 取最好成绩')
+    args = parser.parse_args()
+
+    print(f"{'case':<24}{'radios':>8}{'flat ns':>12}{'directory ns':>14}")
+    for radios in args.radios:
+        records = _records(radios, args.freqs)
+        for name, funcs in _cases(records).items():
+            results = []
+            for func in funcs:
+                number = 2000
+                results.append(min(timeit.repeat(func, number=number, repeat=args.repeat)) / number * 1e9)
+            print(f"{name:<24}{radios:>8}{results[0]:>12.0f}{results[1]:>14.0f}")
+        flat_size, directory_size = _memory(_flat, records), _memory(_directory, records)
+        print(f"{'bytes/radio':<24}{radios:>8}{flat_size / radios:>12.0f}{directory_size / radios:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
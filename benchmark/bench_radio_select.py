@@ -0,0 +1,95 @@
+"""
+电台选中压测: 启动线程模式服务端(音频后端null), 客户端反复执行一轮电台操控
+(INVITE选中首个电台 -> REFER选中同频的另一个电台 -> REFER(method=BYE)退出该电台 -> BYE退出最后一个电台),
+统计每种请求从发送到事务结束的时延和事务的结束状态
+
+每个请求都应在一个往返内以COMPLETED结束; 出现TIMEOUT说明应答没有结束事务(请求会重传直到64*T1超时),
+此时以非零状态退出
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_radio_select
+    python -m benchmark.bench_radio_select --rounds 50
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from sip.transaction import COMPLETED
+
+IP = '127.0.0.1'
+STEPS = ('INVITE', 'REFER', 'REFER BYE', 'BYE')
+
+
+def _run_server(port, client_port, rtp_port):
+    """子进程: 启动被测服务端(屏蔽逐条打印)"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        from sip.sip_server import SIPServer
+        SIPServer('bxp', IP, port, IP, client_port, rtp_port, rtp_port + 100, audio_backend='null').receive_message()
+
+
+def _same_freq_pair(client):
+    """取同一频率的两个电台, 第二个选中时发送REFER而不需要切换"""
+    by_freq = {}
+    for code, radio in client.radios.radios.items():
+        by_freq.setdefault(radio.freq, []).append(code)
+        if len(by_freq[radio.freq]) == 2:
+            return by_freq[radio.freq]
+    raise RuntimeError("没有同频的两个电台")
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='电台选中压测')
+    parser.add_argument('--rounds', type=int, default=20, help='电台操控的轮数')
+    parser.add_argument('--timeout', type=float, default=5.0, help='单个请求的等待上限(秒)')
+    parser.add_argument('--port', type=int, default=16480, help='服务端端口, 客户端使用其后一个端口')
+    parser.add_argument('--rtp-port', type=int, default=27600, help='服务端RTP起始端口, 客户端使用其后100个端口')
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=_run_server, args=(args.port, args.port + 1, args.rtp_port), daemon=True)
+    server.start()
+    time.sleep(1.0)
+    latencies = {step: [] for step in STEPS}
+    states = {step: {} for step in STEPS}
+    try:
+        from sip.sip_client import SIPClient
+        with contextlib.redirect_stdout(io.StringIO()):
+            client = SIPClient('bxp', IP, args.port + 1, IP, args.port, args.rtp_port + 100, args.rtp_port,
+                               audio_backend='null')
+            threading.Thread(target=client.receive_message, daemon=True).start()
+            client.startup()
+            first, second = _same_freq_pair(client)
+            for _ in range(args.rounds):
+                for step, request in zip(STEPS, (lambda: client.select_radio(first),
+                                                 lambda: client.select_radio(second),
+                                                 lambda: client.bye(second),
+                                                 lambda: client.bye(first))):
+                    start = time.perf_counter()
+                    transaction = request()
+                    transaction.wait(args.timeout)
+                    latencies[step].append(time.perf_counter() - start)
+                    states[step][transaction.state] = states[step].get(transaction.state, 0) + 1
+    finally:
+        server.terminate()
+        server.join()
+
+    print(f"{'request':<11}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}  states")
+    for step in STEPS:
+        values = latencies[step]
+        print(f"{step:<11}{_percentile(values, 0.5) * 1e3:>9.2f}{_percentile(values, 0.99) * 1e3:>9.2f}"
+              f"{max(values) * 1e3:>9.2f}  {states[step]}")
+    if any(set(counts) != {COMPLETED} for counts in states.values()):
+        sys.exit("存在未以COMPLETED结束的电台操控事务")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+多路RTP引擎压测: 在一个进程中启动N路流(两两互发, 全部处于讲话状态, 音频后端为循环播放正弦波的内存缓冲),
+统计每路流的CPU占用、每路实际收包帧率、接收端测得的到达抖动(RFC 3550, 所有流的平均值和最大值),
+以及RtpEngine媒体时钟节拍相对计划时间的延迟(p50/p99/max)
+
+--baseline同时测量每路一个RtpEndpoint(发送线程和接收兼播放线程, 各自计时)的方式作对比,
+流数超过--baseline-max时不测(线程过多时进程无法在合理时间内完成)
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_rtp_engine
+    python -m benchmark.bench_rtp_engine --streams 10 100 500 --seconds 5 --baseline
+"""
+import argparse
+import contextlib
+import io
+import math
+import struct
+import time
+
+from rtp.audio_backend import MemoryBackend
+from rtp.rtp_endpoint import RtpEndpoint
+from rtp.rtp_engine import RtpEngine
+
+IP = '127.0.0.1'
+RATE = 8000
+
+
+def _tone(freq=440, seconds=1.0, amplitude=8000):
+    count = int(RATE * seconds)
+    return struct.pack(f'={count}h', *(int(amplitude * math.sin(2 * math.pi * freq * i / RATE))
+                                       for i in range(count)))
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def _open(case, engine, local, remote, tone):
+    audio = MemoryBackend(tone, loop=True)
+    if case == 'engine':
+        stream = engine.open_stream(IP, local, IP, remote, audio=audio)
+    else:
+        stream = RtpEndpoint(IP, local, IP, remote, audio=audio, keyboard_ptt=False)
+    stream.is_recording = True
+    return stream
+
+
+def _run(case, count, seconds, warmup, base_port, tone):
+    """启动count路流, 预热warmup秒后测量seconds秒"""
+    engine = RtpEngine() if case == 'engine' else None
+    streams = []
+    for index in range(count // 2):
+        a, b = base_port + index * 4, base_port + index * 4 + 2
+        streams.append(_open(case, engine, a, b, tone))
+        streams.append(_open(case, engine, b, a, tone))
+    for stream in streams:
+        stream.start()
+    time.sleep(warmup)
+
+    received = sum(stream.jitter_buffer.stats['received'] for stream in streams)
+    if engine is not None:
+        engine.lateness.clear()
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    time.sleep(seconds)
+    wall = time.monotonic() - wall_start
+    cpu = (time.process_time() - cpu_start) / wall
+    received = sum(stream.jitter_buffer.stats['received'] for stream in streams) - received
+    # 到达抖动由采样数换算为毫秒
+    jitters = [stream.jitter_buffer.jitter / RATE * 1e3 for stream in streams]
+    lateness = list(engine.lateness) if engine is not None else []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for stream in streams:
+            stream.stop()
+    if engine is not None:
+        engine.stop()
+    return {
+        'cpu': cpu / len(streams),
+        'fps': received / len(streams) / wall,
+        'jitter': sum(jitters) / len(jitters),
+        'jitter max': max(jitters),
+        'tick p50': _percentile(lateness, 0.5),
+        'tick p99': _percentile(lateness, 0.99),
+        'tick max': max(lateness, default=0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多路RTP引擎压测')
+    parser.add_argument('--streams', type=int, nargs='+', default=[10, 100, 500], help='流数(偶数, 两两互发)')
+    parser.add_argument('--seconds', type=float, default=5.0, help='每种情况的测量时长(秒)')
+    parser.add_argument('--warmup', type=float, default=1.0, help='开始测量前的预热时长(秒)')
+    parser.add_argument('--port', type=int, default=32000, help='起始RTP端口, 每种情况使用不同的端口段')
+    parser.add_argument('--baseline', action='store_true', help='同时测量每路一个RtpEndpoint的方式')
+    parser.add_argument('--baseline-max', type=int, default=100, help='测量RtpEndpoint方式的最大流数')
+    args = parser.parse_args()
+
+    tone = _tone()
+    cases = ['engine'] + (['endpoint'] if args.baseline else [])
+    print("cpu/stream为单路流占一个CPU核心的百分比; jitter为接收端测得的到达抖动; tick为引擎节拍的延迟")
+    print(f"{'case':<10}{'streams':>8}{'cpu/stream':>12}{'fps/stream':>12}{'jitter ms':>11}{'max ms':>8}"
+          f"{'tick p50':>10}{'tick p99':>10}{'tick max':>10}")
+    base_port = args.port
+    for count in args.streams:
+        for case in cases:
+            if case == 'endpoint' and count > args.baseline_max:
+                continue
+            # RtpEndpoint停止后接收线程可能仍占用端口, 每种情况换一段端口
+            result = _run(case, count, args.seconds, args.warmup, base_port, tone)
+            base_port += count * 2 + 2
+            ticks = (f"{result['tick p50'] * 1e3:>10.2f}{result['tick p99'] * 1e3:>10.2f}"
+                     f"{result['tick max'] * 1e3:>10.2f}" if case == 'engine' else f"{'-':>10}" * 3)
+            print(f"{case:<10}{count:>8}{result['cpu'] * 100:>11.3f}%{result['fps']:>12.1f}"
+                  f"{result['jitter']:>11.2f}{result['jitter max']:>8.2f}{ticks}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+RTP打包压测: 对比原send_audio的打包方式(12元素列表转bytes作头部、每帧对静音PCM做lin2alaw、头部+负载拼接)
+与RtpPacketizer(预分配缓冲区、pack_into原地更新头部、缓存静音帧、memoryview发送)的单包耗时;
+--send时同时发往本机UDP端口, 包含sendto的耗时
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_rtp_packetizer
+    python -m benchmark.bench_rtp_packetizer --packets 200000 --voice 0.5 --send
+"""
+import argparse
+import random
+import socket
+import time
+
+from rtp import g711
+from rtp.packetizer import RtpPacketizer
+
+FRAME = 160
+PAYLOAD_TYPE = 8
+SSRC = 0x12345678
+
+
+class _ListHeader:
+    """原实现的打包方式"""
+
+    def __init__(self):
+        self.sequence_number = 0
+        self.timestamp = 0
+        self.silence_pcm = bytes([0] * FRAME * 2)
+
+    def header(self, marker_bit):
+        version_p_pt = (2 << 6) | (0 << 5) | (PAYLOAD_TYPE & 0x7F)
+        return bytes([
+            version_p_pt, (marker_bit << 7) | (PAYLOAD_TYPE & 0x7F),
+            (self.sequence_number >> 8) & 0xFF, self.sequence_number & 0xFF,
+            (self.timestamp >> 24) & 0xFF, (self.timestamp >> 16) & 0xFF,
+            (self.timestamp >> 8) & 0xFF, self.timestamp & 0xFF,
+            (SSRC >> 24) & 0xFF, (SSRC >> 16) & 0xFF, (SSRC >> 8) & 0xFF, SSRC & 0xFF
+        ])
+
+    def packet(self, pcm_data, recording):
+        if recording:
+            has_voice = 1 if g711.rms(pcm_data) > 300 else 0
+            alaw_data = g711.lin2alaw(pcm_data)
+        else:
+            has_voice = 0
+            alaw_data = g711.lin2alaw(self.silence_pcm)
+        packet = self.header(has_voice) + alaw_data
+        self.sequence_number = (self.sequence_number + 1) & 0xFFFF
+        self.timestamp = (self.timestamp + FRAME) & 0xFFFFFFFF
+        return packet
+
+
+class _Packetizer:
+    def __init__(self):
+        self.packetizer = RtpPacketizer(PAYLOAD_TYPE, FRAME, FRAME, SSRC, g711.lin2alaw(bytes(FRAME * 2)))
+
+    def packet(self, pcm_data, recording):
+        if recording:
+            has_voice = 1 if g711.rms(pcm_data) > 300 else 0
+            return self.packetizer.packet(g711.lin2alaw(pcm_data), has_voice)
+        return self.packetizer.silence_packet()
+
+
+def _run(case, frames, pattern, send):
+    """按pattern(是否在讲话)逐帧打包, 返回单包耗时"""
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(('127.0.0.1', 0))
+    sink.setblocking(False)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    address = sink.getsockname()
+    count = len(pattern)
+
+    start = time.perf_counter()
+    for i in range(count):
+        packet = case.packet(frames[i % len(frames)], pattern[i])
+        if send:
+            sender.sendto(packet, address)
+            try:
+                sink.recv(2048)
+            except BlockingIOError:
+                pass
+    elapsed = time.perf_counter() - start
+    sender.close()
+    sink.close()
+    return elapsed / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RTP打包压测')
+    parser.add_argument('--packets', type=int, default=100000, help='打包的帧数')
+    parser.add_argument('--voice', type=float, default=0.1, help='讲话(PTT按下)的帧比例')
+    parser.add_argument('--send', action='store_true', help='同时通过UDP发往本机')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    frames = [bytes(rng.getrandbits(8) for _ in range(FRAME * 2)) for _ in range(16)]
+    pattern = [rng.random() < args.voice for _ in range(args.packets)]
+    print(f"{'case':<14}{'per packet us':>15}")
+    for name, case in (('list header', _ListHeader()), ('packetizer', _Packetizer())):
+        print(f"{name:<14}{_run(case, frames, pattern, args.send) * 1e6:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+SIP服务端收发模式压测: 对比线程模式、asyncio模式与多进程模式的吞吐量(requests/s)和p99响应时延
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_server_transport --duration 5 --clients 1 64
+    python -m benchmark.bench_server_transport --clients 256 --workers 1 2 4 --client-procs 4
+"""
+import argparse
+import contextlib
+import multiprocessing
+import os
+import selectors
+import socket
+import time
+
+from message_generator.message_generator import MessageGenerator
+from data_classes.params_classes import InfoParams
+
+
+def _run_server(mode, ip, port, client_port, rtp_port):
+    """子进程: 启动被测服务端(屏蔽逐条打印)"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        from sip.sip_server import SIPServer
+        server = SIPServer('bxp', ip, port, ip, client_port, rtp_port, rtp_port + 2)
+        if mode == 'async':
+            from sip.sip_async_server import run_async_server
+            run_async_server(server)
+        else:
+            server.receive_message()
+
+
+def _run_supervisor(workers, ip, port, client_port, rtp_port):
+    """子进程: 启动多进程服务端"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        from sip.server_supervisor import ServerSupervisor
+        server_kwargs = dict(user='bxp', local_ip=ip, local_port=port, remote_ip=ip, remote_port=client_port,
+                             local_rtp_port=rtp_port, remote_rtp_port=rtp_port + 2)
+        ServerSupervisor(workers, server_kwargs, mode='async').run()
+
+
+def _keep_alive_message(generator, ip, port, server_port, cseq):
+    params = InfoParams(
+        cseq=cseq,
+        local_user='bxp',
+        local_ip=ip,
+        local_port=port,
+        server_user='bxp',
+        server_ip=ip,
+        server_port=server_port,
+        method_type="request",
+        message_type="INFO",
+        subject="vcu_login",
+        expires=5,
+    )
+    return generator.generate_message(params).encode()
+
+
+def run_load(ip, server_port, client_ports, duration):
+    """闭环压测: 每个客户端套接字始终保持一个未完成请求"""
+    generator = MessageGenerator()
+    selector = selectors.DefaultSelector()
+    sockets = []
+    for port in client_ports:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((ip, port))
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, port)
+        sockets.append(sock)
+
+    latencies = []
+    sent_at = {}
+    cseq = 0
+
+    def send(sock, port):
+        nonlocal cseq
+        cseq += 1
+        sock.sendto(_keep_alive_message(generator, ip, port, server_port, cseq), (ip, server_port))
+        sent_at[port] = time.perf_counter()
+
+    for sock, port in zip(sockets, client_ports):
+        send(sock, port)
+
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        events = selector.select(timeout=1.0)
+        if not events:
+            # 丢包时重新发起请求, 避免闭环停滞
+            for sock, port in zip(sockets, client_ports):
+                send(sock, port)
+            continue
+        for key, _ in events:
+            sock, port = key.fileobj, key.data
+            sock.recvfrom(10240)
+            latencies.append(time.perf_counter() - sent_at[port])
+            send(sock, port)
+    elapsed = time.perf_counter() - start
+
+    for sock in sockets:
+        selector.unregister(sock)
+        sock.close()
+    selector.close()
+
+    return latencies, elapsed
+
+
+def _summarize(latencies, elapsed):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float('nan')
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else float('nan'),
+        'p99_ms': p99 * 1000,
+    }
+
+
+def bench_mode(mode, ip, server_port, client_count, duration, rtp_port, workers=0, client_procs=1):
+    base_client_port = server_port + 100
+    if workers > 0:
+        target, args = _run_supervisor, (workers, ip, server_port, base_client_port, rtp_port)
+    else:
+        target, args = _run_server, (mode, ip, server_port, base_client_port, rtp_port)
+    server = multiprocessing.Process(target=target, args=args, daemon=False)
+    server.start()
+    time.sleep(1.0 + 0.2 * workers)
+    try:
+        # 线程模式只回复配置的客户端地址, 因此只能压测单个席位
+        if mode == 'thread' and workers == 0:
+            client_count = 1
+        client_ports = [base_client_port + i for i in range(client_count)]
+        client_procs = max(1, min(client_procs, client_count))
+        if client_procs == 1:
+            return _summarize(*run_load(ip, server_port, client_ports, duration))
+        # 多个压测进程, 避免客户端成为瓶颈
+        groups = [client_ports[i::client_procs] for i in range(client_procs)]
+        with multiprocessing.Pool(client_procs) as pool:
+            results = pool.starmap(run_load, [(ip, server_port, group, duration) for group in groups])
+        latencies = [latency for group_latencies, _ in results for latency in group_latencies]
+        return _summarize(latencies, max(elapsed for _, elapsed in results))
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SIP服务端收发模式压测')
+    parser.add_argument('--ip', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=15061)
+    parser.add_argument('--rtp-port', type=int, default=25200)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 64])
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='额外压测的多进程服务端工作进程数')
+    parser.add_argument('--client-procs', type=int, default=1, help='压测客户端进程数')
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'clients':>8}{'requests':>10}{'req/s':>12}{'p50(ms)':>10}{'p99(ms)':>10}")
+    runs = [('thread', 0), ('async', 0)] + [('async', workers) for workers in args.workers]
+    for mode, workers in runs:
+        for clients in args.clients:
+            if mode == 'thread' and clients != args.clients[0]:
+                continue
+            result = bench_mode(mode, args.ip, args.port, clients, args.duration, args.rtp_port,
+                                workers=workers, client_procs=args.client_procs)
+            shown = 1 if mode == 'thread' else clients
+            name = f"workers={workers}" if workers else mode
+            print(f"{name:<12}{shown:>8}{result['requests']:>10}{result['throughput']:>12.0f}"
+                  f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+表格解码压测: 以config/response_message_body.json中的电台表为样本, 复制成指定规模的电台表,
+对比逐条memmove(原实现)、parse(一次复制到ctypes数组)与parse_array(numpy结构化数组)的解码耗时
+
+用法(在仓库根目录执行, parse_array需要numpy):
+    python -m benchmark.bench_tables
+    python -m benchmark.bench_tables --radios 100 1000 10000
+"""
+import argparse
+import base64
+import ctypes
+import json
+import timeit
+
+from message_decoder.radio_btn_info_decoder import RadioInfo
+from message_decoder.table_array import np, table_dtype, text_column
+
+
+def _memmove_parse(decoded_data):
+    """原实现: 逐条创建结构体并复制切片"""
+    entry_size = ctypes.sizeof(RadioInfo)
+    results = []
+    for i in range(len(decoded_data) // entry_size):
+        entry = RadioInfo()
+        ctypes.memmove(ctypes.addressof(entry), decoded_data[i * entry_size:(i + 1) * entry_size], entry_size)
+        results.append(entry)
+    return results
+
+
+def _cases(encoded, decoded):
+    """{名称: 单次解码函数}"""
+    cases = {
+        'base64 only': lambda: base64.b64decode(encoded),
+        'memmove loop': lambda: _memmove_parse(base64.b64decode(encoded)),
+        'parse': lambda: RadioInfo.parse(encoded),
+        'parse + iIsCan': lambda: [entry.iIsCan for entry in RadioInfo.parse(encoded)],
+    }
+    if np is not None:
+        dtype = table_dtype(RadioInfo)
+        cases.update({
+            'parse_array': lambda: RadioInfo.parse_array(encoded),
+            'parse_array + iIsCan': lambda: RadioInfo.parse_array(encoded)['iIsCan'].sum(),
+            'frombuffer + iIsCan': lambda: np.frombuffer(decoded, dtype=dtype)['iIsCan'].sum(),
+            'parse_array + freq': lambda: text_column(RadioInfo.parse_array(encoded), 'szFrequency'),
+        })
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description='电台表解码压测')
+    parser.add_argument('--radios', type=int, nargs='+', default=[100, 1000, 5000], help='电台表规模')
+    parser.add_argument('--repeat', type=int, default=5, help='测量轮数, 取最好成绩')
+    parser.add_argument('--body', default='./config/response_message_body.json', help='报文消息体配置')
+    args = parser.parse_args()
+
+    with open(args.body, 'r') as file:
+        sample = b''.join(base64.b64decode(value) for value in json.load(file)['vcu_radio'].values())
+    sample_count = len(sample) // ctypes.sizeof(RadioInfo)
+    if np is None:
+        print("numpy未安装, 跳过parse_array")
+
+    print(f"{'case':<24}{'radios':>8}{'us/table':>12}{'ns/radio':>10}")
+    for radios in args.radios:
+        decoded = sample * (radios // sample_count) + sample[:radios % sample_count * ctypes.sizeof(RadioInfo)]
+        encoded = base64.b64encode(decoded).decode('ascii')
+        for name, func in _cases(encoded, decoded).items():
+            number = max(1, 20000 // radios)
+            seconds = min(timeit.repeat(func, number=number, repeat=args.repeat)) / number
+            print(f"{name:<24}{radios:>8}{seconds * 1e6:>12.1f}{seconds * 1e9 / radios:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
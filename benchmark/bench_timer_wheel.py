@@ -0,0 +1,70 @@
+"""
+时间轮压测: 模拟多席位客户端进程中同时在途的大量事务, 每个事务一个重传定时器和一个超时定时器,
+统计TimerWheel每个定时器的登记/取消耗时、定时器全部在途期间的CPU占用和触发误差;
+--baseline同时测量每个定时器一个threading.Timer线程的方式作对比
+
+用法(在仓库根目录执行):
+    python -m benchmark.bench_timer_wheel
+    python -m benchmark.bench_timer_wheel --timers 1000 10000 --baseline
+"""
+import argparse
+import threading
+import time
+
+from sip.timer_wheel import TimerWheel
+
+
+def _run(schedule, count, delay):
+    """登记count个定时器, 其中一半在到期前取消; 返回登记和取消的单个耗时、等待期间的CPU占用和最大触发误差"""
+    lateness = []
+    lock = threading.Lock()
+
+    def fired(deadline):
+        with lock:
+            lateness.append(time.monotonic() - deadline)
+
+    begin = time.perf_counter()
+    timers = [schedule(delay, fired, time.monotonic() + delay) for _ in range(count)]
+    scheduled = time.perf_counter() - begin
+    begin = time.perf_counter()
+    for timer in timers[::2]:
+        timer.cancel()
+    cancelled = time.perf_counter() - begin
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    deadline = wall_start + delay * 3
+    while len(lateness) < count - count // 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    cpu = (time.process_time() - cpu_start) / (time.monotonic() - wall_start)
+    return scheduled / count, cancelled / (count // 2 or 1), cpu, max(lateness, default=0.0)
+
+
+def _thread_timer(delay, callback, *args):
+    timer = threading.Timer(delay, callback, args)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='时间轮压测')
+    parser.add_argument('--timers', type=int, nargs='+', default=[1000, 10000, 50000], help='同时在途的定时器数')
+    parser.add_argument('--delay', type=float, default=1.0, help='定时器时长(秒)')
+    parser.add_argument('--baseline', action='store_true', help='同时测量threading.Timer')
+    args = parser.parse_args()
+
+    wheel = TimerWheel()
+    cases = [('timer wheel', wheel.schedule)]
+    if args.baseline:
+        cases.append(('threading.Timer', _thread_timer))
+    print(f"{'case':<18}{'timers':>8}{'schedule us':>13}{'cancel us':>11}{'cpu':>8}{'late ms':>9}")
+    for count in args.timers:
+        for name, schedule in cases:
+            if schedule is _thread_timer and count > 10000:
+                continue
+            scheduled, cancelled, cpu, late = _run(schedule, count, args.delay)
+            print(f"{name:<18}{count:>8}{scheduled * 1e6:>13.2f}{cancelled * 1e6:>11.2f}{cpu * 100:>7.1f}%"
+                  f"{late * 1e3:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
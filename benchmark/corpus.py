@@ -0,0 +1,140 @@
+"""
+报文语料: 客户端与服务端之间交互的全部报文形态, 表格应答使用config/response_message_body.json中的真实消息体
+
+各条目的参数与sip_client.py/sip_server.py中构造报文的代码保持一致
+"""
+import json
+from dataclasses import dataclass, field
+from typing import List
+
+from data_classes.params_classes import BaseMessageParams, RegisterParams, InfoParams, ReferParams
+
+CLIENT = dict(ip='127.0.0.1', port=5060)
+SERVER = dict(ip='127.0.0.1', port=5061)
+USER = 'bxp'
+PASSWORD = 'YnhwCg=='
+CHANNEL = '316'  # 客户端选中电台时使用的通道号
+RADIO = '5000'  # 电台号
+ALLOW = ['MESSAGE', 'REFER', 'INFO', 'NOTIFY', 'SUBSCRIBE', 'CANCEL', 'BYE', 'OPTIONS', 'ACK', 'INVITE']
+SUPPORTED = ['100rel', 'replaces']
+
+# (请求主题, 内容类型, 分片起始CSeq), 与服务端表格应答一致
+TABLES = [
+    ('vcu_phone', "application/phone_bt_info", None),
+    ('vcu_frequency', "application/frequency_bt_info", 1025),
+    ('vcu_radio', "application/radio_bt_info", 1793),
+    ('vcu_function', "application/func_bt_info", None),
+]
+
+
+@dataclass
+class CorpusEntry:
+    name: str  # 报文形态
+    direction: str  # "request": 客户端发出; "response": 服务端发出
+    params: List[BaseMessageParams] = field(default_factory=list)  # 同一形态的全部报文(表格应答含多个分片)
+
+
+def _sdp(ip, rtp_port):
+    return (
+        "v=0\r\n"
+        f"o=SELUS 2890844527 1 IN IP4 {ip}\r\n"
+        "s=Sip Call\r\n"
+        f"c=IN IP4 {ip}\r\n"
+        "t=0 0\r\n"
+        f"m=audio {rtp_port} RTP/AVP 8\r\n"
+        "a=rtpmap:8 PCMA/8000\r\n"
+        "a=sendrecv\r\n"
+    )
+
+
+def _request(cls, local_user=USER, server_user=USER, **kwargs):
+    return cls(
+        local_user=local_user,
+        local_ip=CLIENT['ip'],
+        local_port=CLIENT['port'],
+        server_user=server_user,
+        server_ip=SERVER['ip'],
+        server_port=SERVER['port'],
+        method_type="request",
+        **kwargs,
+    )
+
+
+def _response(cls, local_user=USER, server_user=USER, **kwargs):
+    # 服务端应答沿用请求的事务标识
+    kwargs.setdefault('branch', 'z9hG4bK-corpus')
+    kwargs.setdefault('call_id', f"corpus@{CLIENT['ip']}")
+    kwargs.setdefault('tag', 'corpus')
+    return cls(
+        local_user=local_user,
+        local_ip=SERVER['ip'],
+        local_port=SERVER['port'],
+        server_user=server_user,
+        server_ip=SERVER['ip'],
+        server_port=SERVER['port'],
+        method_type="response",
+        **kwargs,
+    )
+
+
+def build_corpus(body_path='./config/response_message_body.json'):
+    """构造报文语料, 返回CorpusEntry列表"""
+    with open(body_path, 'r') as file:
+        data = json.load(file)
+    entries = []
+
+    def add(name, direction, *params):
+        entries.append(CorpusEntry(name, direction, list(params)))
+
+    # 客户端请求
+    add('keepalive INFO', 'request', _request(
+        InfoParams, cseq=1, message_type="INFO", subject="vcu_login", expires=5))
+    add('REGISTER', 'request', _request(
+        RegisterParams, cseq=2, message_type="REGISTER", subject="vcu_register", expires=5,
+        password=PASSWORD, cwp=USER))
+    for subject, _, _ in TABLES:
+        add(f'{subject} INFO', 'request', _request(
+            InfoParams, cseq=3, message_type="INFO", subject=subject, roleid='12'))
+    radio = dict(local_user=CHANNEL, server_user=RADIO)
+    add('INVITE', 'request', _request(
+        BaseMessageParams, cseq=10, message_type="INVITE", subject="radio", expires=5, contact=True,
+        allow=ALLOW, supported=SUPPORTED, content_type="application/sdp",
+        content=_sdp(CLIENT['ip'], 5200), **radio))
+    add('ACK', 'request', _request(
+        BaseMessageParams, cseq=10, message_type="ACK", subject="radio", tag='corpus', to_tag='corpus',
+        allow=ALLOW, supported=SUPPORTED, **radio))
+    add('REFER', 'request', _request(
+        ReferParams, cseq=11, message_type="REFER", subject="radio", expires=5, refer_to=True,
+        refered_by=True, **radio))
+    add('REFER BYE', 'request', _request(
+        ReferParams, cseq=12, message_type="REFER", subject="radio", expires=5, refer_to=True,
+        refered_by=True, method="BYE", **radio))
+    add('BYE', 'request', _request(
+        BaseMessageParams, cseq=13, message_type="BYE", subject="radio", expires=5, **radio))
+
+    # 服务端应答
+    for subject in ('vcu_login', 'vcu_logout'):
+        add(f'{subject} 200', 'response', _response(
+            InfoParams, cseq=1, message_type="INFO", subject=subject, content_type="application/server_ip",
+            content=data[subject]['server_ip']))
+    add('REGISTER 200', 'response', _response(
+        RegisterParams, cseq=2, message_type="REGISTER", expires=5, contact=True,
+        content_type="application/role_info", content=data['vcu_register']['role_info']))
+    for subject, content_type, first_cseq in TABLES:
+        fragments = [
+            _response(InfoParams, cseq=3 if first_cseq is None else first_cseq + i, message_type="INFO",
+                      content_type=content_type, content=value)
+            for i, value in enumerate(data.get(subject, {}).values())
+        ]
+        add(f'{subject} 200', 'response', *fragments)
+    radio = dict(local_user=RADIO, server_user=CHANNEL)
+    add('INVITE 100', 'response', _response(
+        BaseMessageParams, cseq=10, message_type="INVITE", status_code=100, reason_phrase="Trying", **radio))
+    add('INVITE 200', 'response', _response(
+        BaseMessageParams, cseq=10, message_type="INVITE", subject="radio", contact=True, allow=ALLOW,
+        supported=SUPPORTED, content_type="application/sdp", content=_sdp(SERVER['ip'], 5200), **radio))
+    add('REFER 200', 'response', _response(
+        BaseMessageParams, cseq=11, message_type="REFER", subject="radio", **radio))
+    add('BYE 200', 'response', _response(
+        BaseMessageParams, cseq=13, message_type="BYE", subject="radio", **radio))
+    return entries
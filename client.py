@@ -15,16 +15,18 @@ if __name__ == '__main__':
         remote_port=config['server']['port'],
         local_rtp_port=config['client']['rtp_port'],
         remote_rtp_port=config['server']['rtp_port'],
+        transport=config['server'].get('transport', 'udp'),
+        table_cache_dir=config['client'].get('table_cache_dir'),
+        window=config['client'].get('window', 1),
+        audio_backend=config['client'].get('audio_backend', 'pyaudio'),
     )
 
     # 启动客户端的消息接收线程
     client_thread = threading.Thread(target=sip_client.receive_message)
     client_thread.daemon = True
     client_thread.start()
-    sip_client.keep_alive()
-    sip_client.register()
-    sip_client.get_frequency_btn()
-    sip_client.get_radio_btn()
+    # 心跳、注册和各按键表格流水线发送; 频率/电台表版本未变时从本地缓存加载
+    sip_client.startup()
     sip_client.select_radio('5000')
     sip_client.select_radio('5000')
     sip_client.bye('5001')
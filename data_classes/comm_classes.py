@@ -1,8 +1,38 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class Radio:
     freq: Optional[str] = None
     type: Optional[int] = 0
-    avail: Optional[int] = 0
\ No newline at end of file
+    avail: Optional[int] = 0
+
+@dataclass
+class PeerState:
+    addr: Tuple[str, int] = None  # 对端地址 (ip, port)
+    user: Optional[str] = None  # 席位号
+    status: str = "offline"  # 状态: "online", "offline"
+    last_seen: float = 0.0  # 最近一次收到报文的时间
+    request_count: int = 0  # 累计请求数
+    connection: object = None  # TCP对端的连接(asyncio传输对象), UDP对端为None
+
+@dataclass
+class MediaSession:
+    call_id: Optional[str] = None  # 所属呼叫
+    local_rtp_port: Optional[int] = None  # 从端口池分配的本地RTP端口
+    remote_ip: Optional[str] = None  # 对端媒体地址(来自SDP offer)
+    remote_rtp_port: Optional[int] = None
+    endpoint: object = None  # RtpEndpoint, 使用RtpEngine时为RtpStream
+    comm_count: int = 0  # 该呼叫下选中的电台数
+    last_cseq: Optional[int] = None  # 最近处理过的电台操控请求的CSeq, 重传的请求不再计数
+
+@dataclass
+class Subscription:
+    subject: str = None  # 订阅的表格(请求主题)
+    peer: object = None  # 订阅者的PeerState, 线程模式下为None(发往固定的客户端地址)
+    user: Optional[str] = None  # 订阅者席位号(SUBSCRIBE的From)
+    server_user: Optional[str] = None  # 被订阅方(SUBSCRIBE的To), NOTIFY以此为From
+    call_id: Optional[str] = None  # 订阅对话的Call-ID, NOTIFY沿用
+    expires_at: float = 0.0  # 过期时间
+    notify_cseq: int = 0  # 已发送NOTIFY的CSeq
+    last_notify: object = None  # 最近一条NOTIFY的事务(sip.transaction.Transaction), 超时未应答时取消订阅
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional, List
 
-@dataclass
+@dataclass(slots=True)
 class BaseMessageParams:
     method_type: str = "request"  
     message_type: str = "INFO"
@@ -30,16 +30,16 @@ class BaseMessageParams:
     status_code: Optional[int] = 200
     reason_phrase: Optional[str] = "OK"
     
-@dataclass
+@dataclass(slots=True)
 class RegisterParams(BaseMessageParams):
     password: Optional[str] = None
     cwp: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class InfoParams(BaseMessageParams):
     roleid: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ReferParams(BaseMessageParams):
     refer_to: Optional[str] = None
     refered_by: Optional[str] = None
@@ -0,0 +1,145 @@
+import sys
+
+from data_classes.comm_classes import Radio
+
+SEND_TYPE = 0  # 收发类型为0的电台为发信机, 其余为收信机
+
+
+class RadioDirectory:
+    """
+    电台目录: 按电台号保存Radio, 并维护按频率、收发类型、是否可用的索引和当前选中的发送/接收电台
+
+    索引值为电台号的集合, 频率字符串经intern后由同频电台共享; 选中的电台用dict保存(有序, 成员判断、
+    增删均为O(1)), 首个选中的电台即为当前的发送/接收通道。查询和切换判断不随电台数量增长
+    """
+
+    def __init__(self):
+        self.radios = {}  # {电台号: Radio}
+        self.by_freq = {}  # {频率: {电台号}}
+        self.by_type = {}  # {收发类型: {电台号}}
+        self.by_avail = {}  # {是否可用: {电台号}}
+        self.send = {}  # 选中的发送电台, {电台号: None}, 按选中顺序
+        self.recv = {}  # 选中的接收电台
+
+    def __len__(self):
+        return len(self.radios)
+
+    def __contains__(self, code):
+        return code in self.radios
+
+    def __getitem__(self, code) -> Radio:
+        return self.radios[code]
+
+    def __iter__(self):
+        return iter(self.radios)
+
+    def items(self):
+        return self.radios.items()
+
+    def get(self, code, default=None):
+        return self.radios.get(code, default)
+
+    @staticmethod
+    def _index_add(index, key, code):
+        codes = index.get(key)
+        if codes is None:
+            index[key] = {code}
+        else:
+            codes.add(code)
+
+    @staticmethod
+    def _index_discard(index, key, code):
+        codes = index.get(key)
+        if codes is not None:
+            codes.discard(code)
+            if not codes:
+                del index[key]
+
+    def update(self, code, freq, type, avail) -> Radio:
+        """新增或更新电台, 已有的Radio对象原地修改并调整索引"""
+        freq = sys.intern(freq)
+        radio = self.radios.get(code)
+        if radio is None:
+            radio = self.radios[code] = Radio(freq=freq, type=type, avail=avail)
+            self._index_add(self.by_freq, freq, code)
+            self._index_add(self.by_type, type, code)
+            self._index_add(self.by_avail, avail, code)
+            return radio
+        if radio.freq != freq:
+            self._index_discard(self.by_freq, radio.freq, code)
+            self._index_add(self.by_freq, freq, code)
+            radio.freq = freq
+        if radio.type != type:
+            self._index_discard(self.by_type, radio.type, code)
+            self._index_add(self.by_type, type, code)
+            radio.type = type
+        if radio.avail != avail:
+            self._index_discard(self.by_avail, radio.avail, code)
+            self._index_add(self.by_avail, avail, code)
+            radio.avail = avail
+        return radio
+
+    def remove(self, code):
+        """删除电台, 同时从索引和选中电台中移除"""
+        radio = self.radios.pop(code, None)
+        if radio is None:
+            return
+        self._index_discard(self.by_freq, radio.freq, code)
+        self._index_discard(self.by_type, radio.type, code)
+        self._index_discard(self.by_avail, radio.avail, code)
+        self.deactivate(code)
+
+    def clear(self):
+        for index in (self.radios, self.by_freq, self.by_type, self.by_avail, self.send, self.recv):
+            index.clear()
+
+    def with_freq(self, freq) -> set:
+        """该频率下的全部电台号"""
+        return self.by_freq.get(freq, set())
+
+    def with_type(self, type) -> set:
+        """该收发类型的全部电台号"""
+        return self.by_type.get(type, set())
+
+    def available(self, avail=1) -> set:
+        """可用(或不可用)的全部电台号"""
+        return self.by_avail.get(avail, set())
+
+    # 选中的电台
+    def activate(self, code):
+        """选中电台, 按收发类型加入发送或接收电台"""
+        if self.radios[code].type == SEND_TYPE:
+            self.send[code] = None
+        else:
+            self.recv[code] = None
+
+    def deactivate(self, code):
+        """退出选中, 未选中时忽略"""
+        if self.send.pop(code, False) is False:
+            self.recv.pop(code, None)
+
+    def is_active(self, code):
+        return code in self.send or code in self.recv
+
+    @property
+    def active_count(self):
+        return len(self.send) + len(self.recv)
+
+    @property
+    def send_channel(self):
+        """当前发送通道(首个选中的发送电台), 没有时为None"""
+        return next(iter(self.send), None)
+
+    @property
+    def recv_channel(self):
+        """当前接收通道(首个选中的接收电台), 没有时为None"""
+        return next(iter(self.recv), None)
+
+    def needs_switch(self, code):
+        """选中code时当前发送/接收通道的频率与其不同, 需要先退出原电台"""
+        radios = self.radios
+        freq = radios[code].freq
+        for active in (self.send, self.recv):
+            if active and radios[next(iter(active))].freq != freq:
+                return True
+        return False
@@ -1,46 +1,27 @@
-import base64
 import ctypes
 from typing import List
 
+from message_decoder.payload_schema import FUNC_BT_INFO
+from message_decoder.table_array import parse_table, parse_table_array
+
 class MyFunBtnInfo(ctypes.Structure):
-    _fields_ = [
-        ("iPosition", ctypes.c_int),       # 所在按钮位置 (4字节)
-        ("szName", ctypes.c_char * 32),    # 按钮对应名称 (32字节)
-        ("iType", ctypes.c_int)            # 功能键种类 (4字节)
-    ]  # 总计 4 + 32 + 4 = 40字节
+    # 字段布局定义在payload_schema.FUNC_BT_INFO中, 每条40字节
+    _fields_ = FUNC_BT_INFO.ctypes_fields()
     
     @classmethod
     def parse(cls, encoded_str: str) -> List['MyFunBtnInfo']:
         """解析包含多组FunBtnInfo的Base64字符串"""
-        encoded_str = encoded_str.strip()
-        
-        try:
-            decoded_data = base64.b64decode(encoded_str)
-        except Exception as e:
-            raise ValueError(f"Base64解码失败: {e}")
-        
-        # 计算每组数据大小和组数
-        entry_size = ctypes.sizeof(cls)
-        if len(decoded_data) % entry_size != 0:
-            raise ValueError(f"数据长度{len(decoded_data)}不是{entry_size}的整数倍")
-        
-        entry_count = len(decoded_data) // entry_size
-        results = []
-        
-        for i in range(entry_count):
-            # 创建新实例并复制数据
-            entry = cls()
-            start = i * entry_size
-            end = start + entry_size
-            ctypes.memmove(ctypes.addressof(entry), decoded_data[start:end], entry_size)
-            results.append(entry)
-            
-        return results
+        return parse_table(cls, encoded_str)
+
+    @classmethod
+    def parse_array(cls, encoded_str: str):
+        """解析为numpy结构化数组, 按列访问全部FunBtnInfo(需要numpy)"""
+        return parse_table_array(cls, encoded_str)
     
     @property
     def name(self) -> str:
         """获取按钮名称"""
-        return self.szName.decode('ascii').strip('\x00')
+        return self.szName.decode(FUNC_BT_INFO.encoding).strip('\x00')
     
     @property
     def type_description(self) -> str:
@@ -0,0 +1,325 @@
+"""
+报文消息体的二进制布局注册表: 每种载荷只在此定义一次, 由定义生成struct.Struct解码/编码
+
+载荷为一组(表格)或一条定长记录, 以Base64编码后作为SIP消息体; 整数为小端4字节, 文本为定长字节串,
+以NUL结尾, 不足补NUL
+"""
+import base64
+import binascii
+import ctypes
+import struct
+from collections import namedtuple
+from operator import itemgetter
+
+DEFAULT_ENCODING = 'gbk'  # 文本字段的默认编码
+
+
+class Field:
+    """记录中的一个字段"""
+    __slots__ = ('name', 'fmt', 'size', 'count', 'sep')
+
+    def __init__(self, name, fmt, size, count=1, sep=None):
+        self.name = name
+        self.fmt = fmt  # 单个元素的struct格式
+        self.size = size  # 单个元素的字节数
+        self.count = count  # 元素个数, 大于1时取值为列表
+        self.sep = sep  # 文本按分隔符拆分为列表
+
+    @property
+    def is_text(self):
+        return self.fmt.endswith('s')
+
+    @property
+    def default(self):
+        if self.count > 1 or self.sep is not None:
+            return ()
+        return '' if self.is_text else 0
+
+    def ctype(self):
+        """对应的ctypes类型"""
+        ctype = ctypes.c_char * self.size if self.is_text else {'i': ctypes.c_int, 'I': ctypes.c_uint}[self.fmt]
+        return ctype * self.count if self.count > 1 else ctype
+
+
+def int32(name):
+    return Field(name, 'i', 4)
+
+
+def uint32(name):
+    return Field(name, 'I', 4)
+
+
+def text(name, size, count=1, sep=None):
+    return Field(name, f'{size}s', size, count, sep)
+
+
+class PayloadSchema:
+    """
+    一种载荷的记录布局
+
+    解码结果为以字段名命名的namedtuple(表格载荷为其列表); 编码时记录可以是namedtuple、普通元组或dict,
+    缺少的字段取默认值
+    """
+
+    def __init__(self, name, content_type, fields, table=True, encoding=DEFAULT_ENCODING):
+        self.name = name
+        self.content_type = content_type
+        self.fields = fields
+        self.table = table  # True: 多条记录; False: 单条记录
+        self.encoding = encoding  # 文本编码
+        self.struct = struct.Struct('<' + ''.join(field.fmt * field.count for field in fields))
+        self.record = namedtuple(name, [field.name for field in fields],
+                                 defaults=[field.default for field in fields])
+        # 各字段在struct解包结果中的位置, 单元素字段为下标, 多元素字段为切片
+        self._spans = []
+        index = 0
+        for field in fields:
+            self._spans.append(index if field.count == 1 else slice(index, index + field.count))
+            index += field.count
+        self._unpack, self._pack_record, self._unpack_rows, self._pack_rows = self._compile()
+
+    @property
+    def size(self):
+        """单条记录的字节数"""
+        return self.struct.size
+
+    def ctypes_fields(self):
+        """ctypes.Structure的_fields_, 内存布局与本定义一致"""
+        return [(field.name, field.ctype()) for field in self.fields]
+
+    def _decode_text(self, value: bytes, field):
+        # 与C字符串相同, 截至第一个NUL
+        value = value.partition(b'\x00')[0]
+        value = value.decode('ascii') if value.isascii() else value.decode(self.encoding)
+        if field.sep is not None:
+            return value.split(field.sep) if value else []
+        return value
+
+    def _encode_text(self, value, field):
+        if field.sep is not None and not isinstance(value, str):
+            value = field.sep.join(value)
+        data = value.encode(self.encoding)
+        if len(data) > field.size:
+            raise ValueError(f"{self.name}.{field.name}: 文本长度{len(data)}超过{field.size}字节")
+        return data
+
+    def _encode_items(self, value, field):
+        if len(value) > field.count:
+            raise ValueError(f"{self.name}.{field.name}: 元素个数{len(value)}超过{field.count}")
+        # 不足的元素补空
+        items = list(value) + ['' if field.is_text else 0] * (field.count - len(value))
+        return [self._encode_text(item, field) for item in items] if field.is_text else items
+
+    def _compile(self):
+        """
+        生成解包/打包函数(闭包): 单条记录的unpack/pack, 以及表格多条记录的unpack_rows/pack_rows
+
+        字段都是单元素且文本不按分隔符拆分时(各表格载荷), struct解包结果与记录的字段一一对应,
+        表格按列转换文本字段(每列一次列表推导, 不必逐条记录调用函数); 否则按字段逐个转换
+        """
+        if any(field.count > 1 or field.sep is not None for field in self.fields):
+            return self._compile_fields()
+        new, record_type, pack_struct, encoding = tuple.__new__, self.record, self.struct.pack, self.encoding
+        texts = [(i, field) for i, field in enumerate(self.fields) if field.is_text]
+
+        def decode_column(values):
+            # 与C字符串相同截至第一个NUL; 纯ASCII文本用ASCII解码, 比GBK等多字节编码快得多
+            return [value.decode('ascii') if value.isascii() else value.decode(encoding)
+                    for value in [value.partition(b'\x00')[0] for value in values]]
+
+        def encode_column(values, field):
+            data = [value.encode('ascii') if value.isascii() else value.encode(encoding) for value in values]
+            if max(map(len, data)) > field.size:
+                # 交给_encode_text报错, struct.pack会静默截断
+                for value in values:
+                    self._encode_text(value, field)
+            return data
+
+        def unpack(values):
+            values = list(values)
+            for i, _ in texts:
+                values[i] = decode_column((values[i],))[0]
+            return new(record_type, values)
+
+        def pack(record):
+            items = list(record)
+            for i, field in texts:
+                items[i] = encode_column((items[i],), field)[0]
+            return pack_struct(*items)
+
+        def unpack_rows(rows):
+            columns = list(zip(*rows))
+            if not columns:
+                return []
+            for i, _ in texts:
+                columns[i] = decode_column(columns[i])
+            return list(map(record_type._make, zip(*columns)))
+
+        def pack_rows(records):
+            columns = list(zip(*records))
+            if not columns:
+                return b''
+            for i, field in texts:
+                columns[i] = encode_column(columns[i], field)
+            return b''.join(map(pack_struct, *columns))
+        return unpack, pack, unpack_rows, pack_rows
+
+    def _compile_fields(self):
+        """按字段逐个转换的解包/打包函数"""
+        decoders = [self._field_decoder(field, span) for field, span in zip(self.fields, self._spans)]
+        encoders = [self._field_encoder(field) for field in self.fields]
+        counts = [field.count for field in self.fields]
+        new, record_type, pack_struct = tuple.__new__, self.record, self.struct.pack
+
+        def unpack(values):
+            return new(record_type, [decode(values) for decode in decoders])
+
+        def pack(record):
+            items = []
+            for encode, value, count in zip(encoders, record, counts):
+                if count == 1:
+                    items.append(encode(value))
+                else:
+                    # 多元素字段展开为多个struct项
+                    items.extend(encode(value))
+            return pack_struct(*items)
+
+        def unpack_rows(rows):
+            return [unpack(values) for values in rows]
+
+        def pack_rows(records):
+            return b''.join([pack(record) for record in records])
+        return unpack, pack, unpack_rows, pack_rows
+
+    def _field_decoder(self, field, span):
+        """从struct解包结果中取出并转换一个字段的函数"""
+        if field.count > 1:
+            if field.is_text:
+                return lambda values: [self._decode_text(value, field) for value in values[span]]
+            return lambda values: list(values[span])
+        if field.is_text:
+            return lambda values: self._decode_text(values[span], field)
+        return itemgetter(span)
+
+    def _field_encoder(self, field):
+        """把一个字段的取值转换为struct项的函数, 多元素字段返回列表"""
+        if field.count > 1:
+            return lambda value: self._encode_items(value, field)
+        if field.is_text:
+            return lambda value: self._encode_text(value, field)
+        return lambda value: value
+
+    def _as_record(self, record):
+        if isinstance(record, dict):
+            return self.record(**record)
+        if not isinstance(record, self.record):
+            return self.record(*record)
+        return record
+
+    def decode(self, data: bytes):
+        """
+        解码载荷, 表格返回记录列表, 单条载荷返回记录
+
+        单条载荷不足定长时按缺少的字节为NUL解码(与原按切片读取的解码器一致, 缺少的文本为空串、整数为0)
+        """
+        size = self.struct.size
+        if not self.table:
+            if len(data) < size:
+                data = bytes(data) + bytes(size - len(data))
+            return self._unpack(self.struct.unpack_from(data))
+        if len(data) % size != 0:
+            raise ValueError(f"{self.name}: 数据长度{len(data)}不是{size}的整数倍")
+        return self._unpack_rows(self.struct.iter_unpack(data))
+
+    def encode(self, records) -> bytes:
+        """编码载荷, 表格传入记录序列, 单条载荷传入一条记录"""
+        if not self.table:
+            return self._pack_record(self._as_record(records))
+        record_type = self.record
+        return self._pack_rows([record if type(record) is record_type else self._as_record(record)
+                                for record in records])
+
+    def decode_b64(self, encoded_str: str):
+        """解码Base64消息体"""
+        try:
+            data = base64.b64decode(encoded_str.strip())
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Base64解码失败: {e}")
+        return self.decode(data)
+
+    def encode_b64(self, records) -> str:
+        """编码为Base64消息体"""
+        return base64.b64encode(self.encode(records)).decode('ascii')
+
+
+SCHEMAS = {}  # {载荷名: PayloadSchema}
+CONTENT_TYPES = {}  # {Content-Type: PayloadSchema}
+
+
+def register(schema: PayloadSchema):
+    """注册载荷定义, 名称或Content-Type重复时报错"""
+    if schema.name in SCHEMAS or schema.content_type in CONTENT_TYPES:
+        raise ValueError(f"载荷{schema.name}({schema.content_type})已注册")
+    SCHEMAS[schema.name] = schema
+    CONTENT_TYPES[schema.content_type] = schema
+    return schema
+
+
+def get_schema(key: str) -> PayloadSchema:
+    """按载荷名或Content-Type查找载荷定义"""
+    schema = SCHEMAS.get(key) or CONTENT_TYPES.get(key)
+    if schema is None:
+        raise KeyError(f"未注册的载荷: {key}")
+    return schema
+
+
+# 服务器地址, 32字节
+SERVER_IP = register(PayloadSchema('server_ip', 'application/server_ip', [
+    text('szServerIP', 32),  # 服务器IP
+], table=False))
+
+# 角色信息, 4 * 32 + 480 + 128 = 736字节
+ROLE_INFO = register(PayloadSchema('role_info', 'application/role_info', [
+    text('ChannelNum', 32, count=4),  # 通道号
+    text('szRoles', 480, sep='+'),  # 角色列表, 以+分隔
+    text('szOtherChooseRole', 128, sep='+'),  # 其他可选角色, 以+分隔
+], table=False, encoding='utf-8'))
+
+# 电话按键, 每条88字节
+PHONE_BT_INFO = register(PayloadSchema('phone_bt_info', 'application/phone_bt_info', [
+    int32('iPosition'),  # 所在按钮位置
+    text('szName', 32),  # 按钮对应名称
+    text('szTelNumber', 32),  # 按钮对应的号码
+    int32('iDial'),  # 是否需要弹出拨号盘
+    int32('iCanuse'),  # 是否使能
+    int32('iType'),  # 号码类型
+    uint32('iStatus'),  # 状态
+    int32('dep_id'),  # 部门ID
+]))
+
+# 频率按键, 每条76字节
+FREQUENCY_BT_INFO = register(PayloadSchema('frequency_bt_info', 'application/frequency_bt_info', [
+    int32('iPosition'),  # 所在按钮位置
+    text('szFreqName', 32),  # 按钮对应名称
+    text('szFrequency', 32),  # 电台频率
+    int32('iSaving'),  # 0: 普通 1: 救生
+    int32('iCanuse'),  # 是否使能 (0-否, 1-是)
+]))
+
+# 电台按键, 每条120字节
+RADIO_BT_INFO = register(PayloadSchema('radio_bt_info', 'application/radio_bt_info', [
+    int32('iPosition'),  # 所在按钮位置
+    text('szFreqName', 32),  # 按钮对应名称
+    text('szFrequency', 32),  # 电台频率
+    text('szCode', 12),  # 电台发内码组号
+    text('szRadioName', 32),  # 电台对应名称
+    int32('iRSType'),  # 收发类型
+    int32('iIsCan'),  # 是否可用
+]))
+
+# 功能按键, 每条40字节
+FUNC_BT_INFO = register(PayloadSchema('func_bt_info', 'application/func_bt_info', [
+    int32('iPosition'),  # 所在按钮位置
+    text('szName', 32),  # 按钮对应名称
+    int32('iType'),  # 功能键种类
+]))
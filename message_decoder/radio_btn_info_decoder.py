@@ -1,65 +1,42 @@
-import base64
 import ctypes
 from typing import List
 
+from message_decoder.payload_schema import RADIO_BT_INFO
+from message_decoder.table_array import parse_table, parse_table_array
+
 class RadioInfo(ctypes.Structure):
-    _fields_ = [
-        ("iPosition", ctypes.c_int),          # 所在按钮位置 (4字节)
-        ("szFreqName", ctypes.c_char * 32),   # 按钮对应名称 (32字节)
-        ("szFrequency", ctypes.c_char * 32),  # 电台频率 (32字节)
-        ("szCode", ctypes.c_char * 12),       # 电台发内码组号 (12字节)
-        ("szRadioName", ctypes.c_char * 32),  # 电台对应名称 (32字节)
-        ("iRSType", ctypes.c_int),            # 收发类型 (4字节)
-        ("iIsCan", ctypes.c_int)              # 是否可用 (4字节)
-    ]  # 总计 4 + 32 + 32 + 12 + 32 + 4 + 4 = 120字节
+    # 字段布局定义在payload_schema.RADIO_BT_INFO中, 每条120字节
+    _fields_ = RADIO_BT_INFO.ctypes_fields()
     
     @classmethod
     def parse(cls, encoded_str: str) -> List['RadioInfo']:
         """解析包含多组RadioInfo的Base64字符串"""
-        encoded_str = encoded_str.strip()
-        
-        try:
-            decoded_data = base64.b64decode(encoded_str)
-        except Exception as e:
-            raise ValueError(f"Base64解码失败: {e}")
-        
-        # 计算每组数据大小和组数
-        entry_size = ctypes.sizeof(cls)
-        if len(decoded_data) % entry_size != 0:
-            raise ValueError(f"数据长度{len(decoded_data)}不是{entry_size}的整数倍")
-        
-        entry_count = len(decoded_data) // entry_size
-        results = []
-        
-        for i in range(entry_count):
-            # 创建新实例并复制数据
-            entry = cls()
-            start = i * entry_size
-            end = start + entry_size
-            ctypes.memmove(ctypes.addressof(entry), decoded_data[start:end], entry_size)
-            results.append(entry)
-            
-        return results
+        return parse_table(cls, encoded_str)
+
+    @classmethod
+    def parse_array(cls, encoded_str: str):
+        """解析为numpy结构化数组, 按列访问全部RadioInfo(需要numpy)"""
+        return parse_table_array(cls, encoded_str)
     
     @property
     def freq_name(self) -> str:
         """获取频率名称"""
-        return self.szFreqName.decode('ascii').strip('\x00')
+        return self.szFreqName.decode(RADIO_BT_INFO.encoding).strip('\x00')
     
     @property
     def frequency(self) -> str:
         """获取频率值"""
-        return self.szFrequency.decode('ascii').strip('\x00')
+        return self.szFrequency.decode(RADIO_BT_INFO.encoding).strip('\x00')
     
     @property
     def code(self) -> str:
         """获取内码组号"""
-        return self.szCode.decode('ascii').strip('\x00')
+        return self.szCode.decode(RADIO_BT_INFO.encoding).strip('\x00')
     
     @property
     def radio_name(self) -> str:
         """获取电台名称"""
-        return self.szRadioName.decode('ascii').strip('\x00')
+        return self.szRadioName.decode(RADIO_BT_INFO.encoding).strip('\x00')
     
     @property
     def rs_type(self) -> str:
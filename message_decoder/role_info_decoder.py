@@ -1,14 +1,7 @@
-import base64
-import ctypes
-from typing import List
 from dataclasses import dataclass
 from typing import Optional, List
 
-# 定义常量
-CHANNEL_COUNT = 4
-CHANNEL_LENGTH = 32
-ROLES_LENGTH = 480
-OTHER_CHOOSE_ROLE_LENGTH = 128
+from message_decoder.payload_schema import ROLE_INFO
 
 
 @dataclass
@@ -25,24 +18,10 @@ class RoleInfo:
         self.szOtherChooseRole = []
 
     def parse(self, encoded_str):
-        encoded_str = encoded_str.strip()
-
-        try:
-            decoded_data = base64.b64decode(encoded_str)
-        except:
-            raise ValueError(f"Base64解码失败")
-
-        for i in range(CHANNEL_COUNT):
-            self.ChannelNum.append(
-                decoded_data[i * CHANNEL_LENGTH:(i + 1) * CHANNEL_LENGTH].decode('utf8').strip('\x00'))
-
-        # 填充 szRoles 和 szOtherChooseRole（如果需要）
-        roles_start = CHANNEL_LENGTH * CHANNEL_COUNT
-        other_start = roles_start + ROLES_LENGTH
-        roles_str = decoded_data[roles_start:other_start].decode('utf8').strip('\x00')
-        self.szRoles = roles_str.split('+') if roles_str else []
-        other_str = decoded_data[other_start:].decode('utf-8').strip('\x00')
-        self.szOtherChooseRole = other_str.split('+') if other_str else []
+        record = ROLE_INFO.decode_b64(encoded_str)
+        self.ChannelNum.extend(record.ChannelNum)
+        self.szRoles = record.szRoles
+        self.szOtherChooseRole = record.szOtherChooseRole
 
         info = Info(
             ChannelNum=self.ChannelNum,
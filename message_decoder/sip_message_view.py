@@ -0,0 +1,230 @@
+import re
+from dataclasses import fields
+from data_classes.params_classes import BaseMessageParams, RegisterParams, InfoParams, ReferParams
+
+REQUEST_URI_PATTERN = re.compile(r'sip:(?P<user>[^@]+)@(?P<ip>[^:]+):?(?P<port>\d+)?')
+NAME_ADDR_PATTERN = re.compile(r'<sip:(?P<user>[^@]+)@(?P<ip>[^:>]+):?(?P<port>\d+)?>')
+# 构造参数对象时各参数类的字段名, 只计算一次
+PARAM_FIELDS = {cls: tuple(f.name for f in fields(cls))
+                for cls in (BaseMessageParams, RegisterParams, InfoParams, ReferParams)}
+
+
+def _parse_start_line(view):
+    """起始行: 状态码/原因短语(应答), 方法和请求URI(请求)"""
+    parts = view.data[:view.start_line_end].decode('utf-8').split(' ')
+    values = view.values
+    if view.method_type == "response":
+        values.update(status_code=int(parts[1]), reason_phrase=' '.join(parts[2:]),
+                      server_user=None, server_ip=None, server_port=None)
+        # 应答的方法取自CSeq
+        cseq = view._value(b'cseq')
+        values['message_type'] = cseq.split(' ')[1].lower() if cseq is not None else None
+        return
+    uri_match = REQUEST_URI_PATTERN.match(parts[1])
+    values.update(status_code=None, reason_phrase=None, message_type=parts[0],
+                  server_user=uri_match.group('user'), server_ip=uri_match.group('ip'),
+                  server_port=int(uri_match.group('port')) if uri_match.group('port') else 5060)
+
+
+def _parse_via(view):
+    """Via: SIP/2.0/UDP 192.168.1.100:5060;branch=z9hG4bK-123456"""
+    values = view.values
+    values.update(local_ip=None, local_port=None, branch=None)
+    value = view._value(b'via')
+    if value is None:
+        return
+    via_parts = value.split(';')
+    ip_port = via_parts[0].strip().split(' ')[1]
+    ip, port = ip_port.split(':') if ':' in ip_port else (ip_port, '5060')
+    values['local_ip'] = ip
+    values['local_port'] = int(port)
+    for part in via_parts[1:]:
+        if 'branch=' in part:
+            values['branch'] = part.split('=')[1]
+
+
+def _parse_from(view):
+    """From: <sip:1001@192.168.1.100>;tag=1234567890"""
+    values = view.values
+    values.update(local_user=None, tag=None, cwp=None, roleid=None, password=None)
+    value = view._value(b'from')
+    if value is None:
+        return
+    from_parts = value.split(';')
+    uri_match = NAME_ADDR_PATTERN.match(from_parts[0])
+    if uri_match:
+        values['local_user'] = uri_match.group('user')
+    for part in from_parts[1:]:
+        if 'tag=' in part:
+            values['tag'] = part.split('=')[1]
+        elif 'cwp=' in part:
+            values['cwp'] = part.split('=')[1]
+        elif 'roleid=' in part:
+            values['roleid'] = part.split('=')[1]
+        elif 'password=' in part:
+            values['password'] = part.split('=')[1]
+
+
+def _parse_to(view):
+    """To: <sip:1000@192.168.1.1>;tag=9876543210"""
+    values = view.values
+    values.update(remote_user=None, remote_ip=None, remote_port=None, to_tag=None)
+    value = view._value(b'to')
+    if value is None:
+        return
+    to_parts = value.split(';')
+    uri_match = NAME_ADDR_PATTERN.match(to_parts[0])
+    if uri_match:
+        values['remote_user'] = uri_match.group('user')
+        values['remote_ip'] = uri_match.group('ip')
+        values['remote_port'] = int(uri_match.group('port')) if uri_match.group('port') else 5060
+    for part in to_parts[1:]:
+        if 'tag=' in part:
+            values['to_tag'] = part.split('=')[1]
+
+
+def _parse_cseq(view):
+    """CSeq: 1 REGISTER"""
+    value = view._value(b'cseq')
+    view.values['cseq'] = int(value.split(' ')[0]) if value is not None else None
+
+
+def _parse_refer_to(view):
+    """Refer-To及其中的method参数"""
+    value = view._value(b'refer-to')
+    view.values['refer_to'] = value
+    view.values['method'] = value.split(';method=')[1].split('>')[0] if value is not None and ';method=' in value else None
+
+
+def _parse_content(view):
+    """解码后的消息体, 无消息体时为None"""
+    view.values['content'] = view.body.tobytes().decode('utf-8') if view.body else None
+
+
+def _text_header(field, name):
+    def parse(view):
+        view.values[field] = view._value(name)
+    return parse
+
+
+def _int_header(field, name, default=None):
+    def parse(view):
+        value = view._value(name)
+        view.values[field] = int(value) if value is not None else default
+    return parse
+
+
+def _list_header(field, name):
+    def parse(view):
+        value = view._value(name)
+        view.values[field] = [x.strip() for x in value.split(',')] if value is not None else None
+    return parse
+
+
+# {字段名: 解析函数}, 同一头字段中的各字段一次解析完成
+FIELD_PARSERS = {
+    **dict.fromkeys(('status_code', 'reason_phrase', 'message_type', 'server_user', 'server_ip', 'server_port'),
+                    _parse_start_line),
+    **dict.fromkeys(('local_ip', 'local_port', 'branch'), _parse_via),
+    **dict.fromkeys(('local_user', 'tag', 'cwp', 'roleid', 'password'), _parse_from),
+    **dict.fromkeys(('remote_user', 'remote_ip', 'remote_port', 'to_tag'), _parse_to),
+    **dict.fromkeys(('refer_to', 'method'), _parse_refer_to),
+    'cseq': _parse_cseq,
+    'call_id': _text_header('call_id', b'call-id'),
+    'max_forwards': _int_header('max_forwards', b'max-forwards', 70),
+    'subject': _text_header('subject', b'subject'),
+    'expires': _int_header('expires', b'expires'),
+    'contact': _text_header('contact', b'contact'),
+    'allow': _list_header('allow', b'allow'),
+    'supported': _list_header('supported', b'supported'),
+    'refered_by': _text_header('refered_by', b'refered-by'),
+    'content_type': _text_header('content_type', b'content-type'),
+    'content': _parse_content,
+}
+
+
+class SipMessageView:
+    """
+    原始bytes上的SIP报文惰性视图
+
+    构造时只扫描一遍头部, 记录各头字段值在原始报文中的位置; 字段首次访问时才解码并解析所在的头字段,
+    结果缓存在values中; 消息体以memoryview切片保存, 不复制
+
+    字段名和取值与parse_sip_message返回的参数对象一致, 处理函数可直接当作recv_params使用
+    """
+    __slots__ = ('data', 'method_type', 'body', 'start_line_end', 'headers', 'values')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.values = {}  # 已解析的字段
+        self.method_type = "response" if data.startswith(b'SIP/2.0') else "request"
+        header_end = data.find(b'\r\n\r\n')
+        if header_end == -1:
+            header_end = len(data)
+            self.body = memoryview(data)[header_end:]
+        else:
+            self.body = memoryview(data)[header_end + 4:]
+        start_line_end = data.find(b'\r\n', 0, header_end)
+        self.start_line_end = start_line_end if start_line_end != -1 else header_end
+        # {小写头字段名(bytes): (值起始偏移, 值结束偏移)}, 同名头字段以最后一个为准
+        self.headers = headers = {}
+        pos = self.start_line_end + 2
+        for line in data[pos:header_end].split(b'\r\n'):
+            name, colon, _ = line.partition(b':')
+            length = len(line)
+            if colon:
+                headers[name.strip().lower()] = (pos + len(name) + 1, pos + length)
+            pos += length + 2
+
+    def _value(self, name: bytes):
+        """解码头字段值, 不存在时返回None"""
+        span = self.headers.get(name)
+        if span is None:
+            return None
+        return self.data[span[0]:span[1]].decode('utf-8').strip()
+
+    def header(self, name: str):
+        """按头字段名(不区分大小写)取值"""
+        return self._value(name.lower().encode())
+
+    def params_class(self):
+        """按出现的专有字段确定参数类, 规则与parse_sip_message一致"""
+        if self.password is not None or self.cwp is not None:
+            return RegisterParams
+        if self.roleid is not None:
+            return InfoParams
+        if b'refer-to' in self.headers or b'refered-by' in self.headers:
+            return ReferParams
+        return BaseMessageParams
+
+    def to_params(self):
+        """解析全部字段, 生成参数对象"""
+        values = self.values
+        for name, parser in FIELD_PARSERS.items():
+            if name not in values:
+                parser(self)
+        param_class = self.params_class()
+        kwargs = {name: values[name] for name in PARAM_FIELDS[param_class] if name != 'method_type'}
+        return param_class(method_type=self.method_type, **kwargs)
+
+
+_MISSING = object()
+
+
+def _lazy_field(name, parser):
+    """字段属性: 首次读取时调用解析函数, 之后直接返回已解析的值; 允许处理函数覆盖"""
+    def getter(view):
+        value = view.values.get(name, _MISSING)
+        if value is _MISSING:
+            parser(view)
+            value = view.values[name]
+        return value
+
+    def setter(view, value):
+        view.values[name] = value
+
+    return property(getter, setter)
+
+
+for _name, _parser in FIELD_PARSERS.items():
+    setattr(SipMessageView, _name, _lazy_field(_name, _parser))
@@ -0,0 +1,86 @@
+import base64
+import ctypes
+
+from message_decoder.payload_schema import DEFAULT_ENCODING
+
+try:
+    import numpy as np
+except ImportError:  # 数组解码模式为可选功能, 未安装numpy时只能使用逐条的ctypes解码
+    np = None
+
+# ctypes标量类型对应的numpy类型(本机字节序, 与ctypes.Structure一致)
+_SCALAR_FORMATS = {
+    ctypes.c_int: '=i4',
+    ctypes.c_uint: '=u4',
+    ctypes.c_short: '=i2',
+    ctypes.c_ushort: '=u2',
+    ctypes.c_byte: 'i1',
+    ctypes.c_ubyte: 'u1',
+}
+_dtypes = {}
+
+
+def decode_table(cls, encoded_str: str) -> bytes:
+    """Base64解码表格数据, 并检查长度是否为cls结构体大小的整数倍"""
+    try:
+        decoded_data = base64.b64decode(encoded_str.strip())
+    except Exception as e:
+        raise ValueError(f"Base64解码失败: {e}")
+    entry_size = ctypes.sizeof(cls)
+    if len(decoded_data) % entry_size != 0:
+        raise ValueError(f"数据长度{len(decoded_data)}不是{entry_size}的整数倍")
+    return decoded_data
+
+
+def parse_table(cls, encoded_str: str) -> list:
+    """逐条解析为cls实例: 整张表一次复制到ctypes数组中, 各实例共享该数组的内存"""
+    return parse_table_data(cls, decode_table(cls, encoded_str))
+
+
+def parse_table_data(cls, data) -> list:
+    """从已解码的表格数据(bytes、memoryview、mmap等)解析cls实例"""
+    entry_size = ctypes.sizeof(cls)
+    if len(data) % entry_size != 0:
+        raise ValueError(f"数据长度{len(data)}不是{entry_size}的整数倍")
+    return list((cls * (len(data) // entry_size)).from_buffer_copy(data))
+
+
+def table_dtype(cls):
+    """与ctypes结构体cls内存布局一致的numpy结构化dtype, 字段名和偏移相同"""
+    if np is None:
+        raise ImportError("数组解码模式需要安装numpy")
+    dtype = _dtypes.get(cls)
+    if dtype is None:
+        names, formats, offsets = [], [], []
+        for name, ctype in cls._fields_:
+            if issubclass(ctype, ctypes.Array) and ctype._type_ is ctypes.c_char:
+                fmt = f'S{ctypes.sizeof(ctype)}'
+            elif ctype in _SCALAR_FORMATS:
+                fmt = _SCALAR_FORMATS[ctype]
+            else:
+                raise TypeError(f"{cls.__name__}.{name}: 不支持的字段类型{ctype.__name__}")
+            names.append(name)
+            formats.append(fmt)
+            offsets.append(getattr(cls, name).offset)
+        dtype = _dtypes[cls] = np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                                         'itemsize': ctypes.sizeof(cls)})
+    return dtype
+
+
+def parse_table_array(cls, encoded_str: str):
+    """整张表映射为一个numpy结构化数组(只读, 不逐条复制), 按列访问, 如array['iIsCan']"""
+    dtype = table_dtype(cls)
+    return np.frombuffer(decode_table(cls, encoded_str), dtype=dtype)
+
+
+def text_column(array, name: str, encoding=DEFAULT_ENCODING) -> list:
+    """定长字符串列解码为str列表, 结果与ctypes结构体各字符串属性相同(截至第一个NUL); 默认按载荷的文本编码(GBK)解码"""
+    column = np.ascontiguousarray(array[name])
+    width = column.dtype.itemsize
+    raw = column.view(np.uint8).reshape(len(column), width)
+    # numpy只去掉末尾的NUL, 第一个NUL之后的字节清零后再解码
+    after_nul = np.logical_or.accumulate(raw == 0, axis=1)
+    if after_nul.any():
+        raw = np.where(after_nul, 0, raw).astype(np.uint8)
+        column = raw.view(f'S{width}').reshape(len(column))
+    return np.char.decode(column, encoding).tolist()
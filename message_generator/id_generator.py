@@ -0,0 +1,58 @@
+import base64
+import itertools
+import os
+import weakref
+
+# 进程前缀的随机字节数, 80位随机数经base32编码为16个字符
+PREFIX_BYTES = 10
+
+_generators = weakref.WeakSet()
+
+
+def _new_prefix():
+    """生成进程前缀: 取自os.urandom, 与进程号、启动时间无关, 重启后的进程不会复用旧前缀"""
+    return base64.b32encode(os.urandom(PREFIX_BYTES)).decode().lower()
+
+
+def _reset_after_fork():
+    """fork出的子进程继承了父进程的前缀和计数, 需各自重新生成"""
+    for generator in list(_generators):
+        generator.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class IdGenerator:
+    """
+    branch/tag/Call-ID标识生成器: 进程随机前缀 + 单调递增计数(十六进制)
+
+    前缀定长, 与计数直接拼接不会产生歧义; 同一进程内由计数保证不重复, 跨进程和重启由随机前缀保证
+    itertools.count的next()在GIL下是原子操作, 多线程共用无需加锁
+    """
+
+    def __init__(self):
+        self.reset()
+        _generators.add(self)
+
+    def reset(self):
+        """重新生成前缀并清零计数"""
+        self.prefix = _new_prefix()
+        self._counter = itertools.count(1)
+
+    def next_id(self):
+        """生成新标识"""
+        return f"{self.prefix}{next(self._counter):x}"
+
+    def branch(self, branch_prefix="z9hG4bK"):
+        """生成符合RFC3261规范(以z9hG4bK开头)的branch"""
+        return f"{branch_prefix}-{self.prefix}{next(self._counter):x}"
+
+    def call_id(self, host):
+        """生成Call-ID"""
+        return f"{self.prefix}{next(self._counter):x}@{host}"
+
+
+# 进程内共用的标识生成器
+process_ids = IdGenerator()
@@ -1,14 +1,53 @@
-import random
+from dataclasses import replace
+from operator import attrgetter
 from uuid import uuid4
 from data_classes.params_classes import BaseMessageParams, RegisterParams, InfoParams, ReferParams
+from message_generator.response_cache import slot, SLOT_MARK
+from message_generator.id_generator import process_ids
+
+# 头部模板中逐条报文变化的事务标识字段, 其余头字段取值由模板键固定
+TEMPLATE_SLOTS = ('branch', 'tag', 'to_tag', 'call_id', 'cseq')
+# 决定头部内容的非事务字段(同一席位通常保持不变), 各参数子类追加专有字段
+SHAPE_FIELDS = (
+    'method_type', 'message_type', 'status_code', 'reason_phrase', 'subject', 'expires', 'contact',
+    'local_user', 'local_ip', 'local_port', 'server_user', 'server_ip', 'server_port', 'max_forwards',
+)
+SHAPE_EXTRA_FIELDS = {
+    RegisterParams: ('password', 'cwp'),
+    InfoParams: ('roleid',),
+    ReferParams: ('refer_to', 'refered_by', 'method'),
+}
+
+
+class HeaderTemplate:
+    """编译后的头部模板: %格式串 + 按顺序取字段值的attrgetter"""
+    __slots__ = ('format', 'getter')
+
+    def __init__(self, text):
+        pieces = text.split(SLOT_MARK)
+        self.format = "%s".join(piece.replace('%', '%%') for piece in pieces[0::2])
+        # branch/tag/Call-ID/CSeq必然出现, attrgetter总是返回元组
+        self.getter = attrgetter(*pieces[1::2])
+
+    def render(self, params):
+        return self.format % self.getter(params)
 
 
 class MessageGenerator:
-    def __init__(self):
+    def __init__(self, ids=None, transport="UDP"):
         self.branch_prefix = "z9hG4bK"
-        self.call_id = str(random.randint(1000000000, 9999999999))
-        self.tag = str(random.randint(1000000000, 9999999999))
+        # Via中的传输协议, 头部模板按生成器缓存, 创建后不再修改
+        self.transport = transport
+        # branch/tag/Call-ID由标识生成器分配, 默认使用进程内共用的生成器
+        self.ids = ids if ids is not None else process_ids
+        self.call_id = self.ids.next_id()
+        self.tag = self.ids.next_id()
         self.user_agent = "Python SIP/2.0"
+        # 按报文形态缓存的头部模板
+        self.use_templates = True
+        self.max_templates = 1024
+        self.header_templates = {}
+        self.shape_getters = {}
 
     def _generate_request_header(self, params: BaseMessageParams):
         """生成请求行"""
@@ -21,13 +60,13 @@ class MessageGenerator:
     def _generate_branch(self, params: BaseMessageParams):
         """生成符合RFC3261规范的branch ID"""
         if params.branch is None:
-            return f"{self.branch_prefix}-{random.randint(1000000000, 9999999999)}"
+            return self.ids.branch(self.branch_prefix)
         else:
             return params.branch
 
     def _generate_via_header(self, params: BaseMessageParams):
         """生成Via头"""
-        return f"SIP/2.0/UDP {params.local_ip}:{params.local_port};branch={self._generate_branch(params)}"
+        return f"SIP/2.0/{self.transport} {params.local_ip}:{params.local_port};branch={self._generate_branch(params)}"
 
     def _genearate_cseq_header(self, params: BaseMessageParams):
         """生成CSeq头"""
@@ -43,7 +82,7 @@ class MessageGenerator:
     def _generate_tag(self, params: BaseMessageParams):
         """生成tag"""
         if params.tag is None:
-            self.tag = str(random.randint(1000000000, 9999999999))
+            self.tag = self.ids.next_id()
         else:
             self.tag = params.tag
 
@@ -65,7 +104,8 @@ class MessageGenerator:
     def _generate_to_header(self, params: BaseMessageParams):
         """生成To头"""
         if params.method_type == "response" and params.subject == "radio" and params.message_type == "INVITE":
-            return f"<sip:{params.server_user}@{params.server_ip}>;tag={str(random.randint(1000000000, 9999999999))}"
+            to_tag = params.to_tag if params.to_tag is not None else self.ids.next_id()
+            return f"<sip:{params.server_user}@{params.server_ip}>;tag={to_tag}"
         if params.method_type == "response" and (not str(params.status_code) == "100"):
             return f"<sip:{params.server_user}@{params.server_ip}>;tag={self.tag}"
         elif params.message_type == 'ACK':
@@ -88,49 +128,117 @@ class MessageGenerator:
         """生成Refered-By头"""
         return f"<sip:{params.local_user}@{params.server_ip}>"
 
-    def _generate_base_headers(self, params: BaseMessageParams):
-        """生成基础头字段"""
-        headers = [
-            self._generate_request_header(
-                params) if params.method_type == "request" else self._generate_response_header(params),
-            f"Via: {self._generate_via_header(params)}",
-            f"From: {self._generate_from_header(params)}",
-            f"To: {self._generate_to_header(params)}",
-            f"Call-ID: {self._generate_call_id_header(params)}",
-            f"CSeq: {self._genearate_cseq_header(params)}",
-            f"Max-Forwards: {params.max_forwards}",
-        ]
-        return headers
-
     def _gererate_headers(self, params: BaseMessageParams):
         """生成完整的SIP头"""
-        headers = self._generate_base_headers(params)
+        return self._generate_header_block(params).split("\r\n")
+
+    def _generate_header_block(self, params: BaseMessageParams):
+        """一次拼接全部头字段(不含Content-*), 各行以CRLF分隔、末行不带CRLF"""
+        message_type = params.message_type.upper()
+        if params.method_type == "request":
+            start_line = f"{message_type} sip:{params.server_user}@{params.server_ip}:{params.server_port} SIP/2.0"
+        else:
+            start_line = f"SIP/2.0 {params.status_code} {params.reason_phrase}"
+        call_id = params.call_id if params.call_id is not None else f"{self.call_id}@{params.local_ip}"
+        block = (
+            f"{start_line}\r\n"
+            f"Via: SIP/2.0/{self.transport} {params.local_ip}:{params.local_port};branch={self._generate_branch(params)}\r\n"
+            f"From: {self._generate_from_header(params)}\r\n"
+            f"To: {self._generate_to_header(params)}\r\n"
+            f"Call-ID: {call_id}\r\n"
+            f"CSeq: {params.cseq} {message_type}\r\n"
+            f"Max-Forwards: {params.max_forwards}"
+        )
+        optional = []
         if params.subject is not None:
-            headers.append(f"Subject: {params.subject}")
+            optional.append(f"Subject: {params.subject}")
         if params.expires is not None:
-            headers.append(f"Expires: {params.expires}")
+            optional.append(f"Expires: {params.expires}")
         if params.contact is not None:
-            headers.append(f"Contact: {self._generate_contact_header(params)}")
+            optional.append(f"Contact: {self._generate_contact_header(params)}")
         if params.allow is not None:
-            headers.append(f"Allow: {', '.join(params.allow)}")
+            optional.append(f"Allow: {', '.join(params.allow)}")
         if params.supported is not None:
-            headers.append(f"Supported: {', '.join(params.supported)}")
-        if isinstance(params, ReferParams) and params.refer_to:
-            headers.append(f"Refer-To: {self._generate_refer_to_header(params)}")
-        if isinstance(params, ReferParams) and params.refered_by:
-            headers.append(f"Refered-By: {self._generate_refered_by_header(params)}")
-        return headers
+            optional.append(f"Supported: {', '.join(params.supported)}")
+        if isinstance(params, ReferParams):
+            if params.refer_to:
+                optional.append(f"Refer-To: {self._generate_refer_to_header(params)}")
+            if params.refered_by:
+                optional.append(f"Refered-By: {self._generate_refered_by_header(params)}")
+        if optional:
+            block = block + "\r\n" + "\r\n".join(optional)
+        return block
 
     def _generate_content(self, params: BaseMessageParams):
         """生成消息内容"""
         content = params.content if params.content is not None else ""
-        if content:
-            return f"Content-Type: {params.content_type}\r\nContent-Length: {len(content)}\r\n\r\n{content}"
+        if content or params.content_type:
+            return f"Content-Type: {params.content_type}\r\nContent-Length: {len(content.encode())}\r\n\r\n{content}"
         else:
             return "Content-Length: 0\r\n\r\n"
 
+    def _fill_identifiers(self, params: BaseMessageParams):
+        """补全未指定的branch/tag/Call-ID(及INVITE应答的To tag)并写回params, 便于按事务匹配应答"""
+        if params.branch is None:
+            params.branch = self._generate_branch(params)
+        self._generate_tag(params)
+        params.tag = self.tag
+        if params.call_id is None:
+            params.call_id = self._generate_call_id_header(params)
+        if (params.to_tag is None and params.method_type == "response"
+                and params.subject == "radio" and params.message_type == "INVITE"):
+            params.to_tag = self.ids.next_id()
+
+    def _template_key(self, params: BaseMessageParams):
+        """报文形态: 参数类型及全部非事务字段的取值"""
+        getter = self.shape_getters.get(params.__class__)
+        if getter is None:
+            fields = SHAPE_FIELDS + SHAPE_EXTRA_FIELDS.get(params.__class__, ())
+            getter = attrgetter('__class__', *fields, 'allow', 'supported')
+            self.shape_getters[params.__class__] = getter
+        key = getter(params)
+        allow, supported = key[-2:]
+        if allow is not None or supported is not None:
+            # 列表不可哈希, 转为元组
+            key = key[:-2] + (
+                allow if allow is None else tuple(allow),
+                supported if supported is None else tuple(supported),
+            )
+        return key
+
+    def _compile_header_template(self, params: BaseMessageParams):
+        """以占位符渲染一次头部, 编译为模板"""
+        placeholder = replace(params, **{name: slot(name) for name in TEMPLATE_SLOTS})
+        tag = self.tag
+        try:
+            return HeaderTemplate(self._generate_header_block(placeholder))
+        finally:
+            self.tag = tag
+
+    def _render_header_block(self, params: BaseMessageParams):
+        """生成头部: 首次遇到的报文形态编译模板, 之后只填充字段"""
+        self._fill_identifiers(params)
+        if not self.use_templates:
+            return self._generate_header_block(params)
+        key = self._template_key(params)
+        template = self.header_templates.get(key)
+        if template is None:
+            # 对端数量异常增长时整体丢弃, 防止模板无限累积
+            if len(self.header_templates) >= self.max_templates:
+                self.header_templates.clear()
+            template = self._compile_header_template(params)
+            self.header_templates[key] = template
+        return template.render(params)
+
     def generate_message(self, params: BaseMessageParams):
         """生成完整的SIP消息"""
-        headers = self._gererate_headers(params)
-        content = self._generate_content(params)
-        return "\r\n".join(headers) + "\r\n" + content
+        return self._render_header_block(params) + "\r\n" + self._generate_content(params)
+
+    def generate_message_bytes(self, params: BaseMessageParams):
+        """生成已编码的完整SIP消息, 消息体只编码一次, Content-Length按字节计算"""
+        headers = self._render_header_block(params)
+        if params.content or params.content_type:
+            # 指定了Content-Type时消息体为空也携带, 如空表格的分片
+            body = params.content.encode() if params.content else b''
+            return f"{headers}\r\nContent-Type: {params.content_type}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        return f"{headers}\r\nContent-Length: 0\r\n\r\n".encode()
@@ -0,0 +1,60 @@
+from dataclasses import replace
+from data_classes.params_classes import BaseMessageParams
+
+# 模板中可变字段的占位标记, 合法SIP报文中不会出现NUL字符
+SLOT_MARK = '\x00'
+
+
+def slot(name):
+    """生成字段占位符"""
+    return f"{SLOT_MARK}{name}{SLOT_MARK}"
+
+
+class MessageTemplate:
+    """预编码的报文模板: 静态部分保存为bytes, 只在占位处拼接可变字段"""
+    __slots__ = ('parts', 'slots')
+
+    def __init__(self, message: str):
+        pieces = message.split(SLOT_MARK)
+        # 偶数位为静态文本, 奇数位为字段名
+        self.parts = [piece.encode() for piece in pieces[0::2]]
+        self.slots = pieces[1::2]
+
+    def render(self, values) -> bytes:
+        """按字段名填充占位符, values为{字段名: 已编码的bytes}, 须包含全部占位字段"""
+        parts = self.parts
+        out = [parts[0]]
+        for i, name in enumerate(self.slots, 1):
+            out.append(values[name])
+            out.append(parts[i])
+        return b''.join(out)
+
+
+class ResponseCache:
+    """静态应答报文缓存, 启动时编译一次, 每次请求只填充事务相关字段"""
+
+    def __init__(self, message_generator):
+        self.message_generator = message_generator
+        self.entries = {}  # {key: [MessageTemplate, ...]}
+
+    def compile(self, key, params: BaseMessageParams, slots):
+        """将params渲染为模板并追加到key对应的分片列表, slots中的字段保留为占位符"""
+        placeholder_params = replace(params, **{name: slot(name) for name in slots})
+        message = self.message_generator.generate_message(placeholder_params)
+        self.entries.setdefault(key, []).append(MessageTemplate(message))
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def render(self, key, values):
+        """
+        渲染key对应的全部分片, 返回bytes列表
+
+        values为{字段名: 值}, 值按str()编码; 缺少占位字段或值为None时抛出ValueError, 不会渲染出"None"
+        """
+        templates = self.entries.get(key, [])
+        missing = {name for template in templates for name in template.slots if values.get(name) is None}
+        if missing:
+            raise ValueError(f"应答{key}缺少字段: {', '.join(sorted(missing))}")
+        encoded = {name: str(value).encode() for name, value in values.items()}
+        return [template.render(encoded) for template in templates]
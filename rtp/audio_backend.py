@@ -0,0 +1,175 @@
+"""
+RtpEndpoint的音频后端: 按帧读写16位PCM, 声卡之外还可以是静音/丢弃、WAV文件或内存缓冲,
+用于没有声卡的服务器、同一进程中的多个端点以及离线压测
+"""
+import threading
+import wave
+
+
+class AudioBackend:
+    """音频后端接口: read返回frames个采样的PCM数据, write写出PCM数据; 发送/播放节拍由RtpEndpoint控制"""
+
+    blocking = False  # read/write是否等待设备(声卡按实时速率), 这样的后端不能用于单线程的RtpEngine
+
+    def __init__(self, sample_rate=8000, channels=1, sample_width=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+
+    def silence(self, frames):
+        return bytes(frames * self.channels * self.sample_width)
+
+    def read(self, frames) -> bytes:
+        raise NotImplementedError
+
+    def write(self, data):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyAudioBackend(AudioBackend):
+    """PyAudio默认的输入(麦克风)和输出(扬声器)设备"""
+
+    blocking = True
+
+    def __init__(self, sample_rate=8000, channels=1, sample_width=2, frames_per_buffer=160):
+        super().__init__(sample_rate, channels, sample_width)
+        # 只有使用声卡时才需要pyaudio
+        import pyaudio
+        self.audio = pyaudio.PyAudio()
+        # 音频输入流(麦克风)
+        self.input_stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=channels,
+            rate=sample_rate,
+            input=True,
+            input_device_index=self.audio.get_default_input_device_info()['index'],
+            frames_per_buffer=frames_per_buffer
+        )
+        # 音频输出流(扬声器)
+        self.output_stream = self.audio.open(
+            format=self.audio.get_format_from_width(sample_width),
+            channels=channels,
+            rate=sample_rate,
+            output=True,
+            frames_per_buffer=frames_per_buffer
+        )
+
+    def read(self, frames):
+        return self.input_stream.read(frames, exception_on_overflow=False)
+
+    def write(self, data):
+        self.output_stream.write(data)
+
+    def close(self):
+        self.input_stream.stop_stream()  # 停止音频输入流（如麦克风）
+        self.input_stream.close()  # 释放输入流资源
+        self.output_stream.stop_stream()  # 停止音频输出流（如扬声器）
+        self.output_stream.close()  # 释放输出流资源
+        self.audio.terminate()  # 销毁音频接口（如PyAudio实例）
+
+
+class NullBackend(AudioBackend):
+    """无声卡: 读到静音, 写入的数据丢弃, 只统计帧数"""
+
+    def __init__(self, sample_rate=8000, channels=1, sample_width=2):
+        super().__init__(sample_rate, channels, sample_width)
+        self.frames_read = 0
+        self.frames_written = 0
+
+    def read(self, frames):
+        self.frames_read += frames
+        return self.silence(frames)
+
+    def write(self, data):
+        self.frames_written += len(data) // (self.channels * self.sample_width)
+
+
+class MemoryBackend(AudioBackend):
+    """内存缓冲: 从source读取(读完后循环或补静音), 写入的数据追加到output"""
+
+    def __init__(self, source=b'', loop=False, sample_rate=8000, channels=1, sample_width=2):
+        super().__init__(sample_rate, channels, sample_width)
+        self.source = bytes(source)
+        self.loop = loop
+        self.position = 0
+        self.output = bytearray()
+        self.lock = threading.Lock()
+
+    def read(self, frames):
+        size = frames * self.channels * self.sample_width
+        data = b''
+        while True:
+            chunk = self.source[self.position:self.position + size - len(data)]
+            self.position += len(chunk)
+            data += chunk
+            if len(data) == size or not self.loop or not self.source:
+                return data + self.silence(frames)[len(data):]
+            self.position = 0
+
+    def write(self, data):
+        with self.lock:
+            self.output += data
+
+
+class WavBackend(AudioBackend):
+    """WAV文件: 从source文件读取(读完后循环或补静音), 写入sink文件; 二者均可省略"""
+
+    def __init__(self, source=None, sink=None, loop=False, sample_rate=8000, channels=1, sample_width=2):
+        super().__init__(sample_rate, channels, sample_width)
+        self.loop = loop
+        self.reader = None
+        self.writer = None
+        if source is not None:
+            self.reader = wave.open(source, 'rb')
+            params = (self.reader.getframerate(), self.reader.getnchannels(), self.reader.getsampwidth())
+            if params != (sample_rate, channels, sample_width):
+                self.reader.close()
+                raise ValueError(f"{source}: 格式{params}与端点的{(sample_rate, channels, sample_width)}不一致")
+        if sink is not None:
+            self.writer = wave.open(sink, 'wb')
+            self.writer.setframerate(sample_rate)
+            self.writer.setnchannels(channels)
+            self.writer.setsampwidth(sample_width)
+        self.lock = threading.Lock()
+
+    def read(self, frames):
+        if self.reader is None:
+            return self.silence(frames)
+        size = frames * self.channels * self.sample_width
+        data = self.reader.readframes(frames)
+        if len(data) < size and self.loop and self.reader.getnframes():
+            self.reader.rewind()
+            data += self.reader.readframes(frames - len(data) // (self.channels * self.sample_width))
+        return data + self.silence(frames)[len(data):]
+
+    def write(self, data):
+        if self.writer is not None:
+            with self.lock:
+                self.writer.writeframes(data)
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+        if self.writer is not None:
+            with self.lock:
+                self.writer.close()
+
+
+BACKENDS = {
+    'pyaudio': PyAudioBackend,
+    'null': NullBackend,
+    'memory': MemoryBackend,
+    'wav': WavBackend,
+}
+
+
+def create_backend(name='pyaudio', **options) -> AudioBackend:
+    """按名称创建音频后端, options为对应后端的构造参数"""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的音频后端: {name}, 可选: {', '.join(BACKENDS)}")
+    return cls(**options)
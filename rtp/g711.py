@@ -0,0 +1,263 @@
+"""
+G.711 A-law/μ-law编解码, 不依赖audioop(Python 3.13已移除)
+
+编码为65536项查表(以16位采样的无符号值为下标), 解码为256项查表, 结果与audioop的lin2alaw/alaw2lin/
+lin2ulaw/ulaw2lin/rms/mul(采样宽度2)逐位一致。PCM为本机字节序的16位有符号采样, 与audioop相同。
+
+单帧接口处理bytes(有NumPy时编码、均方根和mul借助NumPy查表/求和), mul按系数缓存65536项查表; 安装了NumPy时另提供批量接口, 一次调用处理任意形状的采样数组(多帧或多路流)
+"""
+import math
+import operator
+import sys
+from array import array
+from functools import lru_cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_SEG_AEND = (0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF)
+_SEG_UEND = (0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF)
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+
+
+def _segment(value, ends):
+    for seg, end in enumerate(ends):
+        if value <= end:
+            return seg
+    return len(ends)
+
+
+def _linear13_to_alaw(value):
+    """13位有符号采样编码为A-law(偶数位取反)"""
+    if value >= 0:
+        mask = 0xD5
+    else:
+        mask = 0x55
+        value = -value - 1
+    seg = _segment(value, _SEG_AEND)
+    if seg >= 8:
+        return 0x7F ^ mask
+    code = seg << 4
+    code |= ((value >> 1) if seg < 2 else (value >> seg)) & 0x0F
+    return code ^ mask
+
+
+def _linear14_to_ulaw(value):
+    """14位有符号采样编码为μ-law(各位取反)"""
+    if value < 0:
+        value = -value
+        mask = 0x7F
+    else:
+        mask = 0xFF
+    value = min(value, _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    seg = _segment(value, _SEG_UEND)
+    if seg >= 8:
+        return 0x7F ^ mask
+    return ((seg << 4) | ((value >> (seg + 1)) & 0x0F)) ^ mask
+
+
+def _alaw_to_linear(code):
+    code ^= 0x55
+    value = (code & 0x0F) << 4
+    seg = (code & 0x70) >> 4
+    if seg == 0:
+        value += 8
+    elif seg == 1:
+        value += 0x108
+    else:
+        value = (value + 0x108) << (seg - 1)
+    return value if code & 0x80 else -value
+
+
+def _ulaw_to_linear(code):
+    code = ~code
+    value = (((code & 0x0F) << 3) + _ULAW_BIAS) << ((code & 0x70) >> 4)
+    return _ULAW_BIAS - value if code & 0x80 else value - _ULAW_BIAS
+
+
+def _encode_table(encode, shift):
+    """16位采样(无符号值为下标)到码字的查表; 编码只取采样的高(16-shift)位, 每个码字重复2**shift次"""
+    half = 1 << (15 - shift)
+    codes = [encode(value) for value in range(half)] + [encode(value) for value in range(-half, 0)]
+    repeat = 1 << shift
+    return b''.join(bytes((code,)) * repeat for code in codes)
+
+
+# 编码表: ALAW_ENCODE[sample & 0xFFFF]
+ALAW_ENCODE = _encode_table(_linear13_to_alaw, 3)
+ULAW_ENCODE = _encode_table(_linear14_to_ulaw, 2)
+# 解码表: 码字到16位采样
+ALAW_DECODE = tuple(_alaw_to_linear(code) for code in range(256))
+ULAW_DECODE = tuple(_ulaw_to_linear(code) for code in range(256))
+
+
+def _byte_tables(decode):
+    """解码表拆成低字节/高字节两张bytes.translate用的表, 按本机字节序排列"""
+    low = bytes(value & 0xFF for value in decode)
+    high = bytes((value >> 8) & 0xFF for value in decode)
+    return (low, high) if sys.byteorder == 'little' else (high, low)
+
+
+_ALAW_BYTES = _byte_tables(ALAW_DECODE)
+_ULAW_BYTES = _byte_tables(ULAW_DECODE)
+
+
+def _pair_table(decode):
+    """两个码字(按uint16读取)到两个采样(按uint32读取)的解码表, 批量解码时每次查表得到两个采样"""
+    codes = numpy.arange(65536, dtype=numpy.uint16).view(numpy.uint8).reshape(65536, 2)
+    return decode[codes].view(numpy.uint32).ravel()
+
+
+# NumPy查表: 单帧接口在有NumPy时也用它编码
+if numpy is not None:
+    _NP_ALAW_ENCODE = numpy.frombuffer(ALAW_ENCODE, dtype=numpy.uint8)
+    _NP_ULAW_ENCODE = numpy.frombuffer(ULAW_ENCODE, dtype=numpy.uint8)
+    _NP_ALAW_DECODE = numpy.array(ALAW_DECODE, dtype=numpy.int16)
+    _NP_ULAW_DECODE = numpy.array(ULAW_DECODE, dtype=numpy.int16)
+    _NP_ALAW_PAIRS = _pair_table(_NP_ALAW_DECODE)
+    _NP_ULAW_PAIRS = _pair_table(_NP_ULAW_DECODE)
+else:
+    _NP_ALAW_ENCODE = _NP_ULAW_ENCODE = _NP_ALAW_DECODE = _NP_ULAW_DECODE = None
+    _NP_ALAW_PAIRS = _NP_ULAW_PAIRS = None
+
+
+def _samples(fragment, signed=False):
+    view = memoryview(fragment)
+    if view.nbytes % 2:
+        raise ValueError("PCM数据长度不是采样宽度(2字节)的整数倍")
+    return view.cast('B').cast('h' if signed else 'H')
+
+
+def _np_samples(fragment, dtype):
+    """bytes类数据直接作为NumPy数组(不复制), 省去memoryview转换的开销"""
+    if len(fragment) % 2 and memoryview(fragment).nbytes % 2:
+        raise ValueError("PCM数据长度不是采样宽度(2字节)的整数倍")
+    return numpy.frombuffer(fragment, dtype=dtype)
+
+
+def _encode(fragment, table, array_table):
+    if numpy is not None:
+        return array_table.take(_np_samples(fragment, numpy.uint16)).tobytes()
+    return bytes(map(table.__getitem__, _samples(fragment)))
+
+
+def _decode(fragment, tables):
+    # 每个码字的两个输出字节分别由bytes.translate查表得到, 再交错写入
+    if not isinstance(fragment, bytes):
+        fragment = bytes(fragment)
+    first, second = tables
+    output = bytearray(len(fragment) * 2)
+    output[0::2] = fragment.translate(first)
+    output[1::2] = fragment.translate(second)
+    return bytes(output)
+
+
+def lin2alaw(fragment) -> bytes:
+    """16位PCM编码为A-law, 同audioop.lin2alaw(fragment, 2)"""
+    return _encode(fragment, ALAW_ENCODE, _NP_ALAW_ENCODE)
+
+
+def alaw2lin(fragment) -> bytes:
+    """A-law解码为16位PCM, 同audioop.alaw2lin(fragment, 2)"""
+    return _decode(fragment, _ALAW_BYTES)
+
+
+def lin2ulaw(fragment) -> bytes:
+    """16位PCM编码为μ-law, 同audioop.lin2ulaw(fragment, 2)"""
+    return _encode(fragment, ULAW_ENCODE, _NP_ULAW_ENCODE)
+
+
+def ulaw2lin(fragment) -> bytes:
+    """μ-law解码为16位PCM, 同audioop.ulaw2lin(fragment, 2)"""
+    return _decode(fragment, _ULAW_BYTES)
+
+
+def rms(fragment) -> int:
+    """16位PCM的均方根, 同audioop.rms(fragment, 2)"""
+    if numpy is not None:
+        values = _np_samples(fragment, numpy.int16)
+        if not values.size:
+            return 0
+        # 平方和不超过2**53时float64求和是精确的(每个平方不超过2**30), 比int64快
+        values = values.astype(numpy.float64 if values.size < 1 << 23 else numpy.int64)
+        return int(math.sqrt(int(values.dot(values)) / values.size))
+    samples = _samples(fragment, signed=True)
+    if not samples:
+        return 0
+    return int(math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples)))
+
+
+@lru_cache(maxsize=16)
+def _mul_table(factor):
+    """16位采样(无符号值为下标)乘以factor的结果表(向下取整并限幅), 抖动缓冲区等固定系数的调用只建一次"""
+    if numpy is not None:
+        samples = numpy.arange(65536, dtype=numpy.uint16).view(numpy.int16)
+        return numpy.floor(samples * float(factor)).clip(-32768, 32767).astype(numpy.int16)
+    floor = math.floor
+    return array('h', [min(32767, max(-32768, floor(sample * factor)))
+                       for sample in (*range(32768), *range(-32768, 0))])
+
+
+def mul(fragment, factor) -> bytes:
+    """16位PCM乘以系数(向下取整并限幅), 同audioop.mul(fragment, 2, factor)"""
+    table = _mul_table(factor)
+    if numpy is not None:
+        return table.take(_np_samples(fragment, numpy.uint16)).tobytes()
+    return array('h', map(table.__getitem__, _samples(fragment))).tobytes()
+
+
+# NumPy批量接口: 采样数组可以是一帧(一维)或多帧/多路(最后一维为采样)
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("批量编解码需要NumPy")
+
+
+def _encode_array(samples, table):
+    _require_numpy()
+    return table.take(numpy.asarray(samples, dtype=numpy.int16).view(numpy.uint16), mode='clip')
+
+
+def _decode_array(codes, table, pairs):
+    _require_numpy()
+    codes = numpy.ascontiguousarray(codes, dtype=numpy.uint8)
+    if codes.ndim and codes.shape[-1] % 2 == 0:
+        return pairs.take(codes.view(numpy.uint16), mode='clip').view(numpy.int16).reshape(codes.shape)
+    return table.take(codes, mode='clip')
+
+
+def lin2alaw_array(samples):
+    """int16采样数组编码为同形状的uint8 A-law数组"""
+    return _encode_array(samples, _NP_ALAW_ENCODE)
+
+
+def alaw2lin_array(codes):
+    """uint8 A-law数组解码为同形状的int16采样数组"""
+    return _decode_array(codes, _NP_ALAW_DECODE, _NP_ALAW_PAIRS)
+
+
+def lin2ulaw_array(samples):
+    """int16采样数组编码为同形状的uint8 μ-law数组"""
+    return _encode_array(samples, _NP_ULAW_ENCODE)
+
+
+def ulaw2lin_array(codes):
+    """uint8 μ-law数组解码为同形状的int16采样数组"""
+    return _decode_array(codes, _NP_ULAW_DECODE, _NP_ULAW_PAIRS)
+
+
+def rms_array(samples):
+    """按最后一维计算每帧的均方根(取整方式同audioop.rms), 返回int64数组"""
+    _require_numpy()
+    samples = numpy.asarray(samples, dtype=numpy.int16).astype(numpy.int64)
+    if samples.shape[-1] == 0:
+        return numpy.zeros(samples.shape[:-1], dtype=numpy.int64)
+    squares = numpy.einsum('...i,...i->...', samples, samples)
+    return numpy.sqrt(squares / samples.shape[-1]).astype(numpy.int64)
+
+
+def voice_activity(samples, threshold):
+    """按最后一维逐帧做语音活动检测: 均方根大于threshold的帧为True"""
+    return rms_array(samples) > threshold
@@ -0,0 +1,134 @@
+import math
+import threading
+import time
+
+from rtp import g711
+
+
+class JitterBuffer:
+    """
+    按RTP序列号排序的自适应抖动缓冲区
+
+    接收线程put收到的帧, 播放时钟每帧get一次, 二者互不依赖: 乱序到达的帧按序列号归位, 晚于播放点的帧丢弃;
+    缺失的帧用上一帧逐帧衰减代替(丢包隐藏), 连续缺失超过max_conceal帧后输出静音。
+
+    目标延时取到达抖动(RFC 3550的估计方法)的3倍, 有帧晚于播放点到达时再临时加大, 在min_delay~max_delay帧之间:
+    缺帧且缓存不足目标延时时先隐藏一帧而不推进播放点(等待晚到的帧, 延时增大); 缓存多于目标延时时跳过最早的帧
+    (延时减小), 优先跳过无语音的帧
+    """
+
+    def __init__(self, frame_samples=160, clock_rate=8000, min_delay=1, max_delay=10, max_conceal=5,
+                 sample_width=2):
+        self.frame_samples = frame_samples  # 每帧的采样数(RTP时间戳增量)
+        self.clock_rate = clock_rate
+        self.frame_duration = frame_samples / clock_rate  # 帧时长(秒)
+        self.min_delay = min_delay  # 播放延时下限(帧)
+        self.max_delay = max_delay  # 播放延时上限(帧)
+        self.max_conceal = max_conceal  # 连续隐藏的最大帧数
+        self.sample_width = sample_width
+        self.silence = bytes(frame_samples * sample_width)
+        self.lock = threading.Lock()
+        self.stats = {'received': 0, 'late': 0, 'duplicate': 0, 'concealed': 0, 'dropped': 0}
+        self.jitter = 0.0  # 到达抖动估计(采样数), 重新预缓冲时保留, 反映的是网络状况
+        self.late_delay = 0.0  # 因帧晚到而增加的延时(帧), 逐帧衰减
+        self.reset()
+
+    def reset(self):
+        """清空缓冲区, 下一帧到达后重新预缓冲"""
+        self.frames = {}  # {扩展序列号: (PCM数据, 标记位)}
+        self.max_seq = None  # 已收到的最大扩展序列号(含16位回绕)
+        self.next_seq = None  # 下一个播放的扩展序列号, 未开始播放时为None
+        self.last_arrival = None  # 上一帧的到达时间(秒)
+        self.last_timestamp = None  # 上一帧的RTP时间戳
+        self.last_frame = None  # 上一个播放的帧, 用于丢包隐藏
+        self.concealed = 0  # 连续隐藏的帧数
+
+    @property
+    def target_delay(self):
+        """当前的目标播放延时(帧)"""
+        frames = max(math.ceil(3 * self.jitter / self.frame_samples) + 1, math.ceil(self.late_delay))
+        return min(self.max_delay, max(self.min_delay, frames))
+
+    @property
+    def depth(self):
+        """已缓存的帧跨度(从播放点到最大序列号)"""
+        if self.max_seq is None:
+            return 0
+        start = self.next_seq if self.next_seq is not None else min(self.frames, default=self.max_seq)
+        return self.max_seq - start + 1
+
+    def _extend(self, seq):
+        """16位序列号扩展为不回绕的序列号"""
+        if self.max_seq is None:
+            return seq
+        delta = (seq - self.max_seq) & 0xFFFF
+        if delta >= 0x8000:
+            delta -= 0x10000
+        return self.max_seq + delta
+
+    def put(self, seq, timestamp, pcm_data, marker=0, arrival=None):
+        """收到一帧; 返回False表示该帧晚于播放点或重复, 已丢弃"""
+        arrival = time.monotonic() if arrival is None else arrival
+        with self.lock:
+            self.stats['received'] += 1
+            ext = self._extend(seq)
+            if self.next_seq is not None and ext < self.next_seq:
+                self.stats['late'] += 1
+                self.late_delay = min(self.max_delay, max(self.late_delay, self.target_delay) + 1)
+                return False
+            if ext in self.frames:
+                self.stats['duplicate'] += 1
+                return False
+            # 到达抖动: 相邻两帧传输时间之差的平滑值(RFC 3550 A.8), 时间戳差按32位回绕计算
+            if self.last_arrival is not None:
+                elapsed = (timestamp - self.last_timestamp) & 0xFFFFFFFF
+                if elapsed >= 0x80000000:
+                    elapsed -= 0x100000000
+                transit_change = (arrival - self.last_arrival) * self.clock_rate - elapsed
+                self.jitter += (abs(transit_change) - self.jitter) / 16
+            self.last_arrival, self.last_timestamp = arrival, timestamp
+            self.frames[ext] = (pcm_data, marker)
+            if self.max_seq is None or ext > self.max_seq:
+                self.max_seq = ext
+            return True
+
+    def get(self):
+        """播放时钟取下一帧PCM数据; 未开始播放(预缓冲中或空闲)时返回None"""
+        with self.lock:
+            if self.next_seq is None:
+                if not self.frames or self.depth < self.target_delay:
+                    return None
+                self.next_seq = min(self.frames)
+            self.late_delay *= 0.995
+            target = self.target_delay
+            # 缓存超过目标延时时跳过最早的帧, 逐步缩短延时; 优先跳过无语音(标记位为0)的帧
+            depth = self.depth
+            if depth > target:
+                frame = self.frames.get(self.next_seq)
+                if frame is None or not frame[1] or depth > target + 2:
+                    if self.frames.pop(self.next_seq, None) is not None:
+                        self.stats['dropped'] += 1
+                    self.next_seq += 1
+            frame = self.frames.pop(self.next_seq, None)
+            if frame is not None:
+                self.next_seq += 1
+                self.concealed = 0
+                self.last_frame = frame[0]
+                return frame[0]
+            # 缓存不足目标延时时该帧可能还在路上, 播放点不动; 否则按丢失处理
+            if self.depth >= target:
+                self.next_seq += 1
+            return self._conceal()
+
+    def _conceal(self):
+        """缺失的帧: 上一帧逐帧减半, 连续缺失过多时输出静音; 长时间无帧到达时回到空闲状态"""
+        if not self.frames and self.concealed >= self.max_delay:
+            # 对端停止发送, 下一次通话重新预缓冲
+            self.reset()
+            return None
+        self.stats['concealed'] += 1
+        self.concealed += 1
+        if self.last_frame is None or self.concealed > self.max_conceal:
+            return self.silence
+        self.last_frame = g711.mul(self.last_frame, 0.5)
+        return self.last_frame
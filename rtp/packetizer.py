@@ -0,0 +1,50 @@
+import random
+import struct
+
+# RTP固定头部(RFC 3550): V/P/X/CC, M/PT, 序列号, 时间戳, SSRC
+RTP_HEADER = struct.Struct('!BBHII')
+RTP_VERSION = 2
+
+
+class RtpPacketizer:
+    """
+    单路RTP流的打包器: 整个数据包(头部+负载)预先分配在一个bytearray中, 每帧只用pack_into原地更新
+    标记位/序列号/时间戳并写入负载, 发送时传memoryview, 发包过程不再创建新的bytes对象;
+    编码后的静音帧缓存在缓冲区中, 连续发送静音时负载不重复写入
+    """
+
+    def __init__(self, payload_type, payload_size, samples_per_frame, ssrc=None, silence_payload=None):
+        self.payload_type = payload_type & 0x7F
+        self.payload_size = payload_size  # 每帧负载字节数
+        self.samples_per_frame = samples_per_frame  # 每帧的时间戳增量
+        self.ssrc = random.randint(0, 0xFFFFFFFF) if ssrc is None else ssrc
+        self.sequence_number = 0
+        self.timestamp = 0
+        self.buffer = bytearray(RTP_HEADER.size + payload_size)
+        self.view = memoryview(self.buffer)
+        self.payload = self.view[RTP_HEADER.size:]
+        self.silence_payload = bytes(silence_payload) if silence_payload is not None else bytes(payload_size)
+        if len(self.silence_payload) != payload_size:
+            raise ValueError(f"静音帧长度{len(self.silence_payload)}与负载长度{payload_size}不一致")
+        self.silence_loaded = False  # 缓冲区中的负载是否为静音帧
+
+    def packet(self, payload, marker=0):
+        """用payload生成下一个数据包, 返回缓冲区的memoryview(下一次调用前有效)"""
+        self.payload[:] = payload
+        self.silence_loaded = False
+        return self._next(marker)
+
+    def silence_packet(self):
+        """下一个静音数据包, 负载复用缓存的编码静音帧"""
+        if not self.silence_loaded:
+            self.payload[:] = self.silence_payload
+            self.silence_loaded = True
+        return self._next(0)
+
+    def _next(self, marker):
+        """写入头部并推进序列号和时间戳"""
+        RTP_HEADER.pack_into(self.buffer, 0, RTP_VERSION << 6, (marker << 7) | self.payload_type,
+                             self.sequence_number, self.timestamp, self.ssrc)
+        self.sequence_number = (self.sequence_number + 1) & 0xFFFF
+        self.timestamp = (self.timestamp + self.samples_per_frame) & 0xFFFFFFFF
+        return self.view
@@ -0,0 +1,39 @@
+import threading
+from collections import deque
+
+
+class RtpPortPool:
+    """RTP端口池, 只分配偶数端口(相邻奇数端口留给RTCP)"""
+
+    def __init__(self, start_port, count):
+        """
+        Args:
+            start_port: 起始端口, 奇数时自动对齐到下一个偶数
+            count: 可同时分配的端口数
+        """
+        start_port += start_port % 2
+        self.start_port = start_port
+        self.count = count
+        self.free_ports = deque(range(start_port, start_port + count * 2, 2))
+        self.used_ports = set()
+        self.lock = threading.Lock()
+
+    def allocate(self):
+        """取出一个空闲端口, 端口耗尽时抛出RuntimeError"""
+        with self.lock:
+            if not self.free_ports:
+                raise RuntimeError(f"RTP端口已耗尽 ({self.start_port}起共{self.count}个)")
+            port = self.free_ports.popleft()
+            self.used_ports.add(port)
+            return port
+
+    def release(self, port):
+        """归还端口"""
+        with self.lock:
+            if port in self.used_ports:
+                self.used_ports.remove(port)
+                self.free_ports.append(port)
+
+    def __len__(self):
+        """剩余可分配端口数"""
+        return len(self.free_ports)
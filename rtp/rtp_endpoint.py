@@ -1,16 +1,16 @@
-import pyaudio
 import socket
 import time
-import audioop
 import random
 import threading
-from collections import deque
-import keyboard
+from rtp import g711
+from rtp.jitter_buffer import JitterBuffer
+from rtp.audio_backend import PyAudioBackend
+from rtp.packetizer import RtpPacketizer, RTP_HEADER
 
 
 class RtpEndpoint:
     def __init__(self, local_ip='127.0.0.1', local_port=5060,
-                 remote_ip='127.0.0.1', remote_port=5060):
+                 remote_ip='127.0.0.1', remote_port=5060, audio=None, keyboard_ptt=True):
         """RTP端点类，实现双向音频通信
 
         Args:
@@ -18,6 +18,8 @@ class RtpEndpoint:
             local_port: 本地监听端口
             remote_ip: 远程目标IP地址
             remote_port: 远程目标端口
+            audio: 音频后端(rtp.audio_backend), 默认打开PyAudio的默认输入输出设备
+            keyboard_ptt: 是否监听空格键作为PTT; 为False时由调用方设置is_recording
         """
         # RTP协议配置常量
         self.RTP_VERSION = 2
@@ -39,103 +41,54 @@ class RtpEndpoint:
         self.sample_width = 2
 
         # 初始化音频设备
-        self.audio = pyaudio.PyAudio()
-        # 音频输入流(麦克风)
-        self.input_stream = self.audio.open(
-            format=pyaudio.paInt16,
-            channels=self.channels,
-            rate=self.sample_rate,
-            input=True,
-            input_device_index=self.audio.get_default_input_device_info()['index'],
-            frames_per_buffer=self.frame_size
-        )
-        # 音频输出流(扬声器)
-        self.output_stream = self.audio.open(
-            format=self.audio.get_format_from_width(self.sample_width),
-            channels=self.channels,
-            rate=self.sample_rate,
-            output=True,
-            frames_per_buffer=self.frame_size
-        )
+        self.audio = audio if audio is not None else PyAudioBackend(
+            self.sample_rate, self.channels, self.sample_width, frames_per_buffer=self.frame_size)
+        self.keyboard_ptt = keyboard_ptt
 
         # 初始化网络套接字
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.bind((self.local_ip, self.local_port))
+        try:
+            self.socket.bind((self.local_ip, self.local_port))
+        except OSError:
+            # 端口不可用时释放已打开的套接字和音频设备
+            self.socket.close()
+            self.audio.close()
+            raise
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
 
-        # RTP序列控制
-        self.sequence_number = 0
-        self.timestamp = 0
+        # RTP打包器: 预分配的数据包缓冲区, 维护序列号和时间戳; 静音帧编码一次后缓存
+        self.packetizer = RtpPacketizer(self.RTP_PAYLOAD_TYPE, self.frame_size, self.frame_size, self.RTP_SSRC,
+                                        g711.lin2alaw(bytes(self.frame_size * self.sample_width)))
 
-        # 抖动缓冲区
-        self.buffer_size = int(self.sample_rate * 0.05 / self.frame_size)
-        self.jitter_buffer = deque(maxlen=self.buffer_size)
+        # 抖动缓冲区: 按序列号排序, 播放延时随网络抖动在20~200ms之间调整
+        self.jitter_buffer = JitterBuffer(frame_samples=self.frame_size, clock_rate=self.sample_rate,
+                                          min_delay=1, max_delay=10, sample_width=self.sample_width)
 
         # 线程控制标志
         self.is_running = False
         # 录音控制标志
         self.is_recording = False
 
-    def create_rtp_header(self, marker_bit):
-        """创建RTP协议头部
-
-        Args:
-            marker_bit: 标记位，1表示有语音活动
-
-        Returns:
-            bytes: 12字节的RTP头部数据
-        """
-        # 版本号(2bit)+填充位(1bit)+扩展位(1bit)+CSRC计数(4bit)
-        version_p_pt = (self.RTP_VERSION << 6) | (0 << 5) | (self.RTP_PAYLOAD_TYPE & 0x7F)
-        marker = (marker_bit << 7)
-
-        return bytes([
-            version_p_pt,  # 第一个字节
-            marker | (self.RTP_PAYLOAD_TYPE & 0x7F),  # 第二个字节
-            (self.sequence_number >> 8) & 0xFF,  # 序列号高8位
-            self.sequence_number & 0xFF,  # 序列号低8位
-            (self.timestamp >> 24) & 0xFF,  # 时间戳最高字节
-            (self.timestamp >> 16) & 0xFF,
-            (self.timestamp >> 8) & 0xFF,
-            self.timestamp & 0xFF,  # 时间戳最低字节
-            (self.RTP_SSRC >> 24) & 0xFF,  # SSRC标识符最高字节
-            (self.RTP_SSRC >> 16) & 0xFF,
-            (self.RTP_SSRC >> 8) & 0xFF,
-            self.RTP_SSRC & 0xFF  # SSRC标识符最低字节
-        ])
-
     def send_audio(self):
         """音频发送线程函数，每20ms发送一帧"""
         next_send_time = time.perf_counter() + (self.frame_duration / 1000)
-        silence_pcm = bytes([0] * self.frame_size * 2)
+        remote_addr = (self.remote_ip, self.remote_port)
 
         while self.is_running:
             # 从麦克风读取音频数据
-            pcm_data = self.input_stream.read(
-                self.frame_size,
-                exception_on_overflow=False
-            )
+            pcm_data = self.audio.read(self.frame_size)
 
             if self.is_recording:
                 # 计算RMS值检测语音活动
-                rms_value = audioop.rms(pcm_data, 2)
+                rms_value = g711.rms(pcm_data)
                 has_voice = 1 if rms_value > self.voice_threshold else 0
-                # PCM转G.711 A-law
-                alaw_data = audioop.lin2alaw(pcm_data, 2)
+                # PCM转G.711 A-law, 写入数据包缓冲区
+                packet = self.packetizer.packet(g711.lin2alaw(pcm_data), has_voice)
             else:
-                has_voice = 0
-                alaw_data = audioop.lin2alaw(silence_pcm, 2)
-
-            # 构造RTP数据包
-            header = self.create_rtp_header(has_voice)
-            packet = header + alaw_data
-
-            # 发送到对端
-            self.socket.sendto(packet, (self.remote_ip, self.remote_port))
+                packet = self.packetizer.silence_packet()
 
-            # 更新序列号和时间戳
-            self.sequence_number = (self.sequence_number + 1) & 0xFFFF
-            self.timestamp = (self.timestamp + self.frame_size) & 0xFFFFFFFF
+            # 发送到对端(序列号和时间戳已由打包器推进)
+            self.socket.sendto(packet, remote_addr)
 
             # 精确控制发送间隔
             current_time = time.perf_counter()
@@ -145,40 +98,58 @@ class RtpEndpoint:
             next_send_time += (self.frame_duration / 1000)
 
     def receive_audio(self):
-        """音频接收处理函数"""
+        """
+        音频接收线程函数: 收包放入抖动缓冲区, 并在同一线程中每20ms取一帧播放, 缺失的帧由丢包隐藏补齐
+
+        收包最多等待到下一个播放节拍, 没有数据包到达时播放也不会停顿
+        """
+        frame_interval = self.frame_duration / 1000
+        next_play_time = time.perf_counter() + frame_interval
         while self.is_running:
+            timeout = next_play_time - time.perf_counter()
+            if timeout <= 0:
+                audio_frame = self.jitter_buffer.get()
+                if audio_frame is not None:
+                    self.audio.write(audio_frame)
+                next_play_time += frame_interval
+                continue
+
             # 接收RTP数据包
-            packet, _ = self.socket.recvfrom(2048)
+            try:
+                self.socket.settimeout(timeout)
+                packet, _ = self.socket.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                # stop()已关闭套接字
+                break
 
             # 验证数据包长度
-            if len(packet) < 12 + self.frame_size:
+            if len(packet) < RTP_HEADER.size + self.frame_size:
                 continue
 
             # 解析RTP头部
-            header = packet[:12]
-            version = (header[0] >> 6) & 0x03
-            payload_type = header[1] & 0x7F
-            marker = (header[1] >> 7) & 0x01
+            first, second, sequence_number, timestamp, _ = RTP_HEADER.unpack_from(packet)
+            version = first >> 6
+            payload_type = second & 0x7F
+            marker = second >> 7
 
             # 验证协议版本和负载类型
             if version != self.RTP_VERSION or payload_type != self.RTP_PAYLOAD_TYPE:
                 continue
 
-            # 提取并转换音频数据
-            alaw_data = packet[12:12 + self.frame_size]
-            pcm_data = audioop.alaw2lin(alaw_data, 2)
-
-            # 加入抖动缓冲区
-            self.jitter_buffer.append((pcm_data, marker))
-
-            # 从缓冲区取出数据播放
-            if len(self.jitter_buffer) >= self.buffer_size:
-                audio_frame, marker_status = self.jitter_buffer.popleft()
-                self.output_stream.write(audio_frame)
-                # print(f"收到数据包 - 标记位: {marker_status}", end='\r')
+            # 提取并转换音频数据, 按序列号放入抖动缓冲区, 到播放节拍时取出
+            alaw_data = packet[RTP_HEADER.size:RTP_HEADER.size + self.frame_size]
+            pcm_data = g711.alaw2lin(alaw_data)
+            self.jitter_buffer.put(sequence_number, timestamp, pcm_data, marker)
 
     def keyboard_listener(self):
         """键盘监听"""
+        try:
+            import keyboard
+        except ImportError as e:
+            print(f"键盘监听不可用, PTT保持关闭: {e}")
+            return
         while self.is_running:
             if keyboard.is_pressed('space'):
                 self.is_recording = True
@@ -190,14 +161,15 @@ class RtpEndpoint:
         """启动RTP端点"""
         self.is_running = True
         # 启动按键监听线程
-        keyboard_thread = threading.Thread(target=self.keyboard_listener)
-        keyboard_thread.daemon = True  # 将该线程设置为"守护线程"
-        keyboard_thread.start()
+        if self.keyboard_ptt:
+            keyboard_thread = threading.Thread(target=self.keyboard_listener)
+            keyboard_thread.daemon = True  # 将该线程设置为"守护线程"
+            keyboard_thread.start()
         # 启动发送线程
         sender_thread = threading.Thread(target=self.send_audio)
         sender_thread.daemon = True
         sender_thread.start()
-        # 启动接收线程
+        # 启动接收(兼播放)线程
         receiver_thread = threading.Thread(target=self.receive_audio)
         receiver_thread.daemon = True
         receiver_thread.start()
@@ -205,11 +177,12 @@ class RtpEndpoint:
     def stop(self):
         """停止并释放资源"""
         self.is_running = False
-        self.input_stream.stop_stream()  # 停止音频输入流（如麦克风）
-        self.input_stream.close()  # 释放输入流资源
-        self.output_stream.stop_stream()  # 停止音频输出流（如扬声器）
-        self.output_stream.close()  # 释放输出流资源
-        self.audio.terminate()  # 销毁音频接口（如PyAudio实例）
+        self.audio.close()  # 释放音频设备
+        try:
+            # 唤醒阻塞在recvfrom的接收线程, 否则端口在线程退出前不会释放
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
         self.socket.close()  # 关闭RTP/UDP套接字
         print("\nRTP端点已停止")
 
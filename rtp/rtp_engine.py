@@ -0,0 +1,273 @@
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+from rtp import g711
+from rtp.audio_backend import NullBackend
+from rtp.jitter_buffer import JitterBuffer
+from rtp.packetizer import RtpPacketizer, RTP_HEADER, RTP_VERSION
+
+BATCH_MIN = 4  # 同一节拍内讲话的流不少于该数时用NumPy一次完成编码和语音检测
+
+
+class RtpStream:
+    """
+    RtpEngine中的一路RTP流, 接口与RtpEndpoint相同(start/stop/is_recording/jitter_buffer/audio),
+    但不创建线程: 收包、发包和播放都在引擎的线程中完成
+    """
+
+    def __init__(self, engine, local_ip, local_port, remote_ip, remote_port, audio=None):
+        self.engine = engine
+        self.local_ip = local_ip
+        self.local_port = local_port
+        self.remote_ip = remote_ip
+        self.remote_port = remote_port
+        self.remote_addr = (remote_ip, remote_port)
+        self.audio = audio if audio is not None else NullBackend(engine.sample_rate)
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.socket.bind((local_ip, local_port))
+        except OSError:
+            # 端口不可用时释放已打开的套接字和音频后端
+            self.socket.close()
+            self.audio.close()
+            raise
+        self.socket.setblocking(False)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+
+        frame_size = engine.frame_size
+        self.packetizer = RtpPacketizer(engine.payload_type, frame_size, frame_size,
+                                        silence_payload=g711.lin2alaw(bytes(frame_size * 2)))
+        self.jitter_buffer = JitterBuffer(frame_samples=frame_size, clock_rate=engine.sample_rate,
+                                          min_delay=1, max_delay=10)
+        self.stats = {'sent': 0, 'send_errors': 0}
+        self.is_running = False
+        # 录音控制标志, 由调用方设置
+        self.is_recording = False
+
+    def start(self):
+        """加入引擎的媒体时钟"""
+        self.is_running = True
+        self.engine.add(self)
+
+    def stop(self):
+        """移出引擎并释放套接字和音频后端"""
+        self.is_running = False
+        self.engine.remove(self)
+
+    def send(self, packet):
+        try:
+            self.socket.sendto(packet, self.remote_addr)
+            self.stats['sent'] += 1
+        except OSError:
+            # 发送缓冲区满或对端不可达, 丢弃该帧
+            self.stats['send_errors'] += 1
+
+    def receive(self, buffer, view):
+        """读出一个数据包, 解码后放入抖动缓冲区; 还有数据包时selector会再次报告可读, 不必读到EAGAIN"""
+        engine = self.engine
+        packet_size = RTP_HEADER.size + engine.frame_size
+        try:
+            size = self.socket.recv_into(buffer)
+        except OSError:
+            # 无数据可读、ICMP端口不可达或套接字已关闭
+            return
+        if size < packet_size:
+            return
+        first, second, sequence_number, timestamp, _ = RTP_HEADER.unpack_from(buffer)
+        if first >> 6 != RTP_VERSION or second & 0x7F != engine.payload_type:
+            return
+        pcm_data = g711.alaw2lin(view[RTP_HEADER.size:packet_size])
+        self.jitter_buffer.put(sequence_number, timestamp, pcm_data, second >> 7)
+
+    def close(self):
+        self.socket.close()
+        self.audio.close()
+
+
+class RtpEngine:
+    """
+    单线程多路RTP引擎: 一个selector等待所有流的套接字可读, 共享一个20ms媒体时钟;
+    每个节拍依次为所有流发送一帧(讲话的流用NumPy批量编码和语音检测)并从各自的抖动缓冲区播放一帧
+
+    流的加入和移出可以在其他线程中调用, 由引擎线程执行; 节拍落后超过max_catchup帧时放弃补发, 从当前时间重新计时
+    """
+
+    def __init__(self, frame_duration=0.02, sample_rate=8000, payload_type=8, voice_threshold=300, max_catchup=5):
+        self.frame_duration = frame_duration
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_duration)
+        self.payload_type = payload_type  # G.711 PCMA
+        self.voice_threshold = voice_threshold  # 语音活动检测阈值
+        self.max_catchup = max_catchup
+        self.streams = []
+        self.selector = selectors.DefaultSelector()
+        # 其他线程通过commands提交加入/移出操作, 并写wakeup唤醒select
+        self.commands = deque()
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ)
+        self.buffer = bytearray(2048)  # 收包缓冲区, 所有流共用
+        self.view = memoryview(self.buffer)
+        self.stats = {'ticks': 0, 'late': 0, 'skipped': 0, 'max_lateness': 0.0}
+        self.lateness = deque(maxlen=1000)  # 最近的节拍相对计划时间的延迟(秒)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.is_running = False
+
+    def open_stream(self, local_ip, local_port, remote_ip, remote_port, audio=None) -> RtpStream:
+        """
+        创建一路流(绑定本地端口), start后开始收发; 端口不可用时抛出OSError
+
+        所有流的音频在引擎线程中读写, 阻塞的后端(声卡)会拖慢所有流的节拍, 传入时抛出ValueError
+        """
+        if audio is not None and audio.blocking:
+            audio.close()
+            raise ValueError(f"{type(audio).__name__}的读写会阻塞, 不能用于RtpEngine")
+        return RtpStream(self, local_ip, local_port, remote_ip, remote_port, audio)
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.is_running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """停止引擎线程并关闭所有流; 在引擎线程中调用时不等待, 由引擎线程退出循环后关闭"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+            self.is_running = False
+        if thread is threading.current_thread():
+            return
+        if thread is not None:
+            self._wakeup()
+            thread.join()
+        self._close_streams()
+
+    def _close_streams(self):
+        self._run_commands()
+        for stream in self.streams:
+            self.selector.unregister(stream.socket)
+            stream.close()
+        self.streams = []
+
+    def add(self, stream):
+        self._submit(self._add, stream)
+        self.start()
+
+    def remove(self, stream):
+        """移出并关闭流; 在引擎线程以外调用时等待完成, 返回后端口可以立即重新绑定"""
+        self._submit(self._remove, stream)
+
+    def _submit(self, command, stream):
+        if threading.current_thread() is self.thread:
+            command(stream)
+            return
+        done = threading.Event()
+        self.commands.append((command, stream, done))
+        self._wakeup()
+        with self.lock:
+            running = self.thread is not None
+        if running:
+            done.wait()
+        else:
+            self._run_commands()
+
+    def _wakeup(self):
+        try:
+            self.wakeup_send.send(b'\0')
+        except BlockingIOError:
+            pass
+
+    def _run_commands(self):
+        while self.commands:
+            try:
+                command, stream, done = self.commands.popleft()
+            except IndexError:
+                return
+            command(stream)
+            done.set()
+
+    def _add(self, stream):
+        if stream not in self.streams:
+            self.streams.append(stream)
+            self.selector.register(stream.socket, selectors.EVENT_READ, stream)
+
+    def _remove(self, stream):
+        if stream in self.streams:
+            self.streams.remove(stream)
+            self.selector.unregister(stream.socket)
+        stream.close()
+
+    def _run(self):
+        next_tick = time.perf_counter() + self.frame_duration
+        while self.is_running:
+            woken = False
+            # 没有流时不需要节拍, 阻塞到加入流或停止时唤醒
+            timeout = max(0.0, next_tick - time.perf_counter()) if self.streams else None
+            for key, _ in self.selector.select(timeout):
+                if key.data is None:
+                    woken = True
+                else:
+                    key.data.receive(self.buffer, self.view)
+            if woken:
+                # 处理完本轮事件后再加入/移出流, 避免对已关闭的套接字收包
+                try:
+                    while self.wakeup_recv.recv(4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                self._run_commands()
+            now = time.perf_counter()
+            if not self.streams:
+                # 空闲期间不计节拍, 加入流后从下一帧开始
+                next_tick = now + self.frame_duration
+                continue
+            if now < next_tick:
+                continue
+            lateness = now - next_tick
+            self.lateness.append(lateness)
+            self.stats['ticks'] += 1
+            self.stats['max_lateness'] = max(self.stats['max_lateness'], lateness)
+            if lateness >= self.frame_duration:
+                self.stats['late'] += 1
+            if lateness > self.max_catchup * self.frame_duration:
+                # 落后太多(进程被挂起等), 丢弃积压的节拍
+                self.stats['skipped'] += int(lateness / self.frame_duration)
+                next_tick = now
+            self._tick()
+            next_tick += self.frame_duration
+        self._close_streams()
+
+    def _tick(self):
+        """一个媒体节拍: 所有流各发送一帧、播放一帧"""
+        recording = []
+        for stream in self.streams:
+            if stream.is_recording:
+                recording.append(stream)
+            else:
+                stream.send(stream.packetizer.silence_packet())
+        if recording:
+            self._send_voice(recording)
+        for stream in self.streams:
+            audio_frame = stream.jitter_buffer.get()
+            if audio_frame is not None:
+                stream.audio.write(audio_frame)
+
+    def _send_voice(self, streams):
+        frames = [stream.audio.read(self.frame_size) for stream in streams]
+        if g711.numpy is not None and len(streams) >= BATCH_MIN:
+            samples = g711.numpy.frombuffer(b''.join(frames), dtype=g711.numpy.int16).reshape(len(streams), -1)
+            voiced = g711.voice_activity(samples, self.voice_threshold).tolist()
+            codes = g711.lin2alaw_array(samples)
+            for index, stream in enumerate(streams):
+                stream.send(stream.packetizer.packet(codes[index], int(voiced[index])))
+            return
+        for stream, pcm_data in zip(streams, frames):
+            has_voice = 1 if g711.rms(pcm_data) > self.voice_threshold else 0
+            stream.send(stream.packetizer.packet(g711.lin2alaw(pcm_data), has_voice))
@@ -1,13 +1,33 @@
 from sip.sip_server import SIPServer
+from sip.sip_async_server import run_async_server
+from sip.server_supervisor import ServerSupervisor
+import argparse
 import json
 import threading
 import time
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SIP服务端')
+    parser.add_argument('--mode', choices=['thread', 'async'], default='thread',
+                        help='thread: 单线程阻塞收发(仅回复配置的客户端); async: asyncio多席位模式')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='大于0时启动多个工作进程, 以SO_REUSEPORT共享SIP端口(默认使用async模式)')
+    parser.add_argument('--transport', choices=['udp', 'tcp'], default=None,
+                        help='tcp: 在同一端口同时监听UDP和TCP(使用async模式), 默认取配置文件server.transport')
+    parser.add_argument('--audio', choices=['pyaudio', 'null'], default=None,
+                        help='媒体端点的音频后端, null: 不使用声卡(无界面运行), 默认取配置文件server.audio_backend, '
+                             '未配置时为pyaudio(--rtp-engine时为null, 引擎不支持声卡)')
+    parser.add_argument('--rtp-engine', action='store_true', default=None,
+                        help='所有呼叫的媒体流由一个单线程RTP引擎收发, 默认取配置文件server.rtp_engine')
+    parser.add_argument('--debug', action='store_true', help='打印收到的每条报文')
+    args = parser.parse_args()
+
     with open('./config/comm_config.json', 'r') as file:
         config = json.load(file)
+    transport = args.transport or config['server'].get('transport', 'udp')
+    tcp = transport == 'tcp'
 
-    sip_server = SIPServer(
+    server_kwargs = dict(
         user='bxp',
         local_ip=config['server']['ip'],
         local_port=config['server']['port'],
@@ -15,18 +35,39 @@ if __name__ == '__main__':
         remote_port=config['client']['port'],
         local_rtp_port=config['server']['rtp_port'],
         remote_rtp_port=config['client']['rtp_port'],
+        audio_backend=args.audio or config['server'].get('audio_backend'),
+        rtp_engine=args.rtp_engine or config['server'].get('rtp_engine', False),
+        debug=args.debug,
     )
 
-    # 启动服务端的消息接收线程
-    server_thread = threading.Thread(target=sip_server.receive_message)
-    server_thread.daemon = True
-    server_thread.start()
-
-    # 保持程序运行
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("Shutting down...")
+    if args.workers > 0:
+        # 多进程模式: 监控进程负责拉起和重启工作进程
+        mode = 'async' if args.mode == 'thread' else args.mode
+        supervisor = ServerSupervisor(args.workers, server_kwargs, mode=mode, tcp=tcp)
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            print("Shutting down...")
+    else:
+        sip_server = SIPServer(**server_kwargs)
 
+        if args.mode == 'async' or tcp:
+            # asyncio模式: 按来源地址回复, 一个进程服务多个席位
+            try:
+                run_async_server(sip_server, tcp)
+            except KeyboardInterrupt:
+                print("Shutting down...")
+                print(sip_server.handlers.report())
+        else:
+            # 启动服务端的消息接收线程
+            server_thread = threading.Thread(target=sip_server.receive_message)
+            server_thread.daemon = True
+            server_thread.start()
 
+            # 保持程序运行
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                print("Shutting down...")
+                print(sip_server.handlers.report())
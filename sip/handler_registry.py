@@ -0,0 +1,67 @@
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class HandlerStats:
+    calls: int = 0  # 调用次数
+    total_time: float = 0.0  # 累计耗时(秒)
+    max_time: float = 0.0  # 单次最大耗时(秒)
+
+
+class HandlerRegistry:
+    """
+    报文处理函数注册表, 以 (请求方法, Subject, Refer-To中的method) 为键, 一次字典查找完成分发
+
+    方法为None的注册项匹配任意方法, 用于只按Subject区分的vcu_*报文
+    """
+
+    def __init__(self):
+        self.handlers = {}  # {(method, subject, refer_method): handler}
+        self.stats = {}  # {(method, subject, refer_method): HandlerStats}
+
+    def register(self, handler, subject, method=None, refer_method=None):
+        """注册处理函数"""
+        key = (method.upper() if method else None, subject, refer_method)
+        self.handlers[key] = handler
+        self.stats[key] = HandlerStats()
+
+    def resolve(self, recv_params):
+        """查找报文对应的注册键和处理函数, 未注册时返回 (None, None)"""
+        method = recv_params.message_type.upper() if recv_params.message_type else None
+        refer_method = getattr(recv_params, 'method', None)
+        key = (method, recv_params.subject, refer_method)
+        handler = self.handlers.get(key)
+        if handler is None:
+            key = (None, recv_params.subject, None)
+            handler = self.handlers.get(key)
+        return (key, handler) if handler is not None else (None, None)
+
+    def dispatch(self, recv_params):
+        """分发报文并记录耗时, 返回是否找到处理函数"""
+        key, handler = self.resolve(recv_params)
+        if handler is None:
+            return False
+        start = time.perf_counter()
+        try:
+            handler(recv_params)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self.stats[key]
+            stats.calls += 1
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+        return True
+
+    def report(self):
+        """按累计耗时从高到低格式化统计信息"""
+        lines = [f"{'method':<10}{'subject':<20}{'refer':<8}{'calls':>10}{'total(ms)':>12}{'avg(us)':>10}{'max(us)':>10}"]
+        ranked = sorted(self.stats.items(), key=lambda item: item[1].total_time, reverse=True)
+        for (method, subject, refer_method), stats in ranked:
+            avg = stats.total_time / stats.calls * 1e6 if stats.calls else 0.0
+            lines.append(
+                f"{method or '*':<10}{subject:<20}{refer_method or '-':<8}{stats.calls:>10}"
+                f"{stats.total_time * 1e3:>12.3f}{avg:>10.1f}{stats.max_time * 1e6:>10.1f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,111 @@
+import multiprocessing
+import signal
+import socket
+import time
+
+
+def _worker_main(index, server_kwargs, mode, tcp=False):
+    """工作进程入口: 以SO_REUSEPORT绑定同一SIP端口后运行服务端"""
+    # 延迟导入, 保证spawn启动方式下子进程自行初始化
+    from sip.sip_server import SIPServer
+    from sip.sip_async_server import run_async_server
+
+    # fork方式会继承监控进程的SIGTERM处理函数, 恢复默认行为
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    kwargs = dict(server_kwargs)
+    # 每个工作进程使用互不重叠的RTP端口段, 避免媒体端口冲突
+    rtp_port_count = kwargs.setdefault('rtp_port_count', 100)
+    kwargs['local_rtp_port'] = kwargs['local_rtp_port'] + index * rtp_port_count * 2
+    server = SIPServer(reuse_port=True, **kwargs)
+    print(f"SIP worker {index} started (pid {multiprocessing.current_process().pid})")
+    try:
+        if mode == 'async':
+            run_async_server(server, tcp)
+        else:
+            server.receive_message()
+    except KeyboardInterrupt:
+        pass
+
+
+class ServerSupervisor:
+    """
+    多进程SIP服务端: 启动N个工作进程共享同一SIP端口, 内核按四元组哈希分流,
+    同一席位的报文始终落在同一工作进程, 对端状态无需跨进程同步
+
+    工作进程异常退出后由监控循环重新拉起, 连续崩溃时按指数退避延迟重启
+    """
+
+    def __init__(self, workers, server_kwargs, mode='async', restart_delay=1.0, max_restart_delay=30.0, tcp=False):
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            raise RuntimeError("当前平台不支持SO_REUSEPORT, 无法启用多进程模式")
+        self.workers = workers
+        self.server_kwargs = server_kwargs
+        self.mode = mode
+        self.tcp = tcp  # 同时监听TCP(仅async模式)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.processes = [None] * workers
+        self.restart_counts = [0] * workers
+        self.next_start = [0.0] * workers  # 各工作进程允许重启的最早时间
+        self.started_at = [0.0] * workers
+        self.stable_time = 60.0  # 稳定运行超过该时长后清零崩溃计数
+        self.is_running = False
+
+    def _spawn(self, index):
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(index, self.server_kwargs, self.mode, self.tcp),
+            name=f"sip-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[index] = process
+        self.started_at[index] = time.monotonic()
+        return process
+
+    def start(self):
+        """启动全部工作进程"""
+        self.is_running = True
+        for index in range(self.workers):
+            self._spawn(index)
+
+    def check_workers(self):
+        """检查工作进程, 重启已退出的进程"""
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            if process is None:
+                continue
+            if process.is_alive():
+                if self.restart_counts[index] and now - self.started_at[index] > self.stable_time:
+                    self.restart_counts[index] = 0
+                continue
+            if self.next_start[index] == 0.0:
+                self.restart_counts[index] += 1
+                delay = min(self.restart_delay * 2 ** (self.restart_counts[index] - 1), self.max_restart_delay)
+                self.next_start[index] = now + delay
+                print(f"SIP worker {index} exited with code {process.exitcode}, restarting in {delay:.1f}s")
+            if now >= self.next_start[index]:
+                self.next_start[index] = 0.0
+                self._spawn(index)
+
+    def run(self, interval=0.5):
+        """启动并监控工作进程, 直到stop()、SIGTERM或KeyboardInterrupt"""
+        # 收到SIGTERM时退出监控循环并回收工作进程, 避免遗留孤儿进程占用端口
+        signal.signal(signal.SIGTERM, lambda signum, frame: setattr(self, 'is_running', False))
+        self.start()
+        try:
+            while self.is_running:
+                self.check_workers()
+                time.sleep(interval)
+        finally:
+            self.stop()
+
+    def stop(self):
+        """停止全部工作进程"""
+        self.is_running = False
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.join()
@@ -0,0 +1,96 @@
+import asyncio
+
+from sip.tcp_transport import SipStreamFramer
+
+
+class SIPServerProtocol(asyncio.DatagramProtocol):
+    """基于asyncio的SIP服务端数据报协议, 一个进程同时服务多个席位"""
+
+    def __init__(self, sip_server):
+        self.sip_server = sip_server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.sip_server._transport = transport
+        self.sip_server._loop = asyncio.get_running_loop()
+
+    def datagram_received(self, data, addr):
+        """收到报文后直接在事件循环中处理, 并回复报文来源地址"""
+        try:
+            self.sip_server._handle_message(data, addr)
+        except Exception as e:
+            print(f"处理来自 {addr} 的消息出错: {e}")
+
+    def error_received(self, exc):
+        print(f"UDP传输错误: {exc}")
+
+    def connection_lost(self, exc):
+        self.sip_server._transport = None
+        self.sip_server._loop = None
+
+
+class SIPServerStreamProtocol(asyncio.Protocol):
+    """SIP over TCP: 每条连接一个实例, 按Content-Length分帧后交给服务端处理, 应答沿同一连接返回"""
+
+    def __init__(self, sip_server):
+        self.sip_server = sip_server
+        self.transport = None
+        self.addr = None
+        self.framer = SipStreamFramer()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.addr = transport.get_extra_info('peername')[:2]
+        self.sip_server._get_peer(self.addr).connection = transport
+
+    def data_received(self, data):
+        try:
+            messages = self.framer.feed(data)
+        except ValueError as e:
+            # 分帧失败后字节流无法再对齐, 断开连接由客户端重连
+            print(f"来自 {self.addr} 的TCP报文分帧出错: {e}")
+            self.transport.close()
+            return
+        for message in messages:
+            try:
+                self.sip_server._handle_message(message, self.addr)
+            except Exception as e:
+                print(f"处理来自 {self.addr} 的消息出错: {e}")
+
+    def connection_lost(self, exc):
+        # TCP对端以连接区分, 重连后使用新的源端口, 旧记录不再有用
+        peer = self.sip_server.peers.get(self.addr)
+        if peer is not None and peer.connection is self.transport:
+            del self.sip_server.peers[self.addr]
+            self.sip_server.notify_transactions.pop(self.addr, None)
+
+
+async def serve_async(sip_server, tcp=False):
+    """在已绑定的SIP套接字上运行asyncio服务端, tcp为True时同时在同一端口监听TCP, 直到被取消"""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: SIPServerProtocol(sip_server),
+        sock=sip_server.socket,
+    )
+    tcp_server = None
+    if tcp:
+        tcp_server = await loop.create_server(
+            lambda: SIPServerStreamProtocol(sip_server),
+            sip_server.local_ip,
+            sip_server.local_port,
+            reuse_port=sip_server.reuse_port or None,
+        )
+    transports = "UDP+TCP" if tcp else "UDP"
+    print(f"SIP Server (asyncio, {transports}) serving on {sip_server.local_ip}:{sip_server.local_port}")
+    try:
+        await loop.create_future()
+    finally:
+        if tcp_server is not None:
+            tcp_server.close()
+        transport.close()
+
+
+def run_async_server(sip_server, tcp=False):
+    """阻塞运行asyncio服务端"""
+    asyncio.run(serve_async(sip_server, tcp))
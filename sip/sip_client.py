@@ -1,22 +1,29 @@
 from message_generator.message_generator import MessageGenerator
 from data_classes.params_classes import BaseMessageParams, RegisterParams, InfoParams, ReferParams
 import socket
+import threading
 import time
 import base64
 from message_decoder.role_info_decoder import RoleInfo
 from message_decoder.tel_btn_info_decoder import TelBtnInfo
 from message_decoder.freq_btn_info_decoder import FreqBtnInfo
 from message_decoder.radio_btn_info_decoder import RadioInfo
-from message_decoder.header_decoder import parse_sip_message
-from utils.utils import check_final_message
-from data_classes.comm_classes import Radio
-from collections import deque
+from message_decoder.fun_btn_info_decoder import MyFunBtnInfo
+from message_decoder.sip_message_view import SipMessageView
+from message_decoder.table_array import parse_table_data
+from sip.tcp_transport import TcpConnection
+from sip.table_cache import TableCache
+from sip.transaction import TransactionLayer, FAILED
+from data_classes.radio_directory import RadioDirectory
 from rtp.rtp_endpoint import RtpEndpoint
+from rtp.audio_backend import create_backend
 import re
+from contextlib import contextmanager
 
 
 class SIPClient:
-    def __init__(self, user, local_ip, local_port, remote_ip, remote_port, local_rtp_port, remote_rtp_port):
+    def __init__(self, user, local_ip, local_port, remote_ip, remote_port, local_rtp_port, remote_rtp_port,
+                 transport="udp", table_cache_dir=None, window=1, audio_backend='pyaudio'):
         # 席位
         self.user = user
         self.password = self._base64_encode(user)
@@ -39,37 +46,46 @@ class SIPClient:
         self.channel_list = []  # 通道列表
         self.role_list = []  # 角色列表
         self.frequency_list = []  # 频率列表
-        self.radio_dict = {}  # 电台列表
+        self.frequency_positions = {}  # {按钮位置: frequency_list中的下标}, NOTIFY按位置更新频率
+        self.radios = RadioDirectory()  # 电台目录, 含选中的发送/接收电台
+        self.table_versions = {}  # {请求主题: 服务器上的表格版本}
+        self.table_data = {}  # {请求主题: {分片CSeq: 分片的原始记录数据}}, 用于写入本地缓存
+        # 表格本地缓存, 重连时版本未变的表格不再重新获取
+        self.table_cache = TableCache(table_cache_dir) if table_cache_dir else None
 
         # 当前状态
         self.status = "offline"  # 状态: "online", "offline", "busy"
         self.selected_role = None
-        self.send_radio = []
-        self.recv_radio = []
-        # 加入检索电台是发送还是接收、是否可用的逻辑
 
         # 控制报文收发时序逻辑
-        self.send_history = deque(maxlen=100)  # 消息历史记录
-        self.latest_cseq = -1  # 最新发送报文的Cseq
-
-        # 超时重传逻辑
-        self.retry_timeout = 5  # 重传超时时间
-        self.max_retries = 3  # 最大重传次数
+        self.latest_cseq = -1  # 最近完成的事务的Cseq
 
         # PTT状态
         self.ptt = False
 
         # 消息生成器和RTP客户端
-        self.message_generator = MessageGenerator()
+        self.transport = transport.lower()
+        self.message_generator = MessageGenerator(transport=self.transport.upper())
         self.local_rtp_port = local_rtp_port
+        self.remote_rtp_port = remote_rtp_port  # 对端媒体端口, 以INVITE应答的SDP为准
         self.rtp_endpoint = None
+        self.audio_backend = audio_backend  # 媒体端点的音频后端(rtp.audio_backend)
 
-        # 创建UDP套接字
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.bind((self.local_ip, self.local_port))
-        print(f"SIP Client initialized on {self.local_ip}:{self.local_port}")
+        if self.transport == "tcp":
+            # 所有报文复用同一条TCP连接, 大的表格应答不再被IP分片
+            self.socket = None
+            self.connection = TcpConnection((self.remote_ip, self.remote_port), (self.local_ip, self.local_port))
+        else:
+            # 创建UDP套接字
+            self.connection = None
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.bind((self.local_ip, self.local_port))
+        # 事务层: 请求发出后等待最终应答, 按RFC 3261的定时器重传和超时; window为流水线模式下同时在途的请求数
+        self.transactions = TransactionLayer(self._send_bytes, window=window, reliable=self.transport == "tcp")
+        self._local = threading.local()  # 当前线程是否处于流水线模式
+        print(f"SIP Client initialized on {self.local_ip}:{self.local_port} ({self.transport.upper()})")
 
-        self.is_switch_radio = False
+        self.switching_radio = False  # 切换电台过程中, 退出原电台用REFER(BYE)
 
     def _cseq_increment(self):
         """递增CSeq序号"""
@@ -86,22 +102,39 @@ class SIPClient:
         return encoded_bytes.decode('utf-8')
 
     def _send_message(self, params):
-        """发送SIP消息(带时序控制)"""
-        message = self.message_generator.generate_message(params)
+        """发送SIP消息(带时序控制), 返回事务句柄, ACK不建立事务返回None"""
+        message = self.message_generator.generate_message_bytes(params)
         # 待修改，将ACK类型的报文改为特殊回复
-        # 记录发送历史
         if params.message_type == 'ACK':
-            self.socket.sendto(message.encode(), (self.remote_ip, self.remote_port))
-        elif len(self.send_history) == 0:
-            send_time = time.time()
-            retry_count = 0
-            self.send_history.append((params, message, send_time, retry_count))
-            self.socket.sendto(message.encode(), (self.remote_ip, self.remote_port))
-
-    def _wait_response(self):
-        while len(self.send_history) > 0:
-            pass
-        return
+            self._send_bytes(message)
+            return None
+        return self.transactions.begin(params, message)
+
+    def _send_bytes(self, message):
+        """按所用传输方式发送已编码的报文"""
+        if self.connection is not None:
+            self.connection.send(message)
+        else:
+            self.socket.sendto(message, (self.remote_ip, self.remote_port))
+
+    def _wait_response(self, timeout=None):
+        """阻塞等待在途请求全部完成, 流水线模式下不等待"""
+        if getattr(self._local, 'pipelining', False):
+            return True
+        return self.transactions.wait_idle(timeout)
+
+    @contextmanager
+    def pipeline(self):
+        """
+        流水线模式: with块中依次调用的请求不再等待前一个请求的应答, 最多window个同时在途, 应答按branch/CSeq
+        匹配; 退出时等待全部完成。块内的请求不能依赖其他块内请求的应答(如获取电台表依赖频率表)
+        """
+        self._local.pipelining = True
+        try:
+            yield self
+        finally:
+            self._local.pipelining = False
+        self._wait_response()
 
     def keep_alive(self):
         """心跳报文"""
@@ -122,7 +155,7 @@ class SIPClient:
             params.subject = "vcu_logout"
         else:
             params.subject = "vcu_login"
-        self._send_message(params)
+        return self._send_message(params)
 
     def register(self):
         """注册报文"""
@@ -142,7 +175,7 @@ class SIPClient:
             expires=5,
             cwp=self.user,
         )
-        self._send_message(params)
+        return self._send_message(params)
 
     def get_phone_btn(self):
         """获取通道列表"""
@@ -160,11 +193,12 @@ class SIPClient:
             subject="vcu_phone",
             roleid=self.selected_role if self.selected_role else None,
         )
-        self._send_message(params)
+        return self._send_message(params)
 
     def get_frequency_btn(self):
         """获取频率列表"""
         self._wait_response()
+        self.table_data['vcu_frequency'] = {}
         params = InfoParams(
             cseq=self._cseq_increment(),
             local_user=self.user,
@@ -178,11 +212,12 @@ class SIPClient:
             subject="vcu_frequency",
             roleid=self.selected_role if self.selected_role else None,
         )
-        self._send_message(params)
+        return self._send_message(params)
 
     def get_radio_btn(self):
         """获取电台列表"""
         self._wait_response()
+        self.table_data['vcu_radio'] = {}
         params = InfoParams(
             cseq=self._cseq_increment(),
             local_user=self.user,
@@ -198,7 +233,7 @@ class SIPClient:
             content_type="application/frequency",
             content="+".join(self.frequency_list),
         )
-        self._send_message(params)
+        return self._send_message(params)
 
     def get_function_btn(self):
         """获取功能列表"""
@@ -216,7 +251,7 @@ class SIPClient:
             subject="vcu_function",
             roleid=self.selected_role if self.selected_role else None,
         )
-        self._send_message(params)
+        return self._send_message(params)
 
     def get_all_frequency_btn(self):
         """获取所有频率"""
@@ -234,38 +269,121 @@ class SIPClient:
             subject="all_freq",
             roleid=self.selected_role if self.selected_role else None,
         )
-        self._send_message(params)
+        return self._send_message(params)
+
+    def get_table_version(self):
+        """查询服务器上各表格的版本"""
+        self._wait_response()
+        params = InfoParams(
+            cseq=self._cseq_increment(),
+            local_user=self.user,
+            local_ip=self.local_ip,
+            local_port=self.local_port,
+            server_user=self.user,
+            server_ip=self.server_ip,
+            server_port=self.server_port,
+            method_type="request",
+            message_type="INFO",
+            subject="vcu_version",
+            roleid=self.selected_role if self.selected_role else None,
+        )
+        return self._send_message(params)
+
+    def sync_tables(self, subjects=('vcu_frequency', 'vcu_radio')):
+        """
+        注册后同步表格: 一次版本查询确认本地缓存, 版本一致的表格直接从缓存加载, 其余表格重新获取并写回缓存
+
+        未配置缓存目录时依次获取全部表格; 频率表需在电台表之前同步(获取电台表时携带频率列表)
+        """
+        fetchers = {'vcu_frequency': self.get_frequency_btn, 'vcu_radio': self.get_radio_btn}
+        if self.table_cache is None:
+            for subject in subjects:
+                self._reset_table(subject)
+                fetchers[subject]().wait()
+            return
+        self.get_table_version().wait()
+        key = TableCache.cache_key(self.server_ip, self.server_port, self.user, self.selected_role)
+        cached = self.table_cache.load(key)
+        tables = {}
+        fetched = False
+        try:
+            for subject in subjects:
+                version = self.table_versions.get(subject)
+                data = cached.get(subject, version) if cached is not None and version is not None else None
+                self._reset_table(subject)
+                if data is not None:
+                    self._apply_table(subject, data)
+                    tables[subject] = (version, bytes(data))
+                else:
+                    # 获取失败的表格不写入缓存
+                    if not fetchers[subject]().wait():
+                        continue
+                    fetched = True
+                    if version is not None:
+                        fragments = self.table_data.get(subject, {})
+                        tables[subject] = (version, b''.join(fragments[cseq] for cseq in sorted(fragments)))
+        finally:
+            if cached is not None:
+                cached.close()
+        if fetched:
+            self.table_cache.save(key, tables)
+
+    def startup(self):
+        """
+        上线: 心跳和注册同时发出, 注册成功后电话、功能按键与频率/电台表同时获取, 返回是否注册成功
+
+        需要window不小于4, 否则各请求仍会部分排队
+        """
+        with self.pipeline():
+            self.keep_alive()
+            registered = self.register()
+        if not registered.ok():
+            return False
+        with self.pipeline():
+            self.get_phone_btn()
+            self.get_function_btn()
+            self.sync_tables()
+        return True
+
+    def subscribe(self, subject, expires=3600):
+        """订阅vcu_radio/vcu_frequency表格的变化, 之后服务端以NOTIFY推送变化的记录; expires为0时取消订阅"""
+        self._wait_response()
+        params = InfoParams(
+            cseq=self._cseq_increment(),
+            local_user=self.user,
+            local_ip=self.local_ip,
+            local_port=self.local_port,
+            server_user=self.user,
+            server_ip=self.server_ip,
+            server_port=self.server_port,
+            method_type="request",
+            message_type="SUBSCRIBE",
+            subject=subject,
+            expires=expires,
+            roleid=self.selected_role if self.selected_role else None,
+        )
+        return self._send_message(params)
+
+    def unsubscribe(self, subject):
+        """取消订阅"""
+        return self.subscribe(subject, expires=0)
 
     def is_switch_radio(self, channel):
-        need_switch = False
-        send_channel = self.send_radio[0] if len(self.send_radio) > 0 else None
-        recv_channel = self.recv_radio[0] if len(self.recv_radio) > 0 else None
-        # 检查发送频道频率是否不同
-        if send_channel and self.radio_dict[channel].freq != self.radio_dict[send_channel].freq:
-            need_switch = True
-        # 检查接收频道频率是否不同
-        if recv_channel and self.radio_dict[channel].freq != self.radio_dict[recv_channel].freq:
-            need_switch = True
-        if need_switch:
-            print('切换电台')
-            # 处理发送频道
-            if send_channel:
-                self.is_switch_radio = True
-                self.bye(send_channel)
-                self.is_switch_radio = False
-            # 处理接收频道
-            if recv_channel:
-                self.is_switch_radio = True
-                self.bye(recv_channel)
-                self.is_switch_radio = False
-            return True
-        else:
+        if not self.radios.needs_switch(channel):
             return False
+        print('切换电台')
+        # 依次退出当前的发送、接收通道
+        for current in (self.radios.send_channel, self.radios.recv_channel):
+            if current is not None:
+                self.switching_radio = True
+                self.bye(current)
+                self.switching_radio = False
+        return True
 
     def select_radio(self, channel):
         self._wait_response()
         # 首次选中电台
-        if len(self.send_radio) + len(self.recv_radio) == 0:
+        if self.radios.active_count == 0:
             params = BaseMessageParams(
                 cseq=self._cseq_increment(),
                 local_user=self.channel_list[2],
@@ -303,7 +421,7 @@ class SIPClient:
                 refer_to=True,
                 refered_by=True,
             )
-        self._send_message(params)
+        return self._send_message(params)
 
     def ack(self, send_params, recv_params):
         """发送ACK报文"""
@@ -323,13 +441,13 @@ class SIPClient:
             allow=self.allow,
             supported=self.supported,
         )
-        self._send_message(params)
+        return self._send_message(params)
 
     def bye(self, channel):
         """退出电台选中"""
         self._wait_response()
         # 切换电台或者退出非最后一个电台号
-        if self.is_switch_radio or len(self.send_radio) + len(self.recv_radio) > 1:
+        if self.switching_radio or self.radios.active_count > 1:
             params = ReferParams(
                 cseq=self._cseq_increment(),
                 local_user=self.channel_list[2],
@@ -360,7 +478,7 @@ class SIPClient:
                 subject="radio",
                 expires=5,
             )
-        self._send_message(params)
+        return self._send_message(params)
 
     def key_up(self):
         """PTT按下"""
@@ -374,87 +492,159 @@ class SIPClient:
             "s=Sip Call\r\n"
             f"c=IN IP4 {self.local_ip}\r\n"
             "t=0 0\r\n"
-            "m=audio 5200 RTP/AVP 8\r\n"
+            f"m=audio {self.local_rtp_port} RTP/AVP 8\r\n"
             "a=rtpmap:8 PCMA/8000\r\n"
             "a=sendrecv\r\n"
         )
 
-    def _check_timeout(self):
-        """检查超时"""
-        if len(self.send_history) > 0:
-            current_time = time.time()
-            params, message, send_time, retry_count = self.send_history[0]
-            if current_time - send_time > self.retry_timeout:
-                if retry_count < self.max_retries:
-                    self.socket.sendto(message.encode(), (self.remote_ip, self.remote_port))
-                    self.send_history[0] = (params, message, current_time, retry_count + 1)
-                    print(f"消息 (CSeq: {params.cseq}) 超时未确认，进行第 {retry_count + 1} 次重传")
-                else:
-                    print(f"消息 (CSeq: {params.cseq}) 已达到最大重试次数 {self.max_retries}，放弃重传")
-
     def receive_message(self):
         """接收消息并处理"""
         while True:
-            self._check_timeout()
-            data, addr = self.socket.recvfrom(10240)  # 缓冲区大小
-            message = data.decode('utf-8')
-            self._handle_message(message)
+            if self.connection is not None:
+                for data in self.connection.receive():
+                    self._handle_message(data)
+            else:
+                data, addr = self.socket.recvfrom(65535)  # UDP报文最大长度
+                self._handle_message(data)
 
-    def _handle_message(self, message):
+    def _handle_message(self, data):
         """处理收到的SIP消息"""
         handle_status = False
         try:
-            message_header, _, message_body = message.partition('\r\n\r\n')
-            recv_params = parse_sip_message(message_header)
+            recv_params = SipMessageView(data)
+            message_body = recv_params.content or ''
+            if recv_params.method_type == "request":
+                # 服务端主动发来的请求, 与本端的发送时序无关
+                self._handle_request(recv_params, message_body)
+                return
+            transaction = self.transactions.match(recv_params)
+            if transaction is None:
+                print(f"收到无对应请求的响应: {recv_params.status_code} CSeq: {recv_params.cseq}")
+                return
+            send_params = transaction.params
             if recv_params.status_code == 200:
-                if recv_params.subject in ['vcu_phone', 'vcu_frequency', 'vcu_radio']:
-                    handle_status = self._handle_btn_response(recv_params, message_body)
+                # 表格应答不带Subject, 按待回复请求的主题处理
+                subject = recv_params.subject or send_params.subject
+                if recv_params.message_type == 'subscribe':
+                    handle_status = send_params.cseq == recv_params.cseq
+                elif subject in ['vcu_phone', 'vcu_frequency', 'vcu_radio', 'vcu_function']:
+                    handle_status = self._handle_btn_response(send_params, recv_params, message_body)
                 else:
-                    handle_status = self._handle_func_response(recv_params, message_body)
+                    handle_status = self._handle_func_response(send_params, recv_params, message_body)
                 if handle_status:
-                    self.latest_cseq = self.send_history[0][0].cseq
-                    self.send_history.popleft()
+                    self.latest_cseq = send_params.cseq
+                    self.transactions.complete(transaction, recv_params)
+            elif recv_params.status_code < 200:
+                # 临时应答: INVITE停止重传, 其他请求放慢重传
+                self.transactions.provisional(transaction)
             else:
                 print(f"收到非200响应: {recv_params.status_code}")
+                # 非200的最终应答同样结束事务, 不再等到超时
+                if recv_params.cseq == send_params.cseq:
+                    self.transactions.complete(transaction, recv_params, FAILED)
         except Exception as e:
             print(f"处理消息出错: {e}")
 
-    def _handle_btn_response(self, recv_params, recv_message_body):
-        """"处理按键响应"""
-        # 当前待回复的报文
-        send_params, _, _, _ = self.send_history[0]
+    def _handle_btn_response(self, send_params, recv_params, recv_message_body):
+        """"处理按键响应, send_params为应答对应的请求"""
         # 电话按键
         if send_params.subject == "vcu_phone" and recv_params.content_type == "application/phone_bt_info":
             info = TelBtnInfo.parse(recv_message_body)
-        # 频率按键
-        elif send_params.subject == "vcu_frequency" and recv_params.content_type == "application/frequency_bt_info":
-            info = FreqBtnInfo.parse(recv_message_body)
-            for info_t in info:
-                self.frequency_list.append(str(info_t.frequency))
-        # 电台按键
-        elif send_params.subject == "vcu_radio" and recv_params.content_type == "application/radio_bt_info":
-            info = RadioInfo.parse(recv_message_body)
-            for info_t in info:
-                radio = Radio(
-                    freq=str(info_t.szFrequency.decode('utf-8')),
-                    type=info_t.iRSType,
-                    avail=info_t.iIsCan,
-                )
-                self.radio_dict[str(info_t.szCode.decode('utf-8'))] = radio
+        # 功能按键
+        elif send_params.subject == "vcu_function" and recv_params.content_type == "application/func_bt_info":
+            info = MyFunBtnInfo.parse(recv_message_body)
+        # 频率/电台按键, 分片可能乱序或重复到达
+        elif ((send_params.subject == "vcu_frequency" and recv_params.content_type == "application/frequency_bt_info")
+              or (send_params.subject == "vcu_radio" and recv_params.content_type == "application/radio_bt_info")):
+            fragments = self.table_data.setdefault(send_params.subject, {})
+            if recv_params.cseq in fragments:
+                return False
+            data = base64.b64decode(recv_message_body.strip())
+            fragments[recv_params.cseq] = data
+            self._apply_table(send_params.subject, data)
+            # 分片CSeq的高字节为分片总数, 全部收到后结束
+            return len(fragments) == recv_params.cseq >> 8
         else:
             return False
 
-        return True if check_final_message(recv_params.cseq) else False
+        return True
 
-    def _handle_func_response(self, recv_params, recv_message_body):
-        """处理功能响应"""
-        # 当前待回复的报文
-        send_params, _, _, _ = self.send_history[0]
+    def _reset_table(self, subject):
+        """整表同步前清空该表格已有的频率/电台, 避免与新表重复或残留"""
+        if subject == 'vcu_frequency':
+            self.frequency_list.clear()
+            self.frequency_positions.clear()
+        elif subject == 'vcu_radio':
+            self.radios.clear()
+
+    def _apply_table(self, subject, data):
+        """应用已解码的频率/电台表数据(来自应答或本地缓存)"""
+        if subject == 'vcu_frequency':
+            for info_t in parse_table_data(FreqBtnInfo, data):
+                self.frequency_positions[info_t.iPosition] = len(self.frequency_list)
+                self.frequency_list.append(str(info_t.frequency))
+        elif subject == 'vcu_radio':
+            for info_t in parse_table_data(RadioInfo, data):
+                self._update_radio(info_t)
+
+    def _update_radio(self, info_t):
+        """按电台号更新电台目录, 已有的Radio对象原地修改"""
+        self.radios.update(
+            info_t.code,
+            freq=info_t.frequency,
+            type=info_t.iRSType,
+            avail=info_t.iIsCan,
+        )
+
+    def _update_frequency(self, info_t):
+        """按按钮位置原地替换frequency_list中的频率, 新位置追加到末尾"""
+        index = self.frequency_positions.get(info_t.iPosition)
+        if index is None:
+            self.frequency_positions[info_t.iPosition] = len(self.frequency_list)
+            self.frequency_list.append(str(info_t.frequency))
+        else:
+            self.frequency_list[index] = str(info_t.frequency)
+
+    def _handle_request(self, recv_params, recv_message_body):
+        """处理服务端发来的请求, 目前只有订阅表格后的NOTIFY"""
+        if recv_params.message_type != "NOTIFY":
+            print(f"收到不支持的请求: {recv_params.message_type}")
+            return
+        if recv_params.content_type == "application/radio_bt_info":
+            for info_t in RadioInfo.parse(recv_message_body):
+                self._update_radio(info_t)
+        elif recv_params.content_type == "application/frequency_bt_info":
+            for info_t in FreqBtnInfo.parse(recv_message_body):
+                self._update_frequency(info_t)
+        # 200 OK, 沿用NOTIFY的事务标识, 不进入发送时序
+        params = BaseMessageParams(
+            branch=recv_params.branch,
+            call_id=recv_params.call_id,
+            cseq=recv_params.cseq,
+            tag=recv_params.tag,
+            local_user=recv_params.server_user,
+            local_ip=self.local_ip,
+            local_port=self.local_port,
+            server_user=recv_params.local_user,
+            server_ip=self.server_ip,
+            server_port=self.server_port,
+            method_type="response",
+            message_type="NOTIFY",
+        )
+        self._send_bytes(self.message_generator.generate_message_bytes(params))
+
+    def _handle_func_response(self, send_params, recv_params, recv_message_body):
+        """处理功能响应, send_params为应答对应的请求"""
         # 根据报文类型处理
         if send_params.cseq == recv_params.cseq:
             # 心跳报文
             if send_params.subject in ['vcu_logout', 'vcu_login']:
                 return True
+            # 表格版本
+            elif send_params.subject == 'vcu_version':
+                # vcu_frequency:版本+vcu_radio:版本
+                self.table_versions = dict(item.split(':', 1) for item in recv_message_body.split('+') if item)
+                return True
             # 注册报文
             elif send_params.subject == 'vcu_register':
                 info = RoleInfo().parse(recv_message_body)
@@ -479,15 +669,17 @@ class SIPClient:
                 # 获取RTP端口
                 match = re.search(r"m=audio (\d+)", recv_message_body)
                 if match:
-                    self.remote_port = int(match.group(1))
-                    self.rtp_endpoint = RtpEndpoint(self.local_ip, self.local_rtp_port, self.remote_ip, self.remote_port)
+                    self.remote_rtp_port = int(match.group(1))
+                    self.rtp_endpoint = RtpEndpoint(self.local_ip, self.local_rtp_port, self.remote_ip, self.remote_rtp_port,
+                                                    audio=create_backend(self.audio_backend),
+                                                    keyboard_ptt=self.audio_backend == 'pyaudio')
                     self.rtp_endpoint.start()
                     self.ack(send_params, recv_params)
             except Exception as e:
                 print(f"获取RTP端口错误 {e}")
-        elif send_params.message_type == 'REFER' and send_params is None:
+        elif send_params.message_type == 'REFER' and send_params.method is None:
             radio_func_type = 1
-        elif send_params.message_type == 'REFER' and send_params == 'BYE':
+        elif send_params.message_type == 'REFER' and send_params.method == 'BYE':
             radio_func_type = 0
         elif send_params.message_type == 'BYE':
             radio_func_type = 0
@@ -496,14 +688,8 @@ class SIPClient:
             return False
 
         if radio_func_type:
-            if self.radio_dict[port].type == 0:
-                self.send_radio.append(port)
-            else:
-                self.recv_radio.append(port)
+            self.radios.activate(port)
         else:
-            if port in self.send_radio:
-                self.send_radio.remove(port)
-            elif port in self.recv_radio:
-                self.recv_radio.remove(port)
+            self.radios.deactivate(port)
 
         return True
@@ -1,16 +1,52 @@
 from message_generator.message_generator import MessageGenerator
+from message_generator.response_cache import ResponseCache
+from sip.handler_registry import HandlerRegistry
 from data_classes.params_classes import BaseMessageParams, RegisterParams, InfoParams, ReferParams
+import math
 import socket
 import time
 import base64
+import hashlib
 import json
-from message_decoder.header_decoder import parse_sip_message
+from message_decoder.sip_message_view import SipMessageView
+from message_decoder.payload_schema import get_schema
 from utils.utils import check_final_message
 from rtp.rtp_endpoint import RtpEndpoint
+from rtp.rtp_engine import RtpEngine
+from rtp.audio_backend import BACKENDS, create_backend
+from rtp.port_pool import RtpPortPool
+from sip.transaction import TransactionLayer, COMPLETED, FAILED, TIMEOUT
+from data_classes.comm_classes import PeerState, MediaSession, Subscription
+import re
+
+# 应答缓存中每个事务需要填充的字段
+TRANSACTION_SLOTS = ('branch', 'call_id', 'cseq', 'tag', 'local_user', 'server_user')
+# 分片CSeq固定的表格应答
+FRAGMENT_SLOTS = ('branch', 'call_id', 'tag', 'local_user', 'server_user')
+# 表格类应答: {请求主题: (内容类型, 分片起始CSeq)}, 起始CSeq为None时不分片, 沿用请求的CSeq;
+# 分片CSeq高字节为分片总数、低字节为序号, 高字节与低字节相等时为最后一片; 起始CSeq的高字节为最大分片数,
+# 记录少于该数时按记录数分片, 不发送空分片
+TABLE_RESPONSES = {
+    'vcu_phone': ("application/phone_bt_info", None),
+    'vcu_frequency': ("application/frequency_bt_info", 1025),
+    'vcu_radio': ("application/radio_bt_info", 1793),
+    'vcu_function': ("application/func_bt_info", None),
+    'vcu_all_frequency': ("application/frequency_bt_info", 1025),
+}
+# 可订阅的表格: {请求主题: 记录的键字段}, 表格更新时按键比较, 只推送变化的记录
+SUBSCRIPTION_KEYS = {
+    'vcu_radio': 'szCode',
+    'vcu_frequency': 'iPosition',
+}
+DEFAULT_SUBSCRIBE_EXPIRES = 3600  # SUBSCRIBE未携带Expires时的订阅时长(秒)
+NOTIFY_BATCH = 20  # 每条NOTIFY最多携带的记录数, 与表格应答的分片大小一致
+PEER_IDLE_TIMEOUT = 60  # UDP对端超过该时长(秒)未发来报文时清除其状态, 客户端每3秒发送一次心跳
+PEER_SWEEP_INTERVAL = 10  # 检查空闲对端的间隔(秒)
 
 
 class SIPServer:
-    def __init__(self, user, local_ip, local_port, remote_ip, remote_port, local_rtp_port, remote_rtp_port):
+    def __init__(self, user, local_ip, local_port, remote_ip, remote_port, local_rtp_port, remote_rtp_port,
+                 reuse_port=False, rtp_port_count=100, audio_backend=None, rtp_engine=False, debug=False):
         # 席位
         self.user = user
         self.password = self._base64_encode(user)
@@ -37,6 +73,9 @@ class SIPServer:
         self.frequency_list = []  # 频率列表
         self.radio_list = []  # 电台列表
 
+        # 为True时打印收到的每条报文(调试用, 会显著降低处理速度)
+        self.debug = debug
+
         # 当前状态
         self.status = "offline"  # 状态: "online", "offline", "busy"
         self.send_radio = []
@@ -51,15 +90,43 @@ class SIPServer:
 
         # 消息生成器和RTP客户端
         self.message_generator = MessageGenerator()
+        self.response_cache = self._build_response_cache()
+        self.handlers = self._build_handler_registry()
         self.rtp_status = False
-        self.rtp_endpoint = RtpEndpoint(local_ip, local_rtp_port, remote_ip, remote_rtp_port)
+        # 每个INVITE从端口池分配独立的RTP端点, BYE后归还
+        self.rtp_port_pool = RtpPortPool(local_rtp_port, rtp_port_count)
+        self.remote_rtp_port = remote_rtp_port  # SDP offer缺少媒体端口时使用
+        # 媒体端点的音频后端(rtp.audio_backend), 'null'时不需要声卡, 作为无界面的媒体对端运行;
+        # 未指定时默认使用声卡, 使用RtpEngine时默认为'null'(引擎线程不能等待声卡)
+        if audio_backend is None:
+            audio_backend = 'null' if rtp_engine else 'pyaudio'
+        if rtp_engine and BACKENDS[audio_backend].blocking:
+            raise ValueError(f"音频后端{audio_backend}的读写会阻塞, 不能与RtpEngine同时使用")
+        self.audio_backend = audio_backend
+        # 为True时所有呼叫的媒体流由一个单线程RtpEngine收发, 不再为每个呼叫创建RtpEndpoint的收发线程
+        self.rtp_engine = RtpEngine() if rtp_engine else None
+        self.calls = {}  # {call_id: MediaSession}
+        # 表格订阅: {请求主题: {订阅者地址: Subscription}}, 线程模式下地址为None
+        self.subscriptions = {}
+        # NOTIFY的客户端事务(按Timer E/F重传直到收到200): {订阅者地址: TransactionLayer}, 线程模式下地址为None
+        self.notify_transactions = {}
+        self.tables = {}  # {请求主题: 当前记录列表}, 首次更新表格时从配置解码
 
         # 创建UDP套接字
+        self.reuse_port = reuse_port
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if reuse_port:
+            # 多进程共享同一SIP端口, 由内核按来源地址分流
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.socket.bind((self.local_ip, self.local_port))
         print(f"SIP Client initialized on {self.local_ip}:{self.local_port}")
 
-        self.comm_count = 0
+        # 多席位状态: 按报文来源地址记录对端
+        self.peers = {}  # {(ip, port): PeerState}
+        self._next_peer_sweep = 0.0  # 下次检查空闲对端的时间
+        self._peer = None  # 当前正在处理的报文来源
+        self._transport = None  # asyncio模式下的数据报传输
+        self._loop = None  # asyncio模式下的事件循环, 时间轮线程的重传经由它发送
 
     def _cseq_increment(self):
         """递增CSeq序号"""
@@ -79,337 +146,505 @@ class SIPServer:
 
     def _send_message(self, message):
         """发送SIP消息"""
-        self.socket.sendto(message.encode(), (self.remote_ip, self.remote_port))
+        self._send_bytes(message.encode())
 
-    def response_alive(self, recv_params):
-        """回复心跳报文"""
-        params = InfoParams(
-            branch=recv_params.branch,
-            call_id=recv_params.call_id,
-            cseq=recv_params.cseq,
-            tag=recv_params.tag,
-            local_user=recv_params.server_user,
+    def _send_bytes(self, data):
+        """发送已编码的SIP消息, 优先回复当前报文的来源地址"""
+        self._send_to(self._peer, data)
+
+    def _send_to(self, peer, data):
+        """发送已编码的SIP消息到指定对端, peer为None时发往固定的remote_ip/remote_port"""
+        if peer is not None:
+            if peer.connection is not None:
+                # TCP对端: 在其持久连接上发送
+                peer.connection.write(data)
+                return
+            addr = peer.addr
+        else:
+            addr = (self.remote_ip, self.remote_port)
+        if self._transport is not None:
+            self._transport.sendto(data, addr)
+        else:
+            self.socket.sendto(data, addr)
+
+    def _send_threadsafe(self, peer, data):
+        """供时间轮线程重传使用: asyncio模式下交给事件循环发送(传输对象不是线程安全的)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._send_to, peer, data)
+        else:
+            self._send_to(peer, data)
+
+    def _notify_layer(self, addr, peer):
+        """订阅者的NOTIFY事务层, TCP对端不重传; 服务端不能阻塞等待, 不限制在途的NOTIFY数"""
+        layer = self.notify_transactions.get(addr)
+        if layer is None:
+            layer = TransactionLayer(lambda data: self._send_threadsafe(peer, data), window=math.inf,
+                                     reliable=peer is not None and peer.connection is not None)
+            self.notify_transactions[addr] = layer
+        return layer
+
+    def _get_peer(self, addr):
+        """获取(或创建)对端状态"""
+        peer = self.peers.get(addr)
+        if peer is None:
+            peer = PeerState(addr=addr)
+            self.peers[addr] = peer
+        return peer
+
+    def _evict_idle_peers(self, now):
+        """清除长时间未发来报文的UDP对端及其空闲的NOTIFY事务层; TCP对端随连接断开清除"""
+        self._next_peer_sweep = now + PEER_SWEEP_INTERVAL
+        deadline = now - PEER_IDLE_TIMEOUT
+        idle = [addr for addr, peer in self.peers.items() if peer.connection is None and peer.last_seen < deadline]
+        for addr in idle:
+            del self.peers[addr]
+            layer = self.notify_transactions.get(addr)
+            if layer is not None and not layer.pending:
+                del self.notify_transactions[addr]
+
+    def _build_response_cache(self):
+        """预编译服务器表格类应答报文, 事务相关字段留作占位符"""
+        cache = ResponseCache(self.message_generator)
+        base = dict(
             local_ip=self.local_ip,
             local_port=self.local_port,
-            server_user=recv_params.local_user,
             server_ip=self.server_ip,
             server_port=self.server_port,
             method_type="response",
-            message_type="INFO",
-            subject=recv_params.subject,
-            content_type="application/server_ip",
-            content=self.data[recv_params.subject]['server_ip'],
         )
-        msg = self.message_generator.generate_message(params)
-        self._send_message(msg)
+        for subject in ('vcu_login', 'vcu_logout'):
+            if subject in self.data:
+                cache.compile(subject, InfoParams(
+                    message_type="INFO",
+                    subject=subject,
+                    content_type="application/server_ip",
+                    content=self._payload("application/server_ip", self.data[subject]['server_ip']),
+                    **base,
+                ), TRANSACTION_SLOTS)
+        if 'vcu_register' in self.data:
+            cache.compile('vcu_register', RegisterParams(
+                message_type="REGISTER",
+                expires=5,
+                contact=True,
+                content_type="application/role_info",
+                content=self._payload("application/role_info", self.data['vcu_register']['role_info']),
+                **base,
+            ), TRANSACTION_SLOTS)
+        self.table_versions = {}
+        for subject, (content_type, first_cseq) in TABLE_RESPONSES.items():
+            if subject not in self.data:
+                continue
+            contents = [self._payload(content_type, value) for value in self.data[subject].values()]
+            # 表格版本: 全部分片消息体的摘要, 表格内容不变时版本不变
+            digest = hashlib.blake2b(digest_size=8)
+            for content in contents:
+                digest.update(content.encode('ascii'))
+                digest.update(b'+')
+            self.table_versions[subject] = digest.hexdigest()
+            for i, content in enumerate(contents):
+                if first_cseq is None:
+                    cseq, slots = None, TRANSACTION_SLOTS
+                else:
+                    cseq, slots = (len(contents) << 8) | ((first_cseq & 0xFF) + i), FRAGMENT_SLOTS
+                cache.compile(subject, InfoParams(
+                    cseq=cseq,
+                    message_type="INFO",
+                    content_type=content_type,
+                    content=content,
+                    **base,
+                ), slots)
+        cache.compile('vcu_version', InfoParams(
+            message_type="INFO",
+            subject='vcu_version',
+            content_type="application/table_version",
+            content="+".join(f"{subject}:{version}" for subject, version in self.table_versions.items()),
+            **base,
+        ), TRANSACTION_SLOTS)
+        return cache
+
+    def _payload(self, content_type, value):
+        """配置中的消息体: Base64字符串原样使用, 记录(dict列表或dict)按载荷定义编码"""
+        if isinstance(value, str):
+            return value
+        return get_schema(content_type).encode_b64(value)
+
+    def update_table(self, subject, records):
+        """
+        以实时数据替换表格类应答并重新编译应答缓存, records为记录(namedtuple/元组/dict)序列
+
+        可订阅的表格同时按键比较新旧记录, 向订阅者推送变化的记录; asyncio模式下应在事件循环线程中调用
+        """
+        content_type, first_cseq = TABLE_RESPONSES[subject]
+        schema = get_schema(content_type)
+        records = [schema.record(**record) if isinstance(record, dict) else schema.record(*record)
+                   for record in records]
+        changed = []
+        key_field = SUBSCRIPTION_KEYS.get(subject)
+        if key_field is not None:
+            old = {getattr(record, key_field): record for record in self._table_records(subject)}
+            changed = [record for record in records if old.get(getattr(record, key_field)) != record]
+        # 按分片数均分; 记录少于最大分片数时每片一条记录, 空表只有一个(空的)分片
+        count = 1 if first_cseq is None else max(1, min(first_cseq >> 8, len(records)))
+        fragments = [records[i * len(records) // count:(i + 1) * len(records) // count] for i in range(count)]
+        self.data[subject] = {
+            f"{schema.name}{i if count > 1 else ''}": schema.encode_b64(fragment)
+            for i, fragment in enumerate(fragments)
+        }
+        self.tables[subject] = records
+        self.response_cache = self._build_response_cache()
+        self._publish(subject, changed)
+
+    def update_records(self, subject, records):
+        """按键更新(或追加)可订阅表格中的部分记录, 其余记录不变, 变化的记录推送给订阅者"""
+        key_field = SUBSCRIPTION_KEYS[subject]
+        schema = get_schema(TABLE_RESPONSES[subject][0])
+        table = {getattr(record, key_field): record for record in self._table_records(subject)}
+        for record in records:
+            record = schema.record(**record) if isinstance(record, dict) else schema.record(*record)
+            table[getattr(record, key_field)] = record
+        self.update_table(subject, list(table.values()))
+
+    def _table_records(self, subject):
+        """表格当前的全部记录"""
+        records = self.tables.get(subject)
+        if records is None:
+            schema = get_schema(TABLE_RESPONSES[subject][0])
+            records = []
+            for value in self.data.get(subject, {}).values():
+                records.extend(schema.decode_b64(self._payload(schema.content_type, value)))
+            self.tables[subject] = records
+        return records
+
+    def _publish(self, subject, records):
+        """向subject的有效订阅者发送NOTIFY, 消息体为变化的记录, 过期或已断开的订阅随之清除"""
+        subscribers = self.subscriptions.get(subject)
+        if not subscribers or not records:
+            return
+        content_type = TABLE_RESPONSES[subject][0]
+        schema = get_schema(content_type)
+        bodies = [schema.encode_b64(records[i:i + NOTIFY_BATCH]) for i in range(0, len(records), NOTIFY_BATCH)]
+        now = time.time()
+        for addr, subscription in list(subscribers.items()):
+            peer = subscription.peer
+            notify = subscription.last_notify
+            if subscription.expires_at <= now or (notify is not None and notify.state == TIMEOUT) or (
+                    peer is not None and peer.connection is not None and peer.connection.is_closing()):
+                # 过期、上一条NOTIFY重传到超时仍无应答或TCP连接已断开
+                del subscribers[addr]
+                continue
+            ip, port = addr if addr is not None else (self.remote_ip, self.remote_port)
+            layer = self._notify_layer(addr, peer)
+            for body in bodies:
+                subscription.notify_cseq += 1
+                params = InfoParams(
+                    cseq=subscription.notify_cseq,
+                    call_id=subscription.call_id,
+                    local_user=subscription.server_user,
+                    local_ip=self.local_ip,
+                    local_port=self.local_port,
+                    server_user=subscription.user,
+                    server_ip=ip,
+                    server_port=port,
+                    method_type="request",
+                    message_type="NOTIFY",
+                    subject=subject,
+                    content_type=content_type,
+                    content=body,
+                )
+                message = self.message_generator.generate_message_bytes(params)
+                subscription.last_notify = layer.begin(params, message)
+
+    def _build_handler_registry(self):
+        """注册各Subject/方法对应的处理函数"""
+        registry = HandlerRegistry()
+        registry.register(self.response_alive, 'vcu_login')
+        registry.register(self.response_alive, 'vcu_logout')
+        registry.register(self.response_register, 'vcu_register')
+        registry.register(self.response_phone_btn, 'vcu_phone')
+        registry.register(self.response_frequency_btn, 'vcu_frequency')
+        registry.register(self.response_radio_btn, 'vcu_radio')
+        registry.register(self.response_function_btn, 'vcu_function')
+        registry.register(self.response_all_frequency_btn, 'vcu_all_frequency')
+        registry.register(self.response_table_version, 'vcu_version')
+        for subject in SUBSCRIPTION_KEYS:
+            registry.register(self.response_subscribe, subject, method='SUBSCRIBE')
+        # 电台操控: 首次选中为INVITE, 追加选中为REFER, 退出为BYE或REFER(method=BYE)
+        registry.register(self.response_radio, 'radio', method='INVITE')
+        registry.register(self.response_radio, 'radio', method='REFER')
+        registry.register(self.response_bye, 'radio', method='BYE')
+        registry.register(self.response_bye, 'radio', method='REFER', refer_method='BYE')
+        return registry
+
+    def _send_cached(self, recv_params):
+        """从应答缓存渲染并发送recv_params.subject对应的全部分片"""
+        values = {
+            'branch': recv_params.branch,
+            'call_id': recv_params.call_id,
+            'cseq': recv_params.cseq,
+            # 请求未带From tag时与generate_message一样生成新的tag
+            'tag': recv_params.tag if recv_params.tag is not None else self.message_generator.ids.next_id(),
+            'local_user': recv_params.server_user,
+            'server_user': recv_params.local_user,
+        }
+        for data in self.response_cache.render(recv_params.subject, values):
+            self._send_bytes(data)
+
+    def response_alive(self, recv_params):
+        """回复心跳报文"""
+        self._send_cached(recv_params)
 
     def response_register(self, recv_params):
         """回复注册报文"""
-        params = RegisterParams(
-            branch=recv_params.branch,
-            call_id=recv_params.call_id,
-            cseq=recv_params.cseq,
-            tag=recv_params.tag,
-            local_user=recv_params.server_user,
-            local_ip=self.local_ip,
-            local_port=self.local_port,
-            server_user=recv_params.local_user,
-            server_ip=self.server_ip,
-            server_port=self.server_port,
-            method_type="response",
-            message_type="REGISTER",
-            expires=5,
-            contact=True,
-            content_type="application/role_info",
-            content=self.data[recv_params.subject]['role_info'],
-        )
-        msg = self.message_generator.generate_message(params)
-        self._send_message(msg)
+        self._send_cached(recv_params)
+        if self._peer is not None:
+            self._peer.status = "online"
 
     def response_phone_btn(self, recv_params):
         """回复通道列表"""
-        params = InfoParams(
-            branch=recv_params.branch,
-            call_id=recv_params.call_id,
-            cseq=recv_params.cseq,
-            tag=recv_params.tag,
-            local_user=recv_params.server_user,
-            local_ip=self.local_ip,
-            local_port=self.local_port,
-            server_user=recv_params.local_user,
-            server_ip=self.server_ip,
-            server_port=self.server_port,
-            method_type="response",
-            message_type="INFO",
-            content_type="application/phone_bt_info",
-            content=self.data[recv_params.subject]['phone_bt_info'],
-        )
-        msg = self.message_generator.generate_message(params)
-        self._send_message(msg)
+        self._send_cached(recv_params)
 
     def response_frequency_btn(self, recv_params):
         """回复频率列表"""
-        cseq = 1025
-        for key, value in self.data[recv_params.subject].items():
-            params = InfoParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
-                message_type="INFO",
-                content_type="application/frequency_bt_info",
-                content=value,
-            )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            cseq += 1
+        self._send_cached(recv_params)
 
     def response_radio_btn(self, recv_params):
         """回复电台列表"""
-        cseq = 1793
-        for key, value in self.data[recv_params.subject].items():
-            params = InfoParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
-                message_type="INFO",
-                content_type="application/radio_bt_info",
-                content=value,
-            )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            cseq += 1
+        self._send_cached(recv_params)
 
     def response_function_btn(self, recv_params):
         """获取功能列表"""
-        cseq = 257
-        for key, value in self.data[recv_params.subject].items():
-            params = InfoParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=recv_params.cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
-                message_type="INFO",
-                content_type="application/func_bt_info",
-                content=value,
-            )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
+        self._send_cached(recv_params)
 
     def response_all_frequency_btn(self, recv_params):
         """获取所有频率"""
-        cseq = 1025
-        for key, value in self.data[recv_params.subject].items():
-            params = InfoParams(
-                branch=recv_params.branch,
+        self._send_cached(recv_params)
+
+    def response_table_version(self, recv_params):
+        """回复各表格的版本, 客户端据此判断本地缓存的表格是否需要重新获取"""
+        self._send_cached(recv_params)
+
+    def response_subscribe(self, recv_params):
+        """订阅(Expires为0时取消订阅)表格变化, 之后表格更新时以NOTIFY推送变化的记录"""
+        expires = recv_params.expires if recv_params.expires is not None else DEFAULT_SUBSCRIBE_EXPIRES
+        addr = self._peer.addr if self._peer is not None else None
+        subscribers = self.subscriptions.setdefault(recv_params.subject, {})
+        if expires > 0:
+            subscription = subscribers.get(addr)
+            if subscription is None or subscription.call_id != recv_params.call_id:
+                subscription = Subscription(subject=recv_params.subject, peer=self._peer, call_id=recv_params.call_id)
+                subscribers[addr] = subscription
+            # 刷新订阅沿用原有的NOTIFY CSeq
+            subscription.user = recv_params.local_user
+            subscription.server_user = recv_params.server_user
+            subscription.expires_at = time.time() + expires
+        else:
+            subscribers.pop(addr, None)
+        params = self._response_base_params(
+            recv_params,
+            message_type="SUBSCRIBE",
+            subject=recv_params.subject,
+            expires=expires,
+        )
+        self._send_bytes(self.message_generator.generate_message_bytes(params))
+
+    def _open_media_session(self, recv_params):
+        """为INVITE分配RTP端口并创建媒体端点, 端口耗尽时返回None"""
+        remote_ip, remote_rtp_port = self._parse_sdp_offer(recv_params.content)
+        for _ in range(len(self.rtp_port_pool)):
+            try:
+                port = self.rtp_port_pool.allocate()
+            except RuntimeError as e:
+                print(e)
+                return None
+            try:
+                if self.rtp_engine is not None:
+                    endpoint = self.rtp_engine.open_stream(self.local_ip, port, remote_ip, remote_rtp_port,
+                                                           audio=create_backend(self.audio_backend))
+                else:
+                    endpoint = RtpEndpoint(self.local_ip, port, remote_ip, remote_rtp_port,
+                                           audio=create_backend(self.audio_backend),
+                                           keyboard_ptt=self.audio_backend == 'pyaudio')
+            except OSError as e:
+                # 端口暂时被其他程序占用: 归还到空闲队列末尾, 其余端口都分配过后才会再次尝试
+                print(f"RTP端口 {port} 不可用: {e}")
+                self.rtp_port_pool.release(port)
+                continue
+            session = MediaSession(
                 call_id=recv_params.call_id,
-                cseq=cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
-                message_type="INFO",
-                content_type="application/frequency_bt_info",
-                content=value,
+                local_rtp_port=port,
+                remote_ip=remote_ip,
+                remote_rtp_port=remote_rtp_port,
+                endpoint=endpoint,
             )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            cseq += 1   
+            self.calls[recv_params.call_id] = session
+            return session
+        return None
+
+    def _close_media_session(self, call_id):
+        """停止媒体端点并归还RTP端口"""
+        session = self.calls.pop(call_id, None)
+        if session is None:
+            return
+        session.endpoint.stop()
+        self.rtp_port_pool.release(session.local_rtp_port)
+
+    def _parse_sdp_offer(self, sdp):
+        """从SDP offer中提取对端媒体地址, 缺失时回退到报文来源地址和配置端口"""
+        remote_ip = self._peer.addr[0] if self._peer is not None else self.remote_ip
+        remote_rtp_port = self.remote_rtp_port
+        if sdp:
+            match = re.search(r"c=IN IP4 (\S+)", sdp)
+            if match:
+                remote_ip = match.group(1)
+            match = re.search(r"m=audio (\d+)", sdp)
+            if match:
+                remote_rtp_port = int(match.group(1))
+        return remote_ip, remote_rtp_port
+
+    def _response_base_params(self, recv_params, **kwargs):
+        """构造电台操控应答的公共参数"""
+        return BaseMessageParams(
+            branch=recv_params.branch,
+            call_id=recv_params.call_id,
+            cseq=recv_params.cseq,
+            tag=recv_params.tag,
+            local_user=recv_params.server_user,
+            local_ip=self.local_ip,
+            local_port=self.local_port,
+            server_user=recv_params.local_user,
+            server_ip=self.server_ip,
+            server_port=self.server_port,
+            method_type="response",
+            **kwargs,
+        )
+
+    @staticmethod
+    def _is_new_request(session, recv_params):
+        """按CSeq区分新的电台操控请求和重传, 只有新请求才计入选中的电台数"""
+        if recv_params.cseq == session.last_cseq:
+            return False
+        session.last_cseq = recv_params.cseq
+        return True
 
     def response_radio(self, recv_params):
         """回复选中电台"""
         if recv_params.message_type == "INVITE":
             # 100 Trying
-            params = BaseMessageParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=recv_params.cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
+            params = self._response_base_params(
+                recv_params,
                 message_type="INVITE",
                 status_code=100,
                 reason_phrase="Trying",
             )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            params = BaseMessageParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=recv_params.cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
+            self._send_bytes(self.message_generator.generate_message_bytes(params))
+            session = self.calls.get(recv_params.call_id)
+            # INVITE重传时沿用已建立的媒体端点
+            is_new_session = session is None
+            if is_new_session:
+                session = self._open_media_session(recv_params)
+            if session is None:
+                params = self._response_base_params(
+                    recv_params,
+                    message_type="INVITE",
+                    subject=recv_params.subject,
+                    status_code=503,
+                    reason_phrase="Service Unavailable",
+                )
+                self._send_bytes(self.message_generator.generate_message_bytes(params))
+                return
+            params = self._response_base_params(
+                recv_params,
                 message_type="INVITE",
                 subject=recv_params.subject,
                 contact=True,
                 allow=self.allow,
                 supported=self.supported,
                 content_type="application/sdp",
-                content=self._generate_default_sdp(),
+                content=self._generate_default_sdp(session.local_rtp_port),
             )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            self.comm_count += 1
-            self.rtp_endpoint.start()
-        
+            self._send_bytes(self.message_generator.generate_message_bytes(params))
+            if is_new_session:
+                session.comm_count += 1
+                session.last_cseq = recv_params.cseq
+                session.endpoint.start()
+
         elif recv_params.message_type == "REFER":
-            params = BaseMessageParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=recv_params.cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
+            params = self._response_base_params(
+                recv_params,
                 message_type="REFER",
                 subject=recv_params.subject,
             )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            self.comm_count += 1
+            self._send_bytes(self.message_generator.generate_message_bytes(params))
+            session = self.calls.get(recv_params.call_id)
+            if session is not None and self._is_new_request(session, recv_params):
+                session.comm_count += 1
 
     def response_bye(self, recv_params):
         """回复退出电台"""
+        session = self.calls.get(recv_params.call_id)
         if recv_params.message_type == "REFER":
-            params = BaseMessageParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=recv_params.cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
+            params = self._response_base_params(
+                recv_params,
                 message_type="REFER",
                 # subject=recv_params.subject,
             )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            self.comm_count -=1
+            self._send_bytes(self.message_generator.generate_message_bytes(params))
+            if session is not None and self._is_new_request(session, recv_params):
+                session.comm_count -= 1
         elif recv_params.message_type == "BYE":
-            params = BaseMessageParams(
-                branch=recv_params.branch,
-                call_id=recv_params.call_id,
-                cseq=recv_params.cseq,
-                tag=recv_params.tag,
-                local_user=recv_params.server_user,
-                local_ip=self.local_ip,
-                local_port=self.local_port,
-                server_user=recv_params.local_user,
-                server_ip=self.server_ip,
-                server_port=self.server_port,
-                method_type="response",
+            params = self._response_base_params(
+                recv_params,
                 message_type="BYE",
                 subject=recv_params.subject,
             )
-            msg = self.message_generator.generate_message(params)
-            self._send_message(msg)
-            self.rtp_endpoint.stop()
-            self.comm_count -= 1
-        if self.comm_count == 0:
-            self.rtp_endpoint.stop()
-
-    # def _generate_default_sdp(self):
-    #     """生成符合示例格式的SDP内容"""
-    #     return (
-    #         "v=0\r\n"
-    #         f"o=SELUS 2890844527 1 IN IP4 {self.local_ip}\r\n"
-    #         "s=Sip Call\r\n"
-    #         f"c=IN IP4 {self.local_ip}\r\n"
-    #         "t=0 0\r\n"
-    #         "m=audio 5200 RTP/AVP 8\r\n"
-    #         "a=rtpmap:8 PCMA/8000\r\n"
-    #         "a=sendrecv\r\n"
-    #     )
+            self._send_bytes(self.message_generator.generate_message_bytes(params))
+            # 退出最后一个电台, 不论计数如何都结束媒体会话
+            self._close_media_session(recv_params.call_id)
+            return
+        if session is not None and session.comm_count <= 0:
+            self._close_media_session(recv_params.call_id)
 
     def receive_message(self):
         while True:
-            data, addr = self.socket.recvfrom(4096)
-            message = data.decode('utf-8')
-            print(f"Received message from {addr}:\n{message}")
+            data, addr = self.socket.recvfrom(65535)
+            if self.debug:
+                print(f"Received message from {addr}:\n{data.decode('utf-8')}")
             # 例如根据消息类型调用不同的处理方法
-            self._handle_message(message)
-
-    def _handle_message(self, message):
-        header_part, _, body = message.partition('\r\n\r\n')
-        recv_params = parse_sip_message(header_part)
-        print(recv_params.message_type)
-        print(recv_params.subject)
-        if recv_params.subject == 'vcu_login' or recv_params.subject == 'vcu_logout':
-            self.response_alive(recv_params)
-        elif recv_params.subject == 'vcu_register':
-            self.response_register(recv_params)
-        elif recv_params.subject == 'vcu_phone':
-            self.response_phone_btn(recv_params)
-        elif recv_params.subject == 'vcu_frequency':
-            self.response_frequency_btn(recv_params)
-        elif recv_params.subject == 'vcu_radio':
-            self.response_radio_btn(recv_params)
-        elif recv_params.subject == 'vcu_function':
-            self.response_function_btn(recv_params)
-        elif recv_params.subject == 'vcu_all_frequency':
-            self.response_all_frequency_btn(recv_params)
-        elif recv_params.subject == 'radio':
-            if recv_params.message_type.upper() == "INVITE" or (
-                    recv_params.message_type.upper() == "REFER" and recv_params.method is None):
-                self.response_radio(recv_params)
-            elif recv_params.message_type.upper() == "BYE" or (
-                    recv_params.message_type.upper() == "REFER" and recv_params.method == "BYE"):
-                self.response_bye(recv_params)
-
-    def _generate_default_sdp(self):
-        """生成符合示例格式的SDP内容"""
+            self._handle_message(data)
+
+    def _handle_message(self, data, addr=None):
+        # 直接在原始bytes上建立惰性视图, 处理函数读到的头字段才会被解码
+        recv_params = SipMessageView(data)
+        # addr为None时沿用固定的remote_ip/remote_port回复(线程模式)
+        self._peer = self._get_peer(addr) if addr is not None else None
+        if self._peer is not None:
+            now = time.time()
+            self._peer.user = recv_params.local_user
+            self._peer.last_seen = now
+            self._peer.request_count += 1
+            # 对端表只在收到报文时增长, 顺带按间隔清除空闲的对端, 不需要单独的定时器
+            if now >= self._next_peer_sweep:
+                self._evict_idle_peers(now)
+        if recv_params.method_type == "response":
+            # 客户端只会回复NOTIFY: 结束对应的NOTIFY事务, 停止重传; 不按Subject分发到表格请求的处理函数
+            layer = self.notify_transactions.get(addr)
+            transaction = layer.match(recv_params) if layer is not None else None
+            if transaction is not None:
+                layer.complete(transaction, recv_params, COMPLETED if recv_params.status_code == 200 else FAILED)
+            return
+        if self.debug:
+            print(recv_params.message_type, recv_params.subject)
+        self.handlers.dispatch(recv_params)
+
+    def _generate_default_sdp(self, rtp_port):
+        """生成符合示例格式的SDP内容, 使用本地地址和分配到的RTP端口"""
         return (
             "v=0\r\n"
-            "o=SELUS 2890844527 1 IN IP4 192.168.1.4\r\n"
+            f"o=SELUS 2890844527 1 IN IP4 {self.local_ip}\r\n"
             "s=Sip Call\r\n"
-            "c=IN IP4 192.168.1.4\r\n"
+            f"c=IN IP4 {self.local_ip}\r\n"
             "t=0 0\r\n"
-            "m=audio 25272 RTP/AVP 8\r\n"
+            f"m=audio {rtp_port} RTP/AVP 8\r\n"
             "a=rtpmap:8 PCMA/8000\r\n"
             "a=sendrecv\r\n"
         )
\ No newline at end of file
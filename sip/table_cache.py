@@ -0,0 +1,114 @@
+import mmap
+import os
+import re
+import struct
+
+# 文件头: 魔数, 格式版本, 表格数, 缓存键长度; 其后为缓存键(服务器/席位/角色, 不定长)和目录
+HEADER = struct.Struct('<4sHHH')
+# 目录项: 请求主题, 表格版本, 数据偏移, 数据长度
+ENTRY = struct.Struct('<32s16sII')
+MAGIC = b'SIPT'
+FORMAT_VERSION = 2
+
+
+def _text(value: bytes) -> str:
+    return value.rstrip(b'\x00').decode('utf-8')
+
+
+class CachedTables:
+    """已映射到内存的缓存文件, 各表格数据为mmap上的memoryview, 不复制; 用完后调用close"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        self.key = None
+        self.tables = {}  # {请求主题: (版本, memoryview)}
+        try:
+            self._read()
+        except (struct.error, ValueError, UnicodeDecodeError):
+            self.close()
+            raise ValueError(f"表格缓存文件{path}已损坏")
+
+    def _read(self):
+        buffer = self.buffer
+        magic, format_version, count, key_length = HEADER.unpack_from(buffer)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError("格式不匹配")
+        if HEADER.size + key_length > len(buffer):
+            raise ValueError("数据越界")
+        self.key = bytes(buffer[HEADER.size:HEADER.size + key_length]).decode('utf-8')
+        for i in range(count):
+            subject, version, offset, length = ENTRY.unpack_from(buffer, HEADER.size + key_length + i * ENTRY.size)
+            if offset + length > len(buffer):
+                raise ValueError("数据越界")
+            self.tables[_text(subject)] = (_text(version), buffer[offset:offset + length])
+
+    def get(self, subject, version):
+        """版本一致时返回表格数据, 否则返回None"""
+        entry = self.tables.get(subject)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def close(self):
+        # 释放全部memoryview后才能关闭mmap
+        for _, data in self.tables.values():
+            data.release()
+        self.tables.clear()
+        self.buffer.release()
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TableCache:
+    """
+    服务器表格(频率/电台按键等)的本地缓存, 按服务器、席位和角色分文件保存解码后的原始记录及其版本
+
+    文件由定长文件头、目录和各表格的原始数据组成, 启动时直接mmap, 数据可交给ctypes/numpy按记录布局读取
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def cache_key(server_ip, server_port, user, role):
+        return f"{server_ip}:{server_port}/{user}/{role}"
+
+    def path(self, key):
+        # 键中的分隔符等替换为下划线, 作为文件名
+        return os.path.join(self.directory, re.sub(r'[^0-9A-Za-z.-]', '_', key) + '.tbl')
+
+    def load(self, key):
+        """映射key对应的缓存文件, 不存在、已损坏或键不一致时返回None"""
+        path = self.path(key)
+        try:
+            cached = CachedTables(path)
+        except (OSError, ValueError):
+            return None
+        if cached.key != key:
+            cached.close()
+            return None
+        return cached
+
+    def save(self, key, tables):
+        """保存全部表格, tables为{请求主题: (版本, 原始数据)}; 先写临时文件再替换, 读到的文件总是完整的"""
+        os.makedirs(self.directory, exist_ok=True)
+        key_data = key.encode('utf-8')
+        offset = HEADER.size + len(key_data) + ENTRY.size * len(tables)
+        header = [HEADER.pack(MAGIC, FORMAT_VERSION, len(tables), len(key_data)), key_data]
+        chunks = []
+        for subject, (version, data) in tables.items():
+            header.append(ENTRY.pack(subject.encode('utf-8'), version.encode('utf-8'), offset, len(data)))
+            chunks.append(data)
+            offset += len(data)
+        path = self.path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.writelines(header + chunks)
+        os.replace(temp_path, path)
@@ -0,0 +1,164 @@
+import re
+import socket
+import threading
+import time
+
+# 头部中的Content-Length(含紧凑形式l), 不区分大小写
+CONTENT_LENGTH_PATTERN = re.compile(rb'\r\n(?:content-length|l)[ \t]*:[ \t]*([^\r\n]*)', re.IGNORECASE)
+
+
+class SipStreamFramer:
+    """
+    TCP字节流上的SIP报文分帧: 以空行确定头部结束, 按Content-Length截取消息体
+
+    数据可按任意边界分批送入, 报文之间的CRLF保活包被忽略
+    """
+
+    def __init__(self, max_message_size=65536):
+        self.buffer = bytearray()
+        self.max_message_size = max_message_size
+        self._scan_from = 0  # 下次查找头部结束标记的起始位置, 避免重复扫描已收到的部分
+
+    def feed(self, data):
+        """送入收到的数据, 返回其中已完整的报文列表(bytes)"""
+        self.buffer += data
+        messages = []
+        while True:
+            message = self._next_message()
+            if message is None:
+                return messages
+            messages.append(message)
+
+    def _content_length(self, value):
+        """Content-Length只能是十进制数字; 负数、带符号或下划线等int()能接受的写法都会使字节流错位, 按分帧错误处理"""
+        value = value.strip()
+        if not value.isdigit():
+            raise ValueError(f"Content-Length无效: {bytes(value)!r}")
+        if len(value) > len(str(self.max_message_size)) or int(value) > self.max_message_size:
+            raise ValueError(f"Content-Length {value.decode()}超过上限{self.max_message_size}")
+        return int(value)
+
+    def _next_message(self):
+        buffer = self.buffer
+        # 跳过报文之间的CRLF
+        start = 0
+        while buffer.startswith(b'\r\n', start):
+            start += 2
+        if start:
+            del buffer[:start]
+            self._scan_from = 0
+        header_end = buffer.find(b'\r\n\r\n', self._scan_from)
+        if header_end == -1:
+            if len(buffer) > self.max_message_size:
+                raise ValueError(f"SIP头部超过{self.max_message_size}字节仍未结束")
+            # 结束标记可能跨越两批数据
+            self._scan_from = max(0, len(buffer) - 3)
+            return None
+        match = CONTENT_LENGTH_PATTERN.search(buffer, 0, header_end)
+        # 流式传输必须携带Content-Length, 缺失时按无消息体处理
+        content_length = self._content_length(match.group(1)) if match else 0
+        end = header_end + 4 + content_length
+        if end > self.max_message_size:
+            raise ValueError(f"SIP报文长度{end}超过上限{self.max_message_size}")
+        if len(buffer) < end:
+            self._scan_from = header_end
+            return None
+        message = bytes(buffer[:end])
+        del buffer[:end]
+        self._scan_from = 0
+        return message
+
+
+class TcpConnection:
+    """
+    客户端持久TCP连接: 所有报文复用同一条连接, 断开后在下次收发时自动重连
+
+    发送和接收可以在不同线程中进行
+    """
+
+    def __init__(self, remote_addr, local_addr=None, connect_timeout=5.0, reconnect_delay=1.0,
+                 max_message_size=65536):
+        self.remote_addr = remote_addr
+        self.local_addr = local_addr
+        self.connect_timeout = connect_timeout
+        self.reconnect_delay = reconnect_delay  # 连接失败后等待的时间
+        self.max_message_size = max_message_size
+        self.sock = None
+        self.framer = None
+        self.lock = threading.Lock()
+
+    def _open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # 重连时允许复用处于TIME_WAIT的本地端口
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            if self.local_addr is not None:
+                sock.bind(self.local_addr)
+            sock.settimeout(self.connect_timeout)
+            sock.connect(self.remote_addr)
+            sock.settimeout(None)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def connect(self):
+        """返回当前连接, 未连接时建立连接"""
+        with self.lock:
+            if self.sock is None:
+                self.sock = self._open()
+                # 新连接的字节流从头开始分帧
+                self.framer = SipStreamFramer(self.max_message_size)
+                print(f"TCP connected to {self.remote_addr[0]}:{self.remote_addr[1]}")
+            return self.sock
+
+    def _drop(self, sock):
+        """关闭已断开的连接"""
+        with self.lock:
+            if self.sock is sock:
+                self.sock = None
+        sock.close()
+
+    def send(self, data):
+        """发送报文, 连接已断开时重连后重发一次"""
+        sock = self.connect()
+        try:
+            sock.sendall(data)
+        except OSError:
+            self._drop(sock)
+            self.connect().sendall(data)
+
+    def receive(self, bufsize=65536):
+        """阻塞读取并返回已完整的报文列表; 连接断开或失败时返回空列表, 下次调用重连"""
+        try:
+            sock = self.connect()
+        except OSError as e:
+            print(f"TCP连接{self.remote_addr[0]}:{self.remote_addr[1]}失败: {e}")
+            time.sleep(self.reconnect_delay)
+            return []
+        framer = self.framer
+        try:
+            data = sock.recv(bufsize)
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(sock)
+            return []
+        try:
+            return framer.feed(data)
+        except ValueError as e:
+            # 分帧失败后字节流无法再对齐, 只能断开重连
+            print(f"TCP报文分帧出错: {e}")
+            self._drop(sock)
+            return []
+
+    def close(self):
+        with self.lock:
+            sock, self.sock = self.sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
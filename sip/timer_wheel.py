@@ -0,0 +1,102 @@
+import math
+import threading
+import time
+
+
+class Timer:
+    """定时器句柄, cancel后不再触发"""
+    __slots__ = ('wheel', 'expires', 'callback', 'args', 'active')
+
+    def __init__(self, wheel, expires, callback, args):
+        self.wheel = wheel
+        self.expires = expires  # 到期的刻度序号
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def cancel(self):
+        self.wheel.cancel(self)
+
+
+class TimerWheel:
+    """
+    哈希时间轮: 按到期刻度把定时器放入slots个槽中, 后台线程每个刻度只检查一个槽, 增加和取消均为O(1)
+
+    取消的定时器只做标记, 在其所在的槽被检查时丢弃; 没有定时器时后台线程阻塞在条件变量上不再走刻度。
+    回调在后台线程中执行, 不应阻塞
+    """
+
+    def __init__(self, tick=0.01, slots=512):
+        self.tick = tick  # 刻度(秒)
+        self.mask = slots - 1
+        if slots & self.mask:
+            raise ValueError("槽数须为2的幂")
+        self.slots = [[] for _ in range(slots)]
+        self.start = time.monotonic()
+        self.current = 0  # 已检查到的刻度
+        self.count = 0  # 未触发且未取消的定时器数
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def _now_tick(self):
+        return int((time.monotonic() - self.start) / self.tick)
+
+    def schedule(self, delay, callback, *args) -> Timer:
+        """delay秒后在后台线程中调用callback(*args)"""
+        with self.condition:
+            if self.count == 0:
+                # 空闲期间未走刻度, 直接跳到当前刻度
+                self.current = max(self.current, self._now_tick())
+            expires = max(self.current + 1, math.ceil((time.monotonic() - self.start + delay) / self.tick))
+            timer = Timer(self, expires, callback, args)
+            self.slots[expires & self.mask].append(timer)
+            self.count += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            elif self.count == 1:
+                self.condition.notify()
+        return timer
+
+    def cancel(self, timer):
+        with self.condition:
+            if timer.active:
+                timer.active = False
+                self.count -= 1
+
+    def _advance(self, now_tick):
+        """检查到now_tick为止的各槽, 返回到期的定时器"""
+        fired = []
+        while self.current < now_tick:
+            self.current += 1
+            index = self.current & self.mask
+            slot = self.slots[index]
+            if not slot:
+                continue
+            keep = []
+            for timer in slot:
+                if not timer.active:
+                    continue
+                if timer.expires <= self.current:
+                    timer.active = False
+                    self.count -= 1
+                    fired.append(timer)
+                else:
+                    keep.append(timer)
+            self.slots[index] = keep
+        return fired
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.count == 0:
+                    self.condition.wait()
+                delay = self.start + (self.current + 1) * self.tick - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                fired = self._advance(self._now_tick())
+            for timer in fired:
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    print(f"定时器回调出错: {e}")
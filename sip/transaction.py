@@ -0,0 +1,181 @@
+import threading
+from collections import deque
+
+from sip.timer_wheel import TimerWheel
+
+PENDING = "pending"  # 等待最终应答
+COMPLETED = "completed"  # 收到200应答
+FAILED = "failed"  # 收到非200的最终应答
+TIMEOUT = "timeout"  # 重传次数用尽仍无应答
+
+
+class Transaction:
+    """一次请求事务: 发送请求后返回给调用方的句柄, 收到最终应答或超时后完成"""
+    __slots__ = ('layer', 'params', 'message', 'interval', 'retransmissions', 'state', 'response',
+                 'retransmit_timer', 'timeout_timer')
+
+    def __init__(self, layer, params, message):
+        self.layer = layer
+        self.params = params  # 请求参数
+        self.message = message  # 已编码的请求报文, 重传时原样发送
+        self.interval = layer.t1  # 下一次重传的间隔
+        self.retransmissions = 0  # 已重传次数
+        self.state = PENDING
+        self.response = None  # 最终应答(SipMessageView)
+        self.retransmit_timer = None  # Timer A/E
+        self.timeout_timer = None  # Timer B/F
+
+    @property
+    def cseq(self):
+        return self.params.cseq
+
+    @property
+    def is_invite(self):
+        return self.params.message_type == 'INVITE'
+
+    def done(self):
+        return self.state != PENDING
+
+    def ok(self):
+        return self.state == COMPLETED
+
+    def wait(self, timeout=None):
+        """阻塞等待事务完成(不占用CPU), 返回是否收到200应答; timeout秒内未完成时返回False"""
+        with self.layer.condition:
+            self.layer.condition.wait_for(self.done, timeout)
+        return self.ok()
+
+    def __repr__(self):
+        return f"<Transaction CSeq={self.cseq} {self.params.message_type}/{self.params.subject} {self.state}>"
+
+
+_default_wheel = None
+_default_wheel_lock = threading.Lock()
+
+
+def default_wheel() -> TimerWheel:
+    """进程内各事务层共用的时间轮"""
+    global _default_wheel
+    with _default_wheel_lock:
+        if _default_wheel is None:
+            _default_wheel = TimerWheel()
+        return _default_wheel
+
+
+class TransactionLayer:
+    """
+    客户端事务层: 登记已发送的请求, 由接收线程按应答完成事务, 由时间轮按RFC 3261的定时器重传和超时
+
+    同时在途的事务数不超过window, 已满时发送方阻塞在条件变量上直到有事务完成; 等待应答、等待空闲
+    均阻塞在同一个条件变量上, 不忙等。应答按Via branch匹配事务(表格的各分片沿用请求的branch,
+    CSeq为分片序号), 未带branch时按CSeq匹配
+
+    定时器(RFC 3261 17.1): INVITE以Timer A重传, 间隔从T1起每次加倍, 收到临时应答后停止重传;
+    其他请求以Timer E重传, 间隔从T1起加倍且不超过T2, 收到临时应答后固定为T2; TCP等可靠传输不重传。
+    Timer B/F(64*T1)到期时事务超时, 唤醒等待方
+    """
+
+    def __init__(self, send, window=1, reliable=False, t1=0.5, t2=4.0, wheel=None):
+        self.send = send  # 发送已编码报文的函数
+        self.window = window  # 同时在途的事务数上限
+        self.reliable = reliable  # 可靠传输, 不重传
+        self.t1 = t1  # RTT估计值
+        self.t2 = t2  # 非INVITE请求的最大重传间隔
+        self.wheel = wheel if wheel is not None else default_wheel()
+        self.condition = threading.Condition()
+        self.pending = deque()  # 在途事务, 按发送顺序
+        self.by_branch = {}  # {branch: 在途事务}
+        self.by_cseq = {}  # {CSeq: 在途事务}
+
+    def begin(self, params, message) -> Transaction:
+        """登记并发送请求, 启动重传和超时定时器; 在途事务已满时等待"""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.pending) < self.window)
+            transaction = Transaction(self, params, message)
+            self.pending.append(transaction)
+            self.by_branch[params.branch] = transaction
+            self.by_cseq[params.cseq] = transaction
+            if not self.reliable:
+                transaction.retransmit_timer = self.wheel.schedule(transaction.interval, self._retransmit, transaction)
+            transaction.timeout_timer = self.wheel.schedule(64 * self.t1, self._timeout, transaction)
+        # 先登记再发送, 应答总能找到对应的事务; 发送失败(如TCP重连失败)时事务随即失败, 不占用在途窗口
+        try:
+            self.send(message)
+        except OSError:
+            self.complete(transaction, state=FAILED)
+            raise
+        return transaction
+
+    def current(self):
+        """最早的在途事务, 没有时为None"""
+        pending = self.pending
+        return pending[0] if pending else None
+
+    def match(self, response):
+        """
+        应答对应的在途事务, 没有时为None
+
+        branch和CSeq都对不上的应答(迟到、重传或已完成请求的应答)由调用方作为无主应答丢弃,
+        不能归给恰好在途的其他请求
+        """
+        transaction = self.by_branch.get(response.branch)
+        if transaction is None:
+            transaction = self.by_cseq.get(response.cseq)
+        return transaction
+
+    def _remove(self, transaction):
+        self.pending.remove(transaction)
+        self.by_branch.pop(transaction.params.branch, None)
+        self.by_cseq.pop(transaction.cseq, None)
+        for timer in (transaction.retransmit_timer, transaction.timeout_timer):
+            if timer is not None:
+                timer.cancel()
+        self.condition.notify_all()
+
+    def provisional(self, transaction):
+        """收到临时应答(1xx): INVITE停止重传, 其他请求按T2间隔重传"""
+        with self.condition:
+            if transaction.state != PENDING or transaction.retransmit_timer is None:
+                return
+            transaction.retransmit_timer.cancel()
+            if transaction.is_invite:
+                transaction.retransmit_timer = None
+            else:
+                transaction.interval = self.t2
+                transaction.retransmit_timer = self.wheel.schedule(self.t2, self._retransmit, transaction)
+
+    def complete(self, transaction, response=None, state=COMPLETED):
+        """事务收到最终应答, 唤醒等待方"""
+        with self.condition:
+            if transaction.state != PENDING:
+                return
+            transaction.state = state
+            transaction.response = response
+            self._remove(transaction)
+
+    def wait_idle(self, timeout=None):
+        """等待全部在途事务完成, 返回是否已空闲"""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending, timeout)
+
+    def _retransmit(self, transaction):
+        """Timer A/E到期: 重发请求, 间隔加倍(非INVITE不超过T2)"""
+        with self.condition:
+            if transaction.state != PENDING:
+                return
+            transaction.retransmissions += 1
+            transaction.interval *= 2
+            if not transaction.is_invite:
+                transaction.interval = min(transaction.interval, self.t2)
+            transaction.retransmit_timer = self.wheel.schedule(transaction.interval, self._retransmit, transaction)
+        print(f"消息 (CSeq: {transaction.cseq}) 超时未确认，进行第 {transaction.retransmissions} 次重传")
+        self.send(transaction.message)
+
+    def _timeout(self, transaction):
+        """Timer B/F到期: 事务超时"""
+        with self.condition:
+            if transaction.state != PENDING:
+                return
+            print(f"消息 (CSeq: {transaction.cseq}) 在{64 * self.t1:g}秒内未收到应答, 事务超时")
+            transaction.state = TIMEOUT
+            self._remove(transaction)
@@ -0,0 +1,39 @@
+"""
+测试公共夹具: 在本机回环地址上启动线程模式服务端和客户端(音频后端null, 不需要声卡), 各自在后台线程接收
+
+在仓库根目录执行(服务端从./config读取应答数据):
+    python -m pytest -q
+"""
+import contextlib
+import io
+import itertools
+import threading
+
+import pytest
+
+IP = '127.0.0.1'
+_ports = itertools.count(17000, 10)
+
+
+def _receive(target):
+    try:
+        target()
+    except OSError:
+        # 夹具结束时关闭了套接字
+        pass
+
+
+@pytest.fixture
+def sip_pair():
+    """返回(服务端, 客户端), 客户端尚未注册"""
+    from sip.sip_server import SIPServer
+    from sip.sip_client import SIPClient
+    port = next(_ports)
+    with contextlib.redirect_stdout(io.StringIO()):
+        server = SIPServer('bxp', IP, port, IP, port + 1, 29000 + port % 1000 * 2, 29500, audio_backend='null')
+        client = SIPClient('bxp', IP, port + 1, IP, port, 29500, 29000, audio_backend='null')
+    for target in (server.receive_message, client.receive_message):
+        threading.Thread(target=_receive, args=(target,), daemon=True).start()
+    yield server, client
+    server.socket.close()
+    client.socket.close()
@@ -0,0 +1,32 @@
+import pytest
+
+from data_classes.params_classes import InfoParams
+from message_generator.message_generator import MessageGenerator
+from message_generator.response_cache import ResponseCache
+
+SLOTS = ('branch', 'tag', 'call_id', 'cseq')
+
+
+def _cache():
+    cache = ResponseCache(MessageGenerator())
+    cache.compile('vcu_login', InfoParams(
+        local_user='bxp', local_ip='127.0.0.1', local_port=5060,
+        server_user='bxp', server_ip='127.0.0.1', server_port=5061,
+        method_type='response', message_type='INFO', subject='vcu_login',
+    ), SLOTS)
+    return cache
+
+
+def test_render_fills_slots():
+    [data] = _cache().render('vcu_login', {'branch': 'z9hG4bK-1', 'tag': 't1', 'call_id': 'c1', 'cseq': 7})
+    assert b'Call-ID: c1\r\n' in data
+    assert b'z9hG4bK-1' in data and b'tag=t1' in data
+
+
+@pytest.mark.parametrize('values', [
+    {'branch': 'z9hG4bK-1', 'tag': 't1', 'call_id': None, 'cseq': 7},
+    {'branch': 'z9hG4bK-1', 'tag': 't1', 'cseq': 7},
+])
+def test_render_rejects_missing_values(values):
+    with pytest.raises(ValueError, match='call_id'):
+        _cache().render('vcu_login', values)
@@ -0,0 +1,14 @@
+import time
+
+from rtp.rtp_engine import RtpEngine
+
+
+def test_idle_engine_does_not_tick():
+    engine = RtpEngine()
+    engine.start()
+    try:
+        time.sleep(0.1)
+        assert engine.stats['ticks'] == 0
+    finally:
+        engine.stop()
+    assert engine.thread is None
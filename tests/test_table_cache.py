@@ -0,0 +1,34 @@
+from sip.table_cache import TableCache
+
+
+def test_long_key_round_trip(tmp_path):
+    cache = TableCache(str(tmp_path))
+    key = TableCache.cache_key('192.168.100.200', 5060, 'bxp-' + 'x' * 80, 12)
+    cache.save(key, {'vcu_frequency': ('v1', b'\x01\x02\x03')})
+    cached = cache.load(key)
+    assert cached is not None
+    with cached:
+        assert cached.key == key
+        assert bytes(cached.get('vcu_frequency', 'v1')) == b'\x01\x02\x03'
+        assert cached.get('vcu_frequency', 'v2') is None
+
+
+def test_keys_sharing_a_long_prefix_do_not_collide(tmp_path):
+    # 两个键映射到同一个文件名, 只在第64字节之后不同
+    cache = TableCache(str(tmp_path))
+    prefix = 'y' * 70
+    assert cache.path(prefix + '/a') == cache.path(prefix + ':a')
+    cache.save(prefix + '/a', {'vcu_radio': ('v1', b'a')})
+    assert cache.load(prefix + ':a') is None
+
+
+def test_sync_without_cache_replaces_tables(sip_pair):
+    server, client = sip_pair
+    client.keep_alive().wait(2)
+    client.register().wait(2)
+    client.sync_tables()
+    frequencies, radios = list(client.frequency_list), dict(client.radios.items())
+    assert frequencies and radios
+    client.sync_tables()
+    assert client.frequency_list == frequencies
+    assert dict(client.radios.items()) == radios
@@ -0,0 +1,35 @@
+from message_decoder.payload_schema import RADIO_BT_INFO, FREQUENCY_BT_INFO
+
+
+def _radios(count):
+    return [RADIO_BT_INFO.record(iPosition=i, szFrequency='131.010', szCode=f'60{i:02d}', iRSType=i % 2, iIsCan=1)
+            for i in range(count)]
+
+
+def test_fewer_records_than_fragments(sip_pair):
+    """电台表最多7个分片, 只有3条记录时按3个分片发送, 客户端收齐后立即结束事务"""
+    server, client = sip_pair
+    server.update_table('vcu_radio', _radios(3))
+    transaction = client.get_radio_btn()
+    assert transaction.wait(2)
+    assert sorted(client.table_data['vcu_radio']) == [0x0301, 0x0302, 0x0303]
+    assert sorted(client.radios.radios) == ['6000', '6001', '6002']
+
+
+def test_empty_table(sip_pair):
+    """空表只有一个空的分片, 仍携带Content-Type"""
+    server, client = sip_pair
+    server.update_table('vcu_frequency', [])
+    transaction = client.get_frequency_btn()
+    assert transaction.wait(2)
+    assert list(client.table_data['vcu_frequency']) == [0x0101]
+    assert client.frequency_list == []
+
+
+def test_full_table_keeps_fragment_count(sip_pair):
+    server, client = sip_pair
+    records = [FREQUENCY_BT_INFO.record(iPosition=i, szFrequency=f'131.{i:03d}') for i in range(10)]
+    server.update_table('vcu_frequency', records)
+    assert client.get_frequency_btn().wait(2)
+    assert sorted(client.table_data['vcu_frequency']) == [0x0401, 0x0402, 0x0403, 0x0404]
+    assert len(client.frequency_list) == 10
@@ -0,0 +1,29 @@
+import pytest
+
+from message_decoder.freq_btn_info_decoder import FreqBtnInfo
+from message_decoder.fun_btn_info_decoder import MyFunBtnInfo
+from message_decoder.payload_schema import DEFAULT_ENCODING, FREQUENCY_BT_INFO, FUNC_BT_INFO
+from message_decoder.table_array import parse_table_array, text_column
+
+
+def test_gbk_names_decode_with_payload_encoding():
+    encoded = FREQUENCY_BT_INFO.encode_b64([
+        {'iPosition': 1, 'szFreqName': '塔台', 'szFrequency': '118.100'},
+        {'iPosition': 2, 'szFreqName': 'ATIS', 'szFrequency': '127.250'},
+    ])
+    infos = FreqBtnInfo.parse(encoded)
+    assert [info.freq_name for info in infos] == ['塔台', 'ATIS']
+    assert [info.frequency for info in infos] == ['118.100', '127.250']
+    assert FREQUENCY_BT_INFO.decode_b64(encoded)[0].szFreqName == '塔台'
+
+
+def test_gbk_function_name():
+    encoded = FUNC_BT_INFO.encode_b64([{'iPosition': 3, 'szName': '全部静音', 'iType': 1}])
+    assert '全部静音'.encode(DEFAULT_ENCODING) in FUNC_BT_INFO.encode([{'szName': '全部静音'}])
+    assert MyFunBtnInfo.parse(encoded)[0].name == '全部静音'
+
+
+def test_text_column_decodes_gbk():
+    pytest.importorskip('numpy')
+    array = parse_table_array(FreqBtnInfo, FREQUENCY_BT_INFO.encode_b64([{'szFreqName': '进近'}]))
+    assert text_column(array, 'szFreqName') == ['进近']
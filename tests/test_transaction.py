@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sip.transaction import TransactionLayer, PENDING
+
+
+def _request(cseq):
+    return SimpleNamespace(cseq=cseq, branch=f'z9hG4bK-{cseq}', message_type='INFO', subject='vcu_login')
+
+
+def _response(cseq, branch=None):
+    return SimpleNamespace(cseq=cseq, branch=branch)
+
+
+def test_match_by_branch_then_cseq():
+    sent = []
+    layer = TransactionLayer(sent.append, window=2)
+    first = layer.begin(_request(1), b'first')
+    second = layer.begin(_request(2), b'second')
+    assert layer.match(_response(99, 'z9hG4bK-2')) is second
+    assert layer.match(_response(1)) is first
+    assert sent == [b'first', b'second']
+
+
+def test_stray_response_does_not_complete_pending_request():
+    """已完成请求的迟到应答与唯一在途的请求既不同branch也不同CSeq, 不能匹配到它"""
+    layer = TransactionLayer(lambda message: None)
+    first = layer.begin(_request(1), b'first')
+    layer.complete(first, _response(1, 'z9hG4bK-1'))
+    second = layer.begin(_request(2), b'second')
+    assert layer.match(_response(1, 'z9hG4bK-1')) is None
+    assert layer.match(_response(7)) is None
+    assert second.state == PENDING
+    layer.complete(second)
+
+
+def test_send_failure_releases_the_window():
+    """发送失败时事务以FAILED结束并移出在途队列, 异常仍抛给调用方"""
+    def send(message):
+        raise ConnectionRefusedError()
+
+    layer = TransactionLayer(send)
+    with pytest.raises(OSError):
+        layer.begin(_request(1), b'first')
+    assert not layer.pending and not layer.by_cseq and not layer.by_branch
+    assert layer.wait_idle(0)